@@ -14,6 +14,16 @@ import sys
 import ctypes
 from ctypes import *
 
+from .state_decoder import StateFrameDecoder
+from .state_snapshot import SnapshotBuilder
+from .transport import ServerProxyPool
+from .batch import CommandBatch
+from .file_transfer import FileTransfer, FileTransferError
+from .servo_stream import ServoStream
+from .state_recorder import StateRecorder, StateReplayer
+from .state_events import StateEventHub, StateSubscription, MotionDoneSubscription
+from .supervisor import ConnectionSupervisor
+
 # from Cython.Compiler.Options import error_on_unknown_names
 
 is_init =False
@@ -128,6 +138,9 @@ class RobotStatePkg(Structure):
         ("weldingBreakOffState", WELDING_BREAKOFF_STATE), # 焊接中断状态
         ("check_sum", c_ushort)]  # 校验和
 
+state_snapshot_builder = SnapshotBuilder(RobotStatePkg)  # 状态包整帧解包器
+RobotStateSnapshot = state_snapshot_builder.snapshot_type  # 不可变状态快照类型
+
 
 class BufferedFileHandler(RotatingFileHandler):
     def __init__(self, filename, mode='a', maxBytes=0, backupCount=0, encoding=None, delay=False):
@@ -177,7 +190,9 @@ def calculate_file_md5(file_path):
 def xmlrpc_timeout(func):
     @wraps(func)
     def wrapper(self, *args, **kwargs):
-        if RPC.is_conect == False:
+        if not self.connected:
+            self.connect()#延迟连接
+        if self.is_conect == False:
             return -4
         else:
             result = func(self, *args, **kwargs)
@@ -212,60 +227,135 @@ class RPC():
 
     sock_cli_state_state = False
     closeRPC_state = False
-
-
-    def __init__(self, ip="192.168.58.2"):
+    call_stats = None#接口调用统计，EnableCallStats开启
+    local_kinematics = None#本地运动学，EnableLocalKinematics开启
+    file_transfer = None#文件传输引擎，首次上传/下载时创建
+    servo_stream = None#伺服指令流，ServoStreamStart开启
+    state_recorder = None#状态帧录制，EnableStateRecording开启
+    shared_state = None#状态共享内存发布，EnableSharedState开启
+    jog_session = None#交互式点动会话，EnableJogSession开启
+
+
+    def __init__(self, ip="192.168.58.2", connect_timeout=1.0, lazy=False, auto_reconnect=True, stale_timeout=0.5,
+                 reactor=None):
+        """
+        Args:
+            ip: 控制器IP
+            connect_timeout: 连接超时(s)，等待第一帧有效状态数据与探测20003端口各自的最长时间
+            lazy: 为True时构造时不连接，首次调用接口时再连接
+            auto_reconnect: 为True时由后台监督线程在连接断开后按指数退避自动重连
+            stale_timeout: 超过该时间(s)未收到有效状态帧视为陈旧，状态周期较长时自动放宽为10个周期
+            reactor: 可选的 StateReactor，多台机器人的状态流在 reactor 的单个线程中接收，不再各自启动接收线程
+        """
         self.ip_address = ip
         link = 'http://' + self.ip_address + ":20003"
-        self.robot = xmlrpc.client.ServerProxy(link)#xmlrpc连接机器人20003端口，用于发送机器人指令数据帧
+        self.robot = ServerProxyPool(link)#xmlrpc连接机器人20003端口，用于发送机器人指令数据帧，线程安全连接池
 
         self.sock_cli_state = None
         self.robot_realstate_exit = False
         self.robot_state_pkg = RobotStatePkg#机器人状态数据
+        self.robot_state = state_snapshot_builder.empty#机器人状态快照，每帧整体替换
+        self.state_decoder = None#实时状态帧解码器
+        self.state_history = None#状态历史环形缓冲区，EnableStateHistory开启
+        self.state_events = StateEventHub()#状态边沿事件订阅，每帧求值一次
+        self.state_ready = threading.Event()#收到第一帧校验通过的状态数据后置位
+        self.state_socket_ready = threading.Event()#重连建立新的20004套接字后置位，唤醒接收线程
+        self.last_frame_time = None#最近一帧有效状态的接收时刻(perf_counter)
+        self.stale_timeout = stale_timeout
+        self.auto_reconnect = auto_reconnect
+        self.supervisor = None#连接监督线程，auto_reconnect开启
+        self.reactor = reactor#多机状态流复用线程
+        self.connect_timeout = connect_timeout
+        self.connected = False
+        self.is_conect = True#本实例20003指令连接状态，多台机器人各自独立
+        self._connect_lock = threading.Lock()
 
         self.stop_event = threading.Event()  # 停止事件
-        self.connect_to_robot()
-        thread= threading.Thread(target=self.robot_state_routine_thread)#创建线程循环接收机器人状态数据
-        thread.daemon = True
-        thread.start()
-        time.sleep(1)
-        print(self.robot)
-
-
-        try:
-            # 调用 XML-RPC 方法
-            socket.setdefaulttimeout(1)
-            self.robot.GetControllerIP()
-        except socket.timeout:
-            print("XML-RPC connection timed out.")
-            RPC.is_conect = False
-
-        except socket.error as e:
-            print("可能是网络故障，请检查网络连接。")
-            RPC.is_conect = False
-        except Exception as e:
-            print("An error occurred during XML-RPC call:", e)
-            RPC.is_conect = False
-        finally:
-            # 恢复默认超时时间
-            self.robot = None
-            socket.setdefaulttimeout(None)
-            self.robot = xmlrpc.client.ServerProxy(link)
-    def connect_to_robot(self):
+        if not lazy:
+            self.connect()
+
+    def connect(self, timeout=None):
+        """
+        连接机器人：启动状态接收线程，等待第一帧有效状态数据，再以单次调用超时探测20003端口
+
+        Args:
+            timeout: 超时时间(s)，默认使用 connect_timeout
+        Returns:
+            连接是否可用
+        """
+        with self._connect_lock:
+            if self.connected:
+                return self.is_conect
+            self.connected = True
+            timeout = self.connect_timeout if timeout is None else timeout
+
+            self.connect_to_robot(timeout)
+            if self.reactor is None:
+                thread= threading.Thread(target=self.robot_state_routine_thread)#创建线程循环接收机器人状态数据
+                thread.daemon = True
+                thread.start()
+            if not self.state_ready.wait(timeout):
+                print("等待机器人实时状态数据超时")
+            print(self.robot)
+
+            # 探测连接使用独立的带超时连接，不修改全局 socket 超时
+            probe = ServerProxyPool(self.robot.uri, max_connections=1, timeout=timeout)
+            try:
+                # 调用 XML-RPC 方法
+                probe.GetControllerIP()
+            except socket.timeout:
+                print("XML-RPC connection timed out.")
+                self.is_conect = False
+
+            except socket.error as e:
+                print("可能是网络故障，请检查网络连接。")
+                self.is_conect = False
+            except Exception as e:
+                print("An error occurred during XML-RPC call:", e)
+                self.is_conect = False
+            finally:
+                probe.close()
+            if self.auto_reconnect:
+                self.supervisor = ConnectionSupervisor(self, stale_timeout=self.stale_timeout,
+                                                       connect_timeout=timeout).start()
+            return self.is_conect
+
+    def set_link_state(self, ok):
+        """设置20003指令连接状态（xmlrpc_timeout 据此拒绝调用），由监督线程在重连成功后恢复"""
+        self.is_conect = ok
+
+    def state_age(self):
+        """距最近一帧有效状态的时间(s)，尚未收到时为 inf"""
+        if self.last_frame_time is None:
+            return float('inf')
+        return time.perf_counter() - self.last_frame_time
+
+    def state_stale(self):
+        """状态快照是否陈旧（超过 stale_timeout 未更新），陈旧时不应以快照驱动机器人"""
+        return self.state_age() > self.stale_timeout
+
+    def connect_to_robot(self, timeout=None):
         """连接到机器人的实时端口"""
         print("SDK连接机器人")
         self.sock_cli_state = socket.socket(socket.AF_INET, socket.SOCK_STREAM)#套接字连接机器人20004端口，用于实时更新机器人状态数据
         try:
+            self.sock_cli_state.settimeout(timeout)
             self.sock_cli_state.connect((self.ip_address, self.ROBOT_REALTIME_PORT))
+            self.sock_cli_state.settimeout(None)
             self.sock_cli_state_state = True
         except Exception as ex:
             self.sock_cli_state_state = False
             print("SDK连接机器人实时端口失败", ex)
             return False
+        if self.reactor is not None:
+            self.reactor.attach(self)
         return True
 
     def reconnect(self):
-        """自动重连"""
+        """自动重连：开启自动重连时唤醒监督线程立即重连（不阻塞），否则阻塞重试5次"""
+        if self.supervisor is not None:
+            self.supervisor.force_reconnect()
+            return
         print("自动重连机制")
         for i in range(1,6):
             time.sleep(2)
@@ -274,95 +364,80 @@ class RPC():
                 return
 
     def robot_state_routine_thread(self):
-        """处理机器人状态数据包的线程例程"""
-
-        while not self.closeRPC_state:
-            recvbuf = bytearray(self.BUFFER_SIZE)
-            tmp_recvbuf = bytearray(self.BUFFER_SIZE)
-            state_pkg = bytearray(self.BUFFER_SIZE)
-            find_head_flag = False
-            index = 0
-            length = 0
-            tmp_len = 0
-            # if not self.sock_cli_state_state:
-            #     if not self.connect_to_robot():
-            #         return
-
+        """处理机器人状态数据包的线程例程，连接断开后等待监督线程重连，未开启自动重连时退出"""
+        decoder = StateFrameDecoder(RobotStatePkg, self.BUFFER_SIZE)
+        self.state_decoder = decoder
+        while not self.closeRPC_state and not self.stop_event.is_set():
+            if not self.sock_cli_state_state:
+                if not self.auto_reconnect:
+                    return
+                self.state_socket_ready.wait(0.5)
+                self.state_socket_ready.clear()
+                continue
+
+            sock = self.sock_cli_state
             try:
                 # while not self.robot_realstate_exit:
                 while not self.robot_realstate_exit and not self.stop_event.is_set():
-                    recvbyte = self.sock_cli_state.recv_into(recvbuf)
-                    # timestamp_ms = int(datetime.now().timestamp() * 1000)
-                    # print("当前时间戳（毫秒级）:", timestamp_ms)
+                    recvbyte = decoder.recv_from(sock)
                     if recvbyte <= 0:
-                        self.sock_cli_state.close()
-                        print("接收机器人状态字节 -1")
-                        return
-                    else:
-                        if tmp_len > 0:
-                            if tmp_len + recvbyte <= self.BUFFER_SIZE:
-                                recvbuf = tmp_recvbuf[:tmp_len] + recvbuf[:recvbyte]
-                                recvbyte += tmp_len
-                                tmp_len = 0
-                            else:
-                                tmp_len = 0
-
-                        for i in range(recvbyte):
-                            if format(recvbuf[i], '02X') == "5A" and not find_head_flag:
-                                if i + 4 < recvbyte:
-                                    if format(recvbuf[i+1], '02X') == "5A":
-                                        find_head_flag = True
-                                        state_pkg[0] = recvbuf[i]
-                                        index += 1
-                                        length = length | recvbuf[i + 4]
-                                        length = length << 8
-                                        length = length | recvbuf[i + 3]
-                                    else:
-                                        continue
-                                else:
-                                    tmp_recvbuf[:recvbyte - i] = recvbuf[i:recvbyte]
-                                    tmp_len = recvbyte - i
-                                    break
-                            elif find_head_flag and index < length + 5:
-                                state_pkg[index] = recvbuf[i]
-                                index += 1
-                            elif find_head_flag and index >= length + 5:
-                                if i + 1 < recvbyte:
-                                    checksum = sum(state_pkg[:index])
-                                    checkdata = 0
-                                    checkdata = checkdata | recvbuf[i + 1]
-                                    checkdata = checkdata << 8
-                                    checkdata = checkdata | recvbuf[i]
-
-                                    if checksum == checkdata:
-                                        self.robot_state_pkg = RobotStatePkg.from_buffer_copy(recvbuf)
-                                        find_head_flag = False
-                                        index = 0
-                                        length = 0
-                                        i += 1
-                                    else:
-                                        # print(checksum,":",checkdata,"===========================")
-                                        self.robot_state_pkg.jt_cur_pos[0] = 0
-                                        self.robot_state_pkg.jt_cur_pos[1] = 0
-                                        self.robot_state_pkg.jt_cur_pos[2] = 0
-                                        find_head_flag = False
-                                        index = 0
-                                        length = 0
-                                        i += 1
-                                else:
-                                    print("4.2")
-                                    tmp_recvbuf[:recvbyte - i] = recvbuf[i:recvbyte]
-                                    tmp_len = recvbyte - i
-                                    break
-                            else:
-                                continue
+                        raise ConnectionError("接收机器人状态字节 -1")
+                    decoder.decode(self.on_state_frame)
             except Exception as ex:
-                if not self.closeRPC_state:
-                    self.sock_cli_state.close()
-                    self.sock_cli_state_state = False
-                    self.SDK_state=False
-                    # self.reconnect()
-                    print("SDK读取机器人实时数据失败", ex)
+                if self.closeRPC_state or self.stop_event.is_set():
+                    return
+                sock.close()
+                decoder.reset()
+                self.on_state_lost(ex)
+
+    def on_state_lost(self, ex):
+        """20004 连接断开（接收线程或 reactor 调用）：标记断开并通知监督线程重连"""
+        if self.closeRPC_state or self.stop_event.is_set():
+            return
+        self.sock_cli_state_state = False
+        self.SDK_state=False
+        print("SDK读取机器人实时数据失败", ex)
+        if self.supervisor is not None:
+            self.supervisor.notify_lost(ex)
+
+    def on_state_frame(self, state_pkg, frame, timestamp=None):
+        """每个校验通过的状态帧调用一次：发布快照、记录历史与录制原始帧（回放时 timestamp 为录制时的接收时间）"""
+        if timestamp is None:
+            timestamp = time.time()
+        state = state_snapshot_builder.build(state_pkg, self.state_decoder.frame_count, timestamp)
+        self.last_frame_time = time.perf_counter()
+        # state_pkg 是解码器环形缓冲中的槽位, 若干帧后会被覆盖, 对外发布独立副本
+        self.robot_state_pkg = RobotStatePkg.from_buffer_copy(state_pkg)
+        self.robot_state = state
+        if not self.state_ready.is_set():
+            self.state_ready.set()
+        history = self.state_history
+        if history is not None:
+            history.append(state)
+        recorder = self.state_recorder
+        if recorder is not None:
+            recorder.write(frame, timestamp)
+        publisher = self.shared_state
+        if publisher is not None:
+            publisher.publish(frame, state.seq, timestamp)
+        if self.state_events.subscriptions:
+            self.state_events.process(state)
+
+    def _forward_kin(self, joint_pos, tool, user):
+        """运动指令补全目标位姿：开启本地运动学时使用本地正解，否则调用控制器"""
+        kinematics = self.local_kinematics
+        if kinematics is None:
+            return self.robot.GetForwardKin(joint_pos)
+        return kinematics.forward_kin(joint_pos, self.robot.GetForwardKin, (tool, user))
+
+    def _inverse_kin(self, desc_pos, tool, user):
+        """运动指令补全目标关节位置：开启本地运动学时以当前关节为初值本地逆解，否则调用控制器"""
+        kinematics = self.local_kinematics
+        if kinematics is None or self.state_stale():
+            # 状态陈旧时当前关节位置不可信，不作为本地逆解初值
+            return self.robot.GetInverseKin(0, desc_pos, -1)
+        return kinematics.inverse_kin(desc_pos, self.robot_state.jt_cur_pos,
+                                      lambda pos: self.robot.GetInverseKin(0, pos, -1), (tool, user))
 
     def setup_logging(self, output_model=1, file_path="", file_num=5):
         """用于处理日志"""
@@ -428,28 +503,44 @@ class RPC():
         return log_level
 
     def log_call(func):
-        """记录函数调用的日志操作"""
+        """记录函数调用的日志操作，开启调用统计时记录耗时与错误码"""
+        name = func.__name__
+
         @wraps(func)
         def wrapper(self, *args, **kwargs):
-            args_str = ', '.join(map(repr, args))
-            kwargs_str = ', '.join([f"{key}={value}" for key, value in kwargs.items()])
-            if (kwargs_str) == "":
-                call_message = f"Calling {func.__name__}" + f"({args_str}" + ")."
-            else:
-                call_message = f"Calling {func.__name__}" + f"({args_str}" + "," + f"{kwargs_str})."
-
-            self.log_info(call_message)
-            result = func(self, *args, **kwargs)
-            if isinstance(result, (list, tuple)) and len(result) > 0:
-                if result[0] == 0:
-                    self.log_debug(f"{func.__name__} returned: {result}.")
+            logger = self.logger
+            if logger:
+                args_str = ', '.join(map(repr, args))
+                kwargs_str = ', '.join([f"{key}={value}" for key, value in kwargs.items()])
+                if (kwargs_str) == "":
+                    call_message = f"Calling {name}" + f"({args_str}" + ")."
                 else:
-                    self.log_error(f"{func.__name__} Error occurred. returned: {result}")
+                    call_message = f"Calling {name}" + f"({args_str}" + "," + f"{kwargs_str})."
+                self.log_info(call_message)
+
+            stats = self.call_stats
+            if stats is None:
+                result = func(self, *args, **kwargs)
             else:
-                if result == 0:
-                    self.log_debug(f"{func.__name__} returned: {result}.")
+                start = time.perf_counter()
+                try:
+                    result = func(self, *args, **kwargs)
+                except Exception:
+                    stats.record(name, start, time.perf_counter() - start, exception=True)
+                    raise
+                stats.record(name, start, time.perf_counter() - start, result)
+
+            if logger:
+                if isinstance(result, (list, tuple)) and len(result) > 0:
+                    if result[0] == 0:
+                        self.log_debug(f"{name} returned: {result}.")
+                    else:
+                        self.log_error(f"{name} Error occurred. returned: {result}")
                 else:
-                    self.log_error(f"{func.__name__} Error occurred. returned: {result}")
+                    if result == 0:
+                        self.log_debug(f"{name} returned: {result}.")
+                    else:
+                        self.log_error(f"{name} Error occurred. returned: {result}")
 
             return result
 
@@ -503,6 +594,277 @@ class RPC():
         finally:
             sock1.close()
 
+    """   
+    @brief  批量提交指令，with 块内调用的接口合并为一次 system.multicall 请求发送
+    @param  [in] 默认参数 max_calls: 单次请求最多合并的指令数，默认100
+    @return 批量上下文 CommandBatch，接口调用返回 BatchResult，退出 with 块后 value 为返回值；
+            round_trips_saved 为节省的往返次数
+    """
+
+    def Batch(self, max_calls=100):
+        if not self.connected:
+            self.connect()
+        return CommandBatch(self, max_calls)
+
+    """   
+    @brief  获取机器人状态快照
+    @param  [in] NULL
+    @return 错误码 成功- 0, 失败-错误码
+    @return 返回值（调用成功返回） state 最近一帧完整的不可变状态快照 RobotStateSnapshot，
+            字段与 RobotStatePkg 同名（数组字段为元组），另含 seq 帧序号与 timestamp 接收时间戳(s)
+    """
+
+    @xmlrpc_timeout
+    def GetRobotStateSnapshot(self):
+        return 0, self.robot_state
+
+    """   
+    @brief  开启状态历史记录，接收线程将每一帧状态写入固定容量的 numpy 环形缓冲区
+    @param  [in] 默认参数 capacity：最多保留的帧数，默认15000（8ms周期约2分钟）
+    @return 错误码 成功- 0, 失败-错误码
+    """
+
+    def EnableStateHistory(self, capacity=15000):
+        from .state_history import StateHistory
+        self.state_history = StateHistory(int(capacity))
+        return 0
+
+    """   
+    @brief  关闭状态历史记录
+    @return 错误码 成功- 0, 失败-错误码
+    """
+
+    def DisableStateHistory(self):
+        self.state_history = None
+        return 0
+
+    """   
+    @brief  获取状态历史缓冲区
+    @return 错误码 成功- 0, 失败-错误码(未开启返回 -1)
+    @return 返回值（调用成功返回） history StateHistory 对象，window(n)/field(name, n) 返回最近n帧的无拷贝视图，export(path) 批量导出
+    """
+
+    def GetStateHistory(self):
+        if self.state_history is None:
+            return RobotError.ERR_OTHER
+        return 0, self.state_history
+
+    """   
+    @brief  获取连接健康指标
+    @return 错误码 成功- 0, 失败-错误码(未开启自动重连返回 -1)
+    @return 返回值（调用成功返回） health 字典：state_connected/rpc_connected 连接状态，state_age_ms 最近一帧距今时间，
+            stale 状态是否陈旧，frames/checksum_errors 帧计数，reconnects/attempts/consecutive_failures 重连统计，
+            stale_events 陈旧帧次数，backoff_s 当前退避时间，downtime_s 累计断开时长，last_error 最近错误
+    """
+
+    def GetConnectionHealth(self):
+        supervisor = self.supervisor
+        if supervisor is None:
+            return RobotError.ERR_OTHER
+        return 0, supervisor.health()
+
+    """   
+    @brief  订阅状态边沿事件，接收线程每帧求值一次，字段跳变时调用回调并置位事件，代替轮询
+    @param  [in] 必选参数 field：状态快照字段名，如 'motion_done'、'main_code'、'EmergencyStop'、'mc_queue_len'
+    @param  [in] 默认参数 trigger：'change'-变化，'rising'-由假变真，'falling'-由真变假，'above'/'below'-越过阈值，
+                'equals'-变为阈值，或 predicate(state) 函数（由False变True时触发，field 可为 None），默认'change'
+    @param  [in] 默认参数 threshold：'above'/'below'/'equals' 的阈值
+    @param  [in] 默认参数 callback：触发时在接收线程中调用 callback(state, old, new)，应尽快返回
+    @param  [in] 默认参数 once：触发一次后自动取消订阅，默认False
+    @param  [in] 默认参数 bit：只取字段的第 bit 位（数字IO字节）
+    @param  [in] 默认参数 index：数组字段取第 index 个元素
+    @return 错误码 成功- 0, 失败-错误码
+    @return 返回值（调用成功返回） subscription StateSubscription 对象，wait(timeout) 等待触发并返回触发帧快照，
+            clear() 清除触发标志，cancel() 取消订阅
+    """
+
+    def SubscribeStateEvent(self, field, trigger='change', threshold=None, callback=None, once=False, bit=None,
+                            index=None):
+        if field is not None and not hasattr(self.robot_state, field):
+            return RobotError.ERR_OTHER
+        try:
+            subscription = StateSubscription(field, trigger, threshold, callback, once, bit, index)
+        except ValueError:
+            return RobotError.ERR_OTHER
+        return 0, self.state_events.subscribe(subscription, self.robot_state)
+
+    """   
+    @brief  取消状态事件订阅
+    @param  [in] 必选参数 subscription：SubscribeStateEvent/MotionDoneEvent 返回的订阅对象
+    @return 错误码 成功- 0, 失败-错误码
+    """
+
+    def UnsubscribeStateEvent(self, subscription):
+        self.state_events.unsubscribe(subscription)
+        return 0
+
+    """   
+    @brief  创建运动完成事件，应在下发运动指令之前创建，之后 wait(timeout) 等待到位；
+            只接受观察到运动开始（motion_done==0）之后的到位帧，或 settle_frames 帧后仍到位（指令未引起运动）
+    @param  [in] 默认参数 settle_frames：未观察到运动时判定完成所需的帧数，默认3
+    @param  [in] 默认参数 callback：完成时在接收线程中调用 callback(state, old, new)
+    @return 错误码 成功- 0, 失败-错误码
+    @return 返回值（调用成功返回） subscription 运动完成订阅，wait(timeout) 返回到位帧快照，超时返回 None
+    """
+
+    def MotionDoneEvent(self, settle_frames=3, callback=None):
+        if not self.connected:
+            self.connect()#延迟连接
+        return 0, self.state_events.subscribe(MotionDoneSubscription(int(settle_frames), callback))
+
+    """   
+    @brief  开启状态共享内存发布，每个校验通过的状态帧写入共享内存，本机其他进程用
+            fairino.shared_state.SharedStateReader(ip) 无锁读取最新帧与历史，不再占用控制器连接
+    @param  [in] 默认参数 name：共享内存名，默认 fairino_state_<IP>
+    @param  [in] 默认参数 capacity：保留的历史帧数，默认256
+    @return 错误码 成功- 0, 失败-错误码
+    @return 返回值（调用成功返回） name 共享内存名
+    """
+
+    def EnableSharedState(self, name=None, capacity=256):
+        from .shared_state import SharedStatePublisher, shared_state_name
+        self.DisableSharedState()
+        if name is None:
+            name = shared_state_name(self.ip_address)
+        try:
+            self.shared_state = SharedStatePublisher(name, ctypes.sizeof(RobotStatePkg), int(capacity))
+        except OSError:
+            return RobotError.ERR_OTHER
+        return 0, name
+
+    """   
+    @brief  关闭状态共享内存发布并删除共享内存
+    @return 错误码 成功- 0, 失败-错误码
+    """
+
+    def DisableSharedState(self):
+        publisher = self.shared_state
+        self.shared_state = None
+        if publisher is not None:
+            publisher.close()
+        return 0
+
+    """   
+    @brief  开启状态帧录制，接收线程将每个校验通过的20004原始状态帧与接收时间戳追加写入录制文件
+    @param  [in] 必选参数 file_path：录制文件路径，已存在时覆盖
+    @param  [in] 默认参数 flush_interval：刷盘间隔(s)，默认1.0
+    @return 错误码 成功- 0, 失败-错误码
+    """
+
+    def EnableStateRecording(self, file_path, flush_interval=1.0):
+        self.DisableStateRecording()
+        try:
+            self.state_recorder = StateRecorder(file_path, ctypes.sizeof(RobotStatePkg), flush_interval)
+        except OSError:
+            return RobotError.ERR_SAVE_FILE_PATH_NOT_FOUND
+        return 0
+
+    """   
+    @brief  停止状态帧录制，写入索引并关闭录制文件
+    @return 错误码 成功- 0, 失败-错误码
+    @return 返回值（调用成功返回） frames 录制帧数
+    """
+
+    def DisableStateRecording(self):
+        recorder = self.state_recorder
+        self.state_recorder = None
+        if recorder is None:
+            return 0, 0
+        recorder.close()
+        return 0, recorder.frames
+
+    """   
+    @brief  回放状态录制文件，帧经解码后更新 robot_state 快照与状态历史，与实时接收相同；
+            离线回放时以 Robot.RPC(ip, lazy=True) 创建实例，回放期间不连接控制器
+    @param  [in] 必选参数 file_path：录制文件路径
+    @param  [in] 默认参数 speed：回放倍速，1.0-实时，0-尽快回放，默认1.0
+    @param  [in] 默认参数 start：是否立即在后台线程开始回放，False 时通过 step(n) 单步回放，默认True
+    @return 错误码 成功- 0, 失败-错误码
+    @return 返回值（调用成功返回） replayer StateReplayer 对象，支持 pause/resume/seek/step/stop/join
+    """
+
+    def ReplayStateRecording(self, file_path, speed=1.0, start=True):
+        if not os.path.exists(file_path):
+            return RobotError.ERR_OTHER
+        if not self.connected:
+            self.connected = True#离线回放，不再延迟连接控制器
+        replayer = StateReplayer(file_path, self, speed)
+        if start:
+            replayer.start()
+        return 0, replayer
+
+    """   
+    @brief  开启接口调用统计，记录每个接口的调用次数、耗时直方图与错误码
+    @param  [in] 默认参数 trace_methods：采样追踪的高频接口，默认 ('ServoJ', 'ServoCart')，为空时不追踪
+    @param  [in] 默认参数 sample_every：追踪接口每 N 次调用记录一次耗时与调用间隔，默认10
+    @return 错误码 成功- 0, 失败-错误码
+    """
+
+    def EnableCallStats(self, trace_methods=('ServoJ', 'ServoCart'), sample_every=10):
+        from .instrumentation import CallStats, SamplingTracer
+        tracer = SamplingTracer(trace_methods, int(sample_every)) if trace_methods else None
+        self.call_stats = CallStats(tracer)
+        return 0
+
+    """   
+    @brief  关闭接口调用统计
+    @return 错误码 成功- 0, 失败-错误码
+    """
+
+    def DisableCallStats(self):
+        self.call_stats = None
+        return 0
+
+    """   
+    @brief  获取接口调用统计
+    @param  [in] 默认参数 fmt：'dict'-字典，'json'-JSON字符串，'prometheus'-Prometheus文本格式
+    @return 错误码 成功- 0, 失败-错误码(未开启返回 -1)
+    @return 返回值（调用成功返回） stats 按累计耗时降序的各接口 count/mean_ms/p50_ms/p99_ms/max_ms/errors，及采样追踪记录 trace
+    """
+
+    def GetCallStats(self, fmt='dict'):
+        stats = self.call_stats
+        if stats is None:
+            return RobotError.ERR_OTHER
+        if fmt == 'json':
+            return 0, stats.to_json()
+        if fmt == 'prometheus':
+            return 0, stats.to_prometheus()
+        return 0, stats.summary()
+
+    """   
+    @brief  开启本地运动学，MoveJ/MoveL等运动指令缺省位姿/关节位置时使用本地正逆解，省去一次控制器往返
+    @param  [in] 默认参数 validate_count：每个工具号/工件号组合与控制器比对的次数，比对一致后才使用本地结果，默认3
+    @param  [in] 默认参数 cache_size：正逆解LRU缓存条目数，默认4096
+    @return 错误码 成功- 0, 失败-错误码
+    """
+
+    def EnableLocalKinematics(self, validate_count=3, cache_size=4096):
+        from .kinematics import LocalKinematics
+        self.local_kinematics = LocalKinematics(validate_count=int(validate_count), cache_size=int(cache_size))
+        return 0
+
+    """   
+    @brief  关闭本地运动学，运动指令恢复调用控制器正逆解
+    @return 错误码 成功- 0, 失败-错误码
+    """
+
+    def DisableLocalKinematics(self):
+        self.local_kinematics = None
+        return 0
+
+    """   
+    @brief  获取本地运动学求解器
+    @return 错误码 成功- 0, 失败-错误码(未开启返回 -1)
+    @return 返回值（调用成功返回） kinematics LocalKinematics 对象，stats 为本地求解/缓存命中/控制器求解/比对不一致次数；
+            修改工具/工件坐标系后调用 clear() 重新比对
+    """
+
+    def GetLocalKinematics(self):
+        if self.local_kinematics is None:
+            return RobotError.ERR_OTHER
+        return 0, self.local_kinematics
+
     """2024.12.23"""
     """   
        @brief 安全代码获取
@@ -510,7 +872,8 @@ class RPC():
     """
 
     def GetSafetyCode(self):
-        if (self.robot_state_pkg.safety_stop0_state == 1) or (self.robot_state_pkg.safety_stop1_state == 1):
+        state = self.robot_state
+        if (state.safety_stop0_state == 1) or (state.safety_stop1_state == 1):
             return 99
         return 0
     """2024.12.23"""
@@ -634,6 +997,43 @@ class RPC():
         error = self.robot.StartJOG(ref, nb, dir, vel, acc, max_dis)
         return error
 
+    """   
+    @brief  开启交互式点动会话：由独立线程发送点动指令，快速连续的点动意图合并为最新一个并限速发送，
+            保活超时（松开事件丢失、界面断开）立即发送ImmStopJOG
+    @param  [in] 默认参数 ref：0-关节点动,2-基坐标系点动,4-工具坐标系点动,8-工件坐标系点动，默认0
+    @param  [in] 默认参数 vel：速度百分比，[0~100] 默认20
+    @param  [in] 默认参数 acc：加速度百分比，[0~100] 默认100
+    @param  [in] 默认参数 max_dis：单次点动最大角度/距离，单位 ° 或 mm，默认30
+    @param  [in] 默认参数 min_interval：相邻两条点动指令的最小间隔，单位s，默认0.05
+    @param  [in] 默认参数 keepalive_timeout：保活超时，单位s，默认0.3
+    @return 错误码 成功-0  失败-错误码
+    @return 返回值（调用成功返回） session JogSession对象，jog(nb, dir, vel)点动，keepalive()续期，stop()减速停止，
+            immediate_stop()立即停止，latency()返回指令往返耗时(ms)，stats()返回合并/保活停止统计
+    """
+
+    def EnableJogSession(self, ref=0, vel=20.0, acc=100.0, max_dis=30.0, min_interval=0.05, keepalive_timeout=0.3):
+        from .jog_session import JogSession
+        if not self.connected:
+            self.connect()#延迟连接
+        self.DisableJogSession()
+        session = JogSession(self, int(ref), float(vel), float(acc), float(max_dis), float(min_interval),
+                             float(keepalive_timeout))
+        self.jog_session = session.start()
+        return 0, session
+
+    """   
+    @brief  关闭交互式点动会话，点动中时立即停止
+    @param  [in] NULL
+    @return 错误码 成功-0  失败-错误码
+    """
+
+    def DisableJogSession(self):
+        session = self.jog_session
+        self.jog_session = None
+        if session is not None:
+            session.close()
+        return 0
+
     """   
     @brief  jog 点动减速停止
     @param  [in] 必选参数：1-关节点动停止,3-基坐标系点动停止,5-工具坐标系点动停止,9-工件坐标系点动停止
@@ -694,7 +1094,7 @@ class RPC():
         offset_pos = list(map(float, offset_pos))
         if (desc_pos[0] == 0.0) and (desc_pos[1] == 0.0) and (desc_pos[2] == 0.0) and (desc_pos[3] == 0.0) and (
                 desc_pos[4] == 0.0) and (desc_pos[5] == 0.0):  # 若未输入参数则调用正运动学求解
-            ret = self.robot.GetForwardKin(joint_pos)  # 正运动学求解
+            ret = self._forward_kin(joint_pos, tool, user)  # 正运动学求解
             if ret[0] == 0:
                 desc_pos = [ret[1], ret[2], ret[3], ret[4], ret[5], ret[6]]
             else:
@@ -750,7 +1150,7 @@ class RPC():
                 return error
         if ((joint_pos[0] == 0.0) and (joint_pos[1] == 0.0) and (joint_pos[2] == 0.0) and (joint_pos[3] == 0.0)
                 and (joint_pos[4] == 0.0) and (joint_pos[5] == 0.0)):  # 若未输入参数则调用逆运动学求解
-            ret = self.robot.GetInverseKin(0, desc_pos, -1)  # 逆运动学求解
+            ret = self._inverse_kin(desc_pos, tool, user)  # 逆运动学求解
             if ret[0] == 0:
                 joint_pos = [ret[1], ret[2], ret[3], ret[4], ret[5], ret[6]]
             else:
@@ -826,7 +1226,7 @@ class RPC():
 
         if ((joint_pos_p[0] == 0.0) and (joint_pos_p[1] == 0.0) and (joint_pos_p[2] == 0.0) and (joint_pos_p[3] == 0.0)
                 and (joint_pos_p[4] == 0.0) and (joint_pos_p[5] == 0.0)):  # 若未输入参数则调用逆运动学求解
-            retp = self.robot.GetInverseKin(0, desc_pos_p, -1)  # 逆运动学求解
+            retp = self._inverse_kin(desc_pos_p, tool_p, user_p)  # 逆运动学求解
             if retp[0] == 0:
                 joint_pos_p = [retp[1], retp[2], retp[3], retp[4], retp[5], retp[6]]
             else:
@@ -835,7 +1235,7 @@ class RPC():
 
         if ((joint_pos_t[0] == 0.0) and (joint_pos_t[1] == 0.0) and (joint_pos_t[2] == 0.0) and (joint_pos_t[3] == 0.0)
                 and (joint_pos_t[4] == 0.0) and (joint_pos_t[5] == 0.0)):  # 若未输入参数则调用逆运动学求解
-            rett = self.robot.GetInverseKin(0, desc_pos_t, -1)  # 逆运动学求解
+            rett = self._inverse_kin(desc_pos_t, tool_t, user_t)  # 逆运动学求解
             if rett[0] == 0:
                 joint_pos_t = [rett[1], rett[2], rett[3], rett[4], rett[5], rett[6]]
             else:
@@ -899,7 +1299,7 @@ class RPC():
 
         if ((joint_pos_p[0] == 0.0) and (joint_pos_p[1] == 0.0) and (joint_pos_p[2] == 0.0) and (joint_pos_p[3] == 0.0)
                 and (joint_pos_p[4] == 0.0) and (joint_pos_p[5] == 0.0)):  # 若未输入参数则调用逆运动学求解
-            retp = self.robot.GetInverseKin(0, desc_pos_p, -1)  # 逆运动学求解
+            retp = self._inverse_kin(desc_pos_p, tool_p, user_p)  # 逆运动学求解
             if retp[0] == 0:
                 joint_pos_p = [retp[1], retp[2], retp[3], retp[4], retp[5], retp[6]]
             else:
@@ -908,7 +1308,7 @@ class RPC():
 
         if ((joint_pos_t[0] == 0.0) and (joint_pos_t[1] == 0.0) and (joint_pos_t[2] == 0.0) and (joint_pos_t[3] == 0.0)
                 and (joint_pos_t[4] == 0.0) and (joint_pos_t[5] == 0.0)):  # 若未输入参数则调用逆运动学求解
-            rett = self.robot.GetInverseKin(0, desc_pos_t, -1)  # 逆运动学求解
+            rett = self._inverse_kin(desc_pos_t, tool_t, user_t)  # 逆运动学求解
             if rett[0] == 0:
                 joint_pos_t = [rett[1], rett[2], rett[3], rett[4], rett[5], rett[6]]
             else:
@@ -963,7 +1363,7 @@ class RPC():
 
         if ((joint_pos[0] == 0.0) and (joint_pos[1] == 0.0) and (joint_pos[2] == 0.0) and (joint_pos[3] == 0.0)
                 and (joint_pos[4] == 0.0) and (joint_pos[5] == 0.0)):  # 若未输入参数则调用逆运动学求解
-            ret = self.robot.GetInverseKin(0, desc_pos, -1)  # 逆运动学求解
+            ret = self._inverse_kin(desc_pos, tool, user)  # 逆运动学求解
             if ret[0] == 0:
                 joint_pos = [ret[1], ret[2], ret[3], ret[4], ret[5], ret[6]]
             else:
@@ -1054,6 +1454,50 @@ class RPC():
         error = self.robot.ServoCart(mode, desc_pos, pos_gain, acc, vel, cmdT, filterT, gain)
         return error
 
+    """   
+    @brief  启动伺服指令流：调用ServoMoveStart后，由独立线程按绝对截止时间周期发送ServoJ/ServoCart
+    @param  [in] 默认参数 source: 伺服点生成器/可迭代对象，每周期取一个，耗尽后停止发送；默认None，通过返回对象的put()加入伺服点
+    @param  [in] 默认参数 mode: 'joint'-关节空间伺服(ServoJ)，伺服点为joint_pos或(joint_pos, axisPos)；'cart'-笛卡尔空间伺服(ServoCart)，伺服点为desc_pos，默认'joint'
+    @param  [in] 默认参数 cmdT: 指令下发周期，单位s，默认0.008
+    @param  [in] 默认参数 cart_mode: 笛卡尔伺服模式，[0]-绝对运动(基坐标系)，[1]-增量运动(基坐标系)，[2]-增量运动(工具坐标系)，默认0
+    @param  [in] 默认参数 queue_size: 伺服点队列长度，默认64
+    @return 错误码 成功-0  失败-错误码
+    @return 返回值（调用成功返回） stream ServoStream对象，put(setpoint)加入伺服点，join()等待生成器耗尽，stats()返回周期耗时/抖动/供应不足统计；
+            伺服点供应不足时保持上一伺服点（增量模式发送零增量）
+    """
+
+    @log_call
+    @xmlrpc_timeout
+    def ServoStreamStart(self, source=None, mode='joint', cmdT=0.008, cart_mode=0, queue_size=64):
+        if self.GetSafetyCode() != 0:
+            return self.GetSafetyCode()
+        if self.servo_stream is not None and self.servo_stream.running:
+            return RobotError.ERR_OTHER
+        stream = ServoStream(self, mode, float(cmdT), int(cart_mode), int(queue_size))
+        error = self.robot.ServoMoveStart()
+        if error != 0:
+            return error
+        stream.start(source)
+        self.servo_stream = stream
+        return 0, stream
+
+    """   
+    @brief  停止伺服指令流并调用ServoMoveEnd
+    @param  [in] NULL
+    @return 错误码 成功-0  失败-错误码
+    """
+
+    @log_call
+    @xmlrpc_timeout
+    def ServoStreamStop(self):
+        stream = self.servo_stream
+        if stream is None:
+            return RobotError.ERR_OTHER
+        stream.stop()
+        self.servo_stream = None
+        error = self.robot.ServoMoveEnd()
+        return error
+
     """   
     @brief  关节扭矩控制开始
     @param  [in] NULL
@@ -1162,7 +1606,7 @@ class RPC():
         ovl = float(ovl)
         if ((desc_pos[0] == 0.0) and (desc_pos[1] == 0.0) and (desc_pos[2] == 0.0) and (desc_pos[3] == 0.0)
                 and (desc_pos[4] == 0.0) and (desc_pos[5] == 0.0)):  # 若未输入参数则调用正运动学求解
-            ret = self.robot.GetForwardKin(joint_pos)  # 正运动学求解
+            ret = self._forward_kin(joint_pos, tool, user)  # 正运动学求解
             if ret[0] == 0:
                 desc_pos = [ret[1], ret[2], ret[3], ret[4], ret[5], ret[6]]
             else:
@@ -1229,7 +1673,7 @@ class RPC():
         blendR = float(blendR)
         if ((joint_pos[0] == 0.0) and (joint_pos[1] == 0.0) and (joint_pos[2] == 0.0) and (joint_pos[3] == 0.0)
                 and (joint_pos[4] == 0.0) and (joint_pos[5] == 0.0)):  # 若未输入参数则调用逆运动学求解
-            ret = self.robot.GetInverseKin(0, desc_pos, -1)  # 逆运动学求解
+            ret = self._inverse_kin(desc_pos, tool, user)  # 逆运动学求解
             if ret[0] == 0:
                 joint_pos = [ret[1], ret[2], ret[3], ret[4], ret[5], ret[6]]
             else:
@@ -1417,11 +1861,11 @@ class RPC():
         # else:
         #     return error
         if 0 <= id < 8:
-            level = (self.robot_state_pkg.cl_dgt_input_l & (0x01 << id)) >> id
+            level = (self.robot_state.cl_dgt_input_l & (0x01 << id)) >> id
             return 0, level
         elif 8 <= id < 16:
             id -= 8
-            level = (self.robot_state_pkg.cl_dgt_input_h & (0x01 << id)) >> id
+            level = (self.robot_state.cl_dgt_input_h & (0x01 << id)) >> id
             return 0, level
         else:
             return -1
@@ -1449,7 +1893,7 @@ class RPC():
         #     return error
         if 0 <= id < 2:
             id+=1
-            level = (self.robot_state_pkg.tl_dgt_input_l & (0x01 << id)) >> id
+            level = (self.robot_state.tl_dgt_input_l & (0x01 << id)) >> id
             return 0,level
         else:
             return -1
@@ -1535,7 +1979,7 @@ class RPC():
         # else:
         #     return error
         if 0 <= id < 2:
-            return 0,self.robot_state_pkg.cl_analog_input[id] / 40.95
+            return 0,self.robot_state.cl_analog_input[id] / 40.95
         else:
             return -1
 
@@ -1560,7 +2004,7 @@ class RPC():
         #     return error, value
         # else:
         #     return error
-        return 0, self.robot_state_pkg.tl_anglog_input / 40.95
+        return 0, self.robot_state.tl_anglog_input / 40.95
 
     """   
     @brief  获取机器人末端点记录按钮状态
@@ -1598,7 +2042,7 @@ class RPC():
         #     return error, value
         # else:
         #     return error
-        return 0,self.robot_state_pkg.tl_dgt_output_l
+        return 0,self.robot_state.tl_dgt_output_l
 
     """   
     @brief  获取机器人控制器DO输出状态
@@ -1618,7 +2062,8 @@ class RPC():
         #     return error, [do_state_h, do_state_l]
         # else:
         #     return error
-        return 0, [self.robot_state_pkg.cl_dgt_output_h,self.robot_state_pkg.cl_dgt_output_l]
+        state = self.robot_state
+        return 0, [state.cl_dgt_output_h,state.cl_dgt_output_l]
 
     """   
     @brief  等待控制箱模拟量输入
@@ -2203,8 +2648,7 @@ class RPC():
         #     return error, [_error[1], _error[2], _error[3], _error[4], _error[5], _error[6]]
         # else:
         #     return error
-        return 0,[self.robot_state_pkg.jt_cur_pos[0],self.robot_state_pkg.jt_cur_pos[1],self.robot_state_pkg.jt_cur_pos[2],
-                  self.robot_state_pkg.jt_cur_pos[3],self.robot_state_pkg.jt_cur_pos[4],self.robot_state_pkg.jt_cur_pos[5]]
+        return 0, list(self.robot_state.jt_cur_pos)
     """   
     @brief  获取关节当前位置 (弧度)
     @param  [in] 默认参数 flag：0-阻塞，1-非阻塞 默认1
@@ -2240,8 +2684,7 @@ class RPC():
         #     return error, [_error[1], _error[2], _error[3], _error[4], _error[5], _error[6]]
         # else:
         #     return error
-        return 0,[self.robot_state_pkg.actual_qd[0],self.robot_state_pkg.actual_qd[1],self.robot_state_pkg.actual_qd[2],
-                  self.robot_state_pkg.actual_qd[3],self.robot_state_pkg.actual_qd[4],self.robot_state_pkg.actual_qd[5]]
+        return 0, list(self.robot_state.actual_qd)
 
     """   
     @brief  获取关节反馈加速度-deg/s^2
@@ -2260,8 +2703,7 @@ class RPC():
         #     return error, [_error[1], _error[2], _error[3], _error[4], _error[5], _error[6]]
         # else:
         #     return error
-        return 0,[self.robot_state_pkg.actual_qdd[0],self.robot_state_pkg.actual_qdd[1],self.robot_state_pkg.actual_qdd[2],
-                  self.robot_state_pkg.actual_qdd[3],self.robot_state_pkg.actual_qdd[4],self.robot_state_pkg.actual_qdd[5]]
+        return 0, list(self.robot_state.actual_qdd)
 
     """   
     @brief  获取TCP指令合速度
@@ -2280,7 +2722,7 @@ class RPC():
         #     return error, [_error[1], _error[2]]
         # else:
         #     return error
-        return 0,[self.robot_state_pkg.target_TCP_CmpSpeed[0],self.robot_state_pkg.target_TCP_CmpSpeed[1]]
+        return 0, list(self.robot_state.target_TCP_CmpSpeed)
 
     """   
     @brief  获取TCP反馈合速度
@@ -2299,7 +2741,7 @@ class RPC():
         #     return error, [_error[1], _error[2]]
         # else:
         #     return error
-        return 0, [self.robot_state_pkg.actual_TCP_CmpSpeed[0], self.robot_state_pkg.actual_TCP_CmpSpeed[1]]
+        return 0, list(self.robot_state.actual_TCP_CmpSpeed)
 
     """   
     @brief  获取TCP指令速度
@@ -2318,8 +2760,7 @@ class RPC():
         #     return error, [_error[1], _error[2], _error[3], _error[4], _error[5], _error[6]]
         # else:
         #     return error
-        return 0,[self.robot_state_pkg.target_TCP_Speed[0],self.robot_state_pkg.target_TCP_Speed[1],self.robot_state_pkg.target_TCP_Speed[2],
-                  self.robot_state_pkg.target_TCP_Speed[3],self.robot_state_pkg.target_TCP_Speed[4],self.robot_state_pkg.target_TCP_Speed[5]]
+        return 0, list(self.robot_state.target_TCP_Speed)
 
     """   
     @brief  获取TCP反馈速度
@@ -2338,8 +2779,7 @@ class RPC():
         #     return error, [_error[1], _error[2], _error[3], _error[4], _error[5], _error[6]]
         # else:
         #     return error
-        return 0,[self.robot_state_pkg.actual_TCP_Speed[0],self.robot_state_pkg.actual_TCP_Speed[1],self.robot_state_pkg.actual_TCP_Speed[2],
-                  self.robot_state_pkg.actual_TCP_Speed[3],self.robot_state_pkg.actual_TCP_Speed[4],self.robot_state_pkg.actual_TCP_Speed[5]]
+        return 0, list(self.robot_state.actual_TCP_Speed)
 
     """   
     @brief  获取当前工具位姿
@@ -2358,8 +2798,7 @@ class RPC():
         #     return error, [_error[1], _error[2], _error[3], _error[4], _error[5], _error[6]]
         # else:
         #     return error
-        return 0,[self.robot_state_pkg.tl_cur_pos[0],self.robot_state_pkg.tl_cur_pos[1],self.robot_state_pkg.tl_cur_pos[2],
-                  self.robot_state_pkg.tl_cur_pos[3],self.robot_state_pkg.tl_cur_pos[4],self.robot_state_pkg.tl_cur_pos[5]]
+        return 0, list(self.robot_state.tl_cur_pos)
 
     """   
     @brief  获取当前工具坐标系编号
@@ -2378,7 +2817,7 @@ class RPC():
         #     return error, _error[1]
         # else:
         #     return error
-        return 0,self.robot_state_pkg.tool
+        return 0,self.robot_state.tool
 
     """   
     @brief  获取当前工件坐标系编号 
@@ -2397,7 +2836,7 @@ class RPC():
         #     return error, _error[1]
         # else:
         #     return error
-        return 0, self.robot_state_pkg.user
+        return 0, self.robot_state.user
 
     """   
     @brief  获取当前末端法兰位姿
@@ -2416,8 +2855,7 @@ class RPC():
         #     return error, [_error[1], _error[2], _error[3], _error[4], _error[5], _error[6]]
         # else:
         #     return error
-        return 0,[self.robot_state_pkg.flange_cur_pos[0],self.robot_state_pkg.flange_cur_pos[1],self.robot_state_pkg.flange_cur_pos[2],
-                  self.robot_state_pkg.flange_cur_pos[3],self.robot_state_pkg.flange_cur_pos[4],self.robot_state_pkg.flange_cur_pos[5]]
+        return 0, list(self.robot_state.flange_cur_pos)
     """   
     @brief  逆运动学，笛卡尔位姿求解关节位置
     @param  [in] 必选参数 type:0-绝对位姿 (基坐标系)，1-相对位姿（基坐标系），2-相对位姿（工具坐标系）
@@ -2519,8 +2957,7 @@ class RPC():
         #     return error, [_error[1], _error[2], _error[3], _error[4], _error[5], _error[6]]
         # else:
         #     return error
-        return 0,[self.robot_state_pkg.jt_cur_tor[0],self.robot_state_pkg.jt_cur_tor[1],self.robot_state_pkg.jt_cur_tor[2],
-                  self.robot_state_pkg.jt_cur_tor[3],self.robot_state_pkg.jt_cur_tor[4],self.robot_state_pkg.jt_cur_tor[5]]
+        return 0, list(self.robot_state.jt_cur_tor)
 
     """   
     @brief  获取当前负载的质量
@@ -2680,7 +3117,7 @@ class RPC():
         #     return error, _error[1]
         # else:
         #     return error
-            return 0,self.robot_state_pkg.motion_done
+            return 0,self.robot_state.motion_done
     """   
     @brief  查询机器人错误码
     @param  [in] NULL
@@ -2697,7 +3134,8 @@ class RPC():
         #     return error, [_error[1], _error[2]]
         # else:
         #     return error
-        return 0, [self.robot_state_pkg.main_code,self.robot_state_pkg.sub_code]
+        state = self.robot_state
+        return 0, [state.main_code,state.sub_code]
 
     """   
     @brief  查询机器人示教管理点位数据
@@ -2739,7 +3177,7 @@ class RPC():
         #     return error, _error[1]
         # else:
         #     return error
-        return 0, self.robot_state_pkg.mc_queue_len
+        return 0, self.robot_state.mc_queue_len
 
     """   
     @brief  获取机器人急停状态
@@ -2757,7 +3195,7 @@ class RPC():
         #     return error, _error[1]
         # else:
         #     return error
-        return 0, self.robot_state_pkg.EmergencyStop
+        return 0, self.robot_state.EmergencyStop
 
     """   
     @brief  获取安全停止信号
@@ -2776,7 +3214,8 @@ class RPC():
         # else:
         #     return error
 
-        return 0, [self.robot_state_pkg.safety_stop0_state,self.robot_state_pkg.safety_stop1_state]
+        state = self.robot_state
+        return 0, [state.safety_stop0_state,state.safety_stop1_state]
 
     """   
     @brief  获取SDK与机器人的通讯状态
@@ -3343,7 +3782,7 @@ class RPC():
         #     return error, _error[1]
         # else:
         #     return error
-        return 0,self.robot_state_pkg.robot_state
+        return 0,self.robot_state.robot_state
 
     """   
     @brief  获取已加载的作业程序名
@@ -3678,8 +4117,7 @@ class RPC():
         #     return error, [_error[1], _error[2], _error[3], _error[4], _error[5], _error[6]]
         # else:
         #     return error
-        return 0,[self.robot_state_pkg.ft_sensor_data[0],self.robot_state_pkg.ft_sensor_data[1],self.robot_state_pkg.ft_sensor_data[2],
-                  self.robot_state_pkg.ft_sensor_data[3],self.robot_state_pkg.ft_sensor_data[4],self.robot_state_pkg.ft_sensor_data[5]]
+        return 0, list(self.robot_state.ft_sensor_data)
 
     """   
     @brief  获取力传感器原始力/扭矩数据
@@ -3698,8 +4136,7 @@ class RPC():
         #     return error, [_error[1], _error[2], _error[3], _error[4], _error[5], _error[6]]
         # else:
         #     return error
-        return 0,[self.robot_state_pkg.ft_sensor_raw_data[0],self.robot_state_pkg.ft_sensor_raw_data[1],self.robot_state_pkg.ft_sensor_raw_data[2],
-                  self.robot_state_pkg.ft_sensor_raw_data[3],self.robot_state_pkg.ft_sensor_raw_data[4],self.robot_state_pkg.ft_sensor_raw_data[5]]
+        return 0, list(self.robot_state.ft_sensor_raw_data)
 
     """   
     @brief  碰撞守护
@@ -4783,6 +5220,37 @@ class RPC():
         log_level = self.set_log_level(lvl)
         return 0
 
+    """   
+    @brief  设置文件传输参数（Lua程序、轨迹文件、点位表等的上传下载）
+    @param  [in] 默认参数 chunk_size：接收缓冲区/发送分块大小(字节)，默认1MB
+    @param  [in] 默认参数 retries：传输中断或校验失败后的重试次数，默认2
+    @param  [in] 默认参数 progress：进度回调 progress(stats)，stats.done/stats.total 为已传输/文件字节数，stats.throughput 为吞吐量(MB/s)
+    @return 错误码 成功- 0, 失败-错误码
+    """
+
+    def SetFileTransferOptions(self, chunk_size=1024 * 1024, retries=2, progress=None):
+        self.file_transfer = FileTransfer(self.ip_address, int(chunk_size), int(retries), progress=progress)
+        return 0
+
+    def _file_transfer_call(self, direction, prepare, file_path, size_format="{:10d}"):
+        """执行一次文件上传/下载，失败返回 ERR_OTHER"""
+        transfer = self.file_transfer
+        if transfer is None:
+            transfer = self.file_transfer = FileTransfer(self.ip_address)
+        try:
+            if direction == 'download':
+                rtn = transfer.download(prepare, file_path)
+            else:
+                rtn = transfer.upload(prepare, file_path, size_format)
+        except FileTransferError as e:
+            self.log_error(str(e))
+            return RobotError.ERR_OTHER
+        stats = transfer.last_stats
+        if rtn == 0 and stats is not None:
+            self.log_info(f"{direction} {stats.name}: {stats.done} bytes in {stats.elapsed:.3f}s, "
+                          f"{stats.throughput:.2f} MB/s, attempts {stats.attempts}")
+        return rtn
+
     """   
     @brief  下载点位表数据库
     @param  [in] pointTableName 要下载的点位表名称    pointTable1.db
@@ -4796,56 +5264,13 @@ class RPC():
         if not os.path.exists(save_file_path):
             return RobotError.ERR_SAVE_FILE_PATH_NOT_FOUND
 
-        rtn = self.robot.PointTableDownload(point_table_name)
-        if rtn == -1:
-            return RobotError.ERR_POINTTABLE_NOTFOUND
-        elif rtn != 0:
+        def prepare():
+            rtn = self.robot.PointTableDownload(point_table_name)
+            if rtn == -1:
+                return RobotError.ERR_POINTTABLE_NOTFOUND
             return rtn
-        port = 20011
-        client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        client.settimeout(2)
-        try:
-            client.connect((self.ip_address, port))
-        except Exception as e:
-            client.close()
-            return RobotError.ERR_OTHER
-        total_buffer = bytearray(1024 * 1024 * 50)  # 50Mb
-        total_size = 0
-        recv_md5 = ""
-        recv_size = 0
-        find_head_flag = False
-        while True:
-            buffer = client.recv(1024)
-            length = len(buffer)
-            if length < 1:
-                return RobotError.ERR_OTHER
-            total_buffer[total_size:total_size + len(buffer)] = buffer
-
-            total_size += len(buffer)
-            if not find_head_flag and total_size > 4 and total_buffer[:4].decode('utf-8') == "/f/b":
-                find_head_flag = True
-            # 找到文件头后，提取文件大小和MD5校验码。文件大小的信息位于总数据的第5到第12个字节，MD5校验码的信息位于总数据的第13到第44个字节。
-            if find_head_flag and total_size > 12 + 32:
-                recv_size = int(total_buffer[4:12].decode('utf-8'))
-                recv_md5 = total_buffer[12:44].decode('utf-8')
-            # 接收到整个文件跳出循环
-            if find_head_flag and total_size == recv_size:
-                break
-        if total_size == 0:
-            return RobotError.ERR_OTHER
-        file_buffer = total_buffer[12 + 32:total_size - 4]
 
-        with open(os.path.join(save_file_path, point_table_name), 'wb') as file_writer:
-            file_writer.write(file_buffer[:total_size - 16 - 32])
-
-        check_md5 = calculate_file_md5(save_file_path + point_table_name)
-        if check_md5 == recv_md5:
-            client.send("SUCCESS".encode('utf-8'))
-            return 0
-        else:
-            client.send("FAIL".encode('utf-8'))
-            os.remove(os.path.join(save_file_path, point_table_name))
-            return RobotError.ERR_OTHER
+        return self._file_transfer_call('download', prepare, os.path.join(save_file_path, point_table_name))
 
     """   
     @brief  上传点位表数据库
@@ -4868,50 +5293,8 @@ class RPC():
             return -1
 
         point_table_name = os.path.basename(point_table_file_path)
-
-        rtn = self.robot.PointTableUpload(point_table_name)
-        if rtn != 0:
-            return rtn
-
-        port = 20010
-
-        client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        client.settimeout(2)
-
-        try:
-            client.connect((self.ip_address, port))
-        except Exception as e:
-            client.close()
-            return RobotError.ERR_OTHER
-
-        client.settimeout(2)
-
-        # client.receive_timeout = 2000
-        # client.send_timeout = 2000
-
-        send_md5 = calculate_file_md5(point_table_file_path)
-
-        head_data = f"/f/b{total_size:08d}{send_md5}"
-        num = client.send(head_data.encode('utf-8'))
-        if num < 1:
-            return RobotError.ERR_OTHER
-
-        with open(point_table_file_path, 'rb') as fs:
-            file_bytes = fs.read()
-
-        num = client.send(file_bytes)
-        if num < 1:
-            return RobotError.ERR_OTHER
-        end_data = "/b/f"
-        num = client.send(end_data.encode('utf-8'))
-        if num < 1:
-            return RobotError.ERR_OTHER
-
-        result_buf = client.recv(1024)
-        if result_buf[:7].decode('utf-8') == "SUCCESS":
-            return RobotError.ERR_SUCCESS
-        else:
-            return RobotError.ERR_OTHER
+        return self._file_transfer_call('upload', lambda: self.robot.PointTableUpload(point_table_name),
+                                        point_table_file_path, "{:08d}")
 
     """   
     @brief  点位表切换
@@ -4977,53 +5360,14 @@ class RPC():
     def __FileDownLoad(self, fileType, fileName, saveFilePath):
         if not os.path.exists(saveFilePath):
             return RobotError.ERR_SAVE_FILE_PATH_NOT_FOUND
-        rtn = self.robot.FileDownload(fileType, fileName)
-        if rtn == -1:
-            return RobotError.ERR_POINTTABLE_NOTFOUND
-        elif rtn != 0:
+
+        def prepare():
+            rtn = self.robot.FileDownload(fileType, fileName)
+            if rtn == -1:
+                return RobotError.ERR_POINTTABLE_NOTFOUND
             return rtn
-        port = 20011
-        client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        client.settimeout(2)
-        try:
-            client.connect((self.ip_address, port))
-        except Exception as e:
-            client.close()
-            return RobotError.ERR_OTHER
-        total_buffer = bytearray(1024 * 1024 * 50)  # 50Mb
-        total_size = 0
-        recv_md5 = ""
-        recv_size = 0
-        find_head_flag = False
-        while True:
-            buffer = client.recv(1024)
-            length = len(buffer)
-            if length < 1:
-                return RobotError.ERR_OTHER
-            total_buffer[total_size:total_size + len(buffer)] = buffer
-            total_size += len(buffer)
-            if not find_head_flag and total_size > 4 and total_buffer[:4].decode('utf-8') == "/f/b":
-                find_head_flag = True
-            # 找到文件头后，提取文件大小和MD5校验码。文件大小的信息位于总数据的第5到第12个字节，MD5校验码的信息位于总数据的第13到第44个字节。
-            if find_head_flag and total_size > 12 + 32:
-                recv_size = int(total_buffer[4:12].decode('utf-8'))
-                recv_md5 = total_buffer[12:44].decode('utf-8')
-            # 接收到整个文件跳出循环
-            if find_head_flag and total_size == recv_size:
-                break
-        if total_size == 0:
-            return RobotError.ERR_OTHER
-        file_buffer = total_buffer[12 + 32:total_size - 4]
-        with open(os.path.join(saveFilePath, fileName), 'wb') as file_writer:
-            file_writer.write(file_buffer[:total_size - 16 - 32])
-        check_md5 = calculate_file_md5(saveFilePath + fileName)
-        if check_md5 == recv_md5:
-            client.send("SUCCESS".encode('utf-8'))
-            return 0
-        else:
-            client.send("FAIL".encode('utf-8'))
-            os.remove(os.path.join(saveFilePath, fileName))
-            return RobotError.ERR_OTHER
+
+        return self._file_transfer_call('download', prepare, os.path.join(saveFilePath, fileName))
 
     """   
     @brief  上传文件
@@ -5046,47 +5390,7 @@ class RPC():
             print("Files larger than 500 MB are not supported!")
             return -1
         file_name = os.path.basename(filePath)
-        rtn = self.robot.FileUpload(fileType, file_name)
-        if rtn != 0:
-            return rtn
-
-        port = 20010
-
-        client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        client.settimeout(20)
-
-        try:
-            client.connect((self.ip_address, port))
-        except Exception as e:
-            client.close()
-            return RobotError.ERR_OTHER
-        client.settimeout(20)
-
-        send_md5 = calculate_file_md5(filePath)
-        head_data = f"/f/b{total_size:10d}{send_md5}"
-        num = client.send(head_data.encode('utf-8'))
-
-        if num < 1:
-            return RobotError.ERR_OTHER
-
-        with open(filePath, "rb") as f:
-            while True:
-                data = f.read(2 * 1024 * 1024)
-                if not data:  # 如果读取到文件末尾
-                    end_data = "/b/f"
-                    num = client.send(end_data.encode('utf-8'))  # 发送文件传输完成的标志
-                    if num < 1:
-                        return RobotError.ERR_OTHER
-                    break  # 跳出循环
-                num = client.send(data)  # 将读取的数据通过socket连接发送给客户端
-                if num < 1:
-                    return RobotError.ERR_OTHER
-        time.sleep(0.5)
-        result_buf = client.recv(1024)
-        if result_buf[:7].decode('utf-8') == "SUCCESS":
-            return RobotError.ERR_SUCCESS
-        else:
-            return RobotError.ERR_OTHER
+        return self._file_transfer_call('upload', lambda: self.robot.FileUpload(fileType, file_name), filePath)
 
     """   
     @brief  删除文件
@@ -6032,7 +6336,7 @@ class RPC():
         offset_pos = list(map(float, offset_pos))
         if (desc_pos[0] == 0.0) and (desc_pos[1] == 0.0) and (desc_pos[2] == 0.0) and (desc_pos[3] == 0.0) and (
                 desc_pos[4] == 0.0) and (desc_pos[5] == 0.0):  # 若未输入参数则调用正运动学求解
-            ret = self.robot.GetForwardKin(joint_pos)  # 正运动学求解
+            ret = self._forward_kin(joint_pos, tool, user)  # 正运动学求解
             if ret[0] == 0:
                 desc_pos = [ret[1], ret[2], ret[3], ret[4], ret[5], ret[6]]
             else:
@@ -6082,7 +6386,7 @@ class RPC():
         offset_pos = list(map(float, offset_pos))
         if ((joint_pos[0] == 0.0) and (joint_pos[1] == 0.0) and (joint_pos[2] == 0.0) and (joint_pos[3] == 0.0)
                 and (joint_pos[4] == 0.0) and (joint_pos[5] == 0.0)):  # 若未输入参数则调用逆运动学求解
-            ret = self.robot.GetInverseKin(0, desc_pos, -1)  # 逆运动学求解
+            ret = self._inverse_kin(desc_pos, tool, user)  # 逆运动学求解
             if ret[0] == 0:
                 joint_pos = [ret[1], ret[2], ret[3], ret[4], ret[5], ret[6]]
             else:
@@ -6156,7 +6460,7 @@ class RPC():
 
         if ((joint_pos_p[0] == 0.0) and (joint_pos_p[1] == 0.0) and (joint_pos_p[2] == 0.0) and (joint_pos_p[3] == 0.0)
                 and (joint_pos_p[4] == 0.0) and (joint_pos_p[5] == 0.0)):  # 若未输入参数则调用逆运动学求解
-            retp = self.robot.GetInverseKin(0, desc_pos_p, -1)  # 逆运动学求解
+            retp = self._inverse_kin(desc_pos_p, tool_p, user_p)  # 逆运动学求解
             if retp[0] == 0:
                 joint_pos_p = [retp[1], retp[2], retp[3], retp[4], retp[5], retp[6]]
             else:
@@ -6165,7 +6469,7 @@ class RPC():
 
         if ((joint_pos_t[0] == 0.0) and (joint_pos_t[1] == 0.0) and (joint_pos_t[2] == 0.0) and (joint_pos_t[3] == 0.0)
                 and (joint_pos_t[4] == 0.0) and (joint_pos_t[5] == 0.0)):  # 若未输入参数则调用逆运动学求解
-            rett = self.robot.GetInverseKin(0, desc_pos_t, -1)  # 逆运动学求解
+            rett = self._inverse_kin(desc_pos_t, tool_t, user_t)  # 逆运动学求解
             if rett[0] == 0:
                 joint_pos_t = [rett[1], rett[2], rett[3], rett[4], rett[5], rett[6]]
             else:
@@ -7002,6 +7306,11 @@ class RPC():
     def SetRobotRealtimeStateSamplePeriod(self,period):
         period = int(period)
         error = self.robot.SetRobotRealtimeStateSamplePeriod(period)
+        if error == 0:
+            #陈旧帧判定至少放宽到10个反馈周期
+            self.stale_timeout = max(self.stale_timeout, period * 10 / 1000.0)
+            if self.supervisor is not None:
+                self.supervisor.stale_timeout = self.stale_timeout
         return error
 
     """   
@@ -7031,8 +7340,7 @@ class RPC():
     @log_call
     @xmlrpc_timeout
     def GetJointDriverTorque(self):
-        return 0,[self.robot_state_pkg.jointDriverTorque[0],self.robot_state_pkg.jointDriverTorque[1],self.robot_state_pkg.jointDriverTorque[2],
-                  self.robot_state_pkg.jointDriverTorque[3],self.robot_state_pkg.jointDriverTorque[4],self.robot_state_pkg.jointDriverTorque[5]]
+        return 0, list(self.robot_state.jointDriverTorque)
 
 
     """   
@@ -7044,8 +7352,7 @@ class RPC():
     @log_call
     @xmlrpc_timeout
     def GetJointDriverTemperature (self):
-        return 0,[self.robot_state_pkg.jointDriverTemperature [0],self.robot_state_pkg.jointDriverTemperature [1],self.robot_state_pkg.jointDriverTemperature[2],
-                  self.robot_state_pkg.jointDriverTemperature [3],self.robot_state_pkg.jointDriverTemperature[4],self.robot_state_pkg.jointDriverTemperature[5]]
+        return 0, list(self.robot_state.jointDriverTemperature)
 
 
 
@@ -7174,7 +7481,7 @@ class RPC():
     @log_call
     @xmlrpc_timeout
     def GetSoftwareUpgradeState(self):
-        error = self.robot_state_pkg.softwareUpgradeState
+        error = self.robot_state.softwareUpgradeState
         return error
 
     """   
@@ -7684,15 +7991,27 @@ class RPC():
     def CloseRPC(self):
         # 设置停止事件以通知线程停止
         self.stop_event.set()
+        self.state_socket_ready.set()
+        if self.supervisor is not None:
+            self.supervisor.stop()
+            self.supervisor = None
+        if self.reactor is not None:
+            self.reactor.detach(self)
 
         # 如果线程仍在运行，则等待其结束
         # if self.thread.is_alive():
         #     self.thread.join()
 
+        self.DisableJogSession()
+        self.DisableStateRecording()
+        self.DisableSharedState()
+
         # 清理 XML-RPC 代理
         if self.robot is not None:
+            self.robot.close()
             self.robot = None  # 将代理设置为 None，释放资源
-            self.sock_cli_state.close()
+            if self.sock_cli_state is not None:
+                self.sock_cli_state.close()
             self.sock_cli_state = None
             self.robot_state_pkg = None
             self.closeRPC_state = True
@@ -7765,7 +8084,8 @@ class RPC():
     @xmlrpc_timeout
 
     def GetGripperRotNum(self):
-        return 0,self.robot_state_pkg.gripper_fault,self.robot_state_pkg.gripperRotNum
+        state = self.robot_state
+        return 0,state.gripper_fault,state.gripperRotNum
 
     """   
         @brief 获取旋转夹爪的旋转速度百分比
@@ -7778,7 +8098,8 @@ class RPC():
     @xmlrpc_timeout
 
     def GetGripperRotSpeed(self):
-        return 0, self.robot_state_pkg.gripper_fault, self.robot_state_pkg.gripperRotSpeed
+        state = self.robot_state
+        return 0, state.gripper_fault, state.gripperRotSpeed
 
     """   
         @brief 获取旋转夹爪的旋转力矩百分比
@@ -7791,7 +8112,8 @@ class RPC():
     @xmlrpc_timeout
 
     def GetGripperRotTorque(self):
-        return 0, self.robot_state_pkg.gripper_fault, self.robot_state_pkg.gripperRotTorque
+        state = self.robot_state
+        return 0, state.gripper_fault, state.gripperRotTorque
 
     """   
        @brief 开始Ptp运动FIR滤波
@@ -7832,6 +8154,32 @@ class RPC():
         error = self.__FileUpLoad(20, filePath)
         return error
 
+    """   
+       @brief 由numpy关节轨迹生成轨迹J文件并上传，可选重采样到控制器周期与关节空间RDP简化
+       @param  [in] 必选参数 fileName 控制器上的轨迹文件名 如 testJ.txt（LoadTrajectoryJ 时为 /fruser/traj/testJ.txt）
+       @param  [in] 必选参数 joints (N,6) 关节位置，单位°
+       @param  [in] 默认参数 timestamps (N,) 各点时间(s)，与 period 一起使用
+       @param  [in] 默认参数 period 重采样周期(s)，默认None不重采样
+       @param  [in] 默认参数 point_period 未指定 timestamps 时输入点间隔(s)
+       @param  [in] 默认参数 tolerance 简化允许的最大关节空间偏差(°)，默认None不简化；简化后应以 LoadTrajectoryJ(opt=1) 控制点方式加载
+       @return 错误码 成功- 0, 失败-错误码
+       @return 返回值（调用成功返回） stats 字典：input_points/output_points 点数，max_deviation 简化偏差(°)，bytes 文件大小
+    """
+
+    def TrajectoryJUpLoadArray(self, fileName, joints, timestamps=None, period=None, point_period=None, tolerance=None):
+        import tempfile
+        from .trajectory_builder import build_trajectory_j
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, os.path.basename(str(fileName)))
+            try:
+                stats = build_trajectory_j(file_path, joints, timestamps, period, point_period, tolerance)
+            except ValueError:
+                return RobotError.ERR_OTHER
+            error = self.TrajectoryJUpLoad(file_path)
+        if error != 0:
+            return error
+        return 0, stats
+
     """2024.12.16"""
     """   
        @brief 删除轨迹J文件
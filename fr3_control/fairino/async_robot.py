@@ -0,0 +1,473 @@
+"""
+asyncio 版 FR3 客户端
+
+AsyncRPC 在单个事件循环中完成:
+  - 20004 实时状态: asyncio 流读取 + StateFrameDecoder 解码, 每帧发布 RobotStateSnapshot
+  - 20003 指令: 基于 asyncio 流的 XML-RPC (HTTP/1.1 长连接池), 多个指令可并发等待
+  - 运动完成: 由状态帧驱动的 future, 不再轮询 GetRobotMotionDone
+
+一个事件循环即可同时驱动双臂、底盘与 GUI 桥接, 无需为每台设备创建线程。
+
+示例:
+    async def main():
+        right = AsyncRPC('192.168.58.2')
+        left = AsyncRPC('192.168.58.3')
+        await asyncio.gather(right.connect(), left.connect())
+
+        done = right.motion_done()          # 先创建 future, 再下发指令
+        await right.MoveJ([0, -90, 90, 0, 90, 0], 0, 0)
+        await done
+
+        # 双臂并发运动并等待全部到位
+        await asyncio.gather(right.MoveJAndWait(j_right, 0, 0), left.MoveJAndWait(j_left, 0, 0))
+        await asyncio.gather(right.close(), left.close())
+"""
+
+import asyncio
+import time
+import xmlrpc.client
+
+from .Robot import RobotStatePkg, RobotError, state_snapshot_builder
+from .state_decoder import StateFrameDecoder
+
+XMLRPC_PORT = 20003
+REALTIME_PORT = 20004
+MESSAGE_PORT = 8080
+
+
+class _XmlRpcConnection:
+    """单条到 20003 端口的 HTTP/1.1 连接"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.keep_alive = True
+
+    def close(self):
+        self.keep_alive = False
+        self.writer.close()
+
+    async def request(self, host, handler, body):
+        """发送一次 POST 请求并返回响应体"""
+        header = (f"POST {handler} HTTP/1.1\r\n"
+                  f"Host: {host}\r\n"
+                  f"User-Agent: fairino-async\r\n"
+                  f"Content-Type: text/xml\r\n"
+                  f"Content-Length: {len(body)}\r\n\r\n")
+        self.writer.write(header.encode('ascii') + body)
+        await self.writer.drain()
+
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        lines = head.decode('latin-1').split("\r\n")
+        status = lines[0].split(" ", 2)
+        if len(status) < 2 or status[1] != "200":
+            self.close()
+            raise xmlrpc.client.ProtocolError(host + handler, int(status[1]) if len(status) > 1 else -1,
+                                              lines[0], {})
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+
+        connection = headers.get('connection', '').lower()
+        if connection == 'close' or (status[0] == "HTTP/1.0" and connection != 'keep-alive'):
+            self.keep_alive = False
+        if 'content-length' in headers:
+            data = await self.reader.readexactly(int(headers['content-length']))
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            data = await self._read_chunked()
+        else:
+            data = await self.reader.read()
+            self.keep_alive = False
+        if not self.keep_alive:
+            self.writer.close()
+        return data
+
+    async def _read_chunked(self):
+        chunks = []
+        while True:
+            size_line = await self.reader.readuntil(b"\r\n")
+            size = int(size_line.split(b";", 1)[0], 16)
+            if size == 0:
+                await self.reader.readuntil(b"\r\n")
+                return b"".join(chunks)
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readexactly(2)
+
+
+class _RemoteMethod:
+    """arm.rpc.SetSpeed(20) 形式的远程方法代理"""
+
+    def __init__(self, client, name):
+        self._client = client
+        self._name = name
+
+    def __getattr__(self, name):
+        return _RemoteMethod(self._client, f"{self._name}.{name}")
+
+    def __call__(self, *params):
+        return self._client.call(self._name, *params)
+
+
+class _RemoteProxy:
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, name):
+        return _RemoteMethod(self._client, name)
+
+
+class AsyncRPC:
+    """
+    asyncio 版机器人客户端
+
+    Args:
+        ip: 控制器 IP
+        timeout: 单次 XML-RPC 调用超时 (s)
+        max_connections: 20003 端口并发连接上限
+    """
+
+    def __init__(self, ip="192.168.58.2", timeout=5.0, max_connections=4):
+        self.ip_address = ip
+        self.timeout = timeout
+        self.host = f"{ip}:{XMLRPC_PORT}"
+        self.handler = "/RPC2"
+        self.rpc = _RemoteProxy(self)  # 任意控制器方法: await arm.rpc.GetControllerIP()
+
+        self.robot_state = state_snapshot_builder.empty
+        self.state_decoder = StateFrameDecoder(RobotStatePkg)
+        self._state_reader = None
+        self._state_writer = None
+        self._state_task = None
+        self._waiters = []          # [(predicate, future)]
+        self._first_frame = None
+
+        self._idle = []             # 空闲的 20003 连接
+        self._slots = asyncio.Semaphore(max_connections)
+        self._closed = False
+
+    # ------------------------------------------------------------------ 连接管理
+
+    async def connect(self, state_timeout=2.0):
+        """
+        连接 20004 实时端口并等待第一帧有效状态
+
+        Returns:
+            错误码 成功-0, 失败-RobotError.ERR_SOCKET_COM_FAILED
+        """
+        loop = asyncio.get_running_loop()
+        self._first_frame = loop.create_future()
+        try:
+            self._state_reader, self._state_writer = await asyncio.wait_for(
+                asyncio.open_connection(self.ip_address, REALTIME_PORT), state_timeout)
+        except (OSError, asyncio.TimeoutError) as ex:
+            print("SDK连接机器人实时端口失败", ex)
+            return RobotError.ERR_SOCKET_COM_FAILED
+        self._state_task = loop.create_task(self._state_loop())
+        try:
+            await asyncio.wait_for(asyncio.shield(self._first_frame), state_timeout)
+        except asyncio.TimeoutError:
+            print("等待机器人实时状态超时")
+            return RobotError.ERR_SOCKET_COM_FAILED
+        return 0
+
+    async def close(self):
+        """关闭全部连接并取消等待中的 future"""
+        self._closed = True
+        if self._state_task is not None:
+            self._state_task.cancel()
+            try:
+                await self._state_task
+            except asyncio.CancelledError:
+                pass
+            self._state_task = None
+        if self._state_writer is not None:
+            self._state_writer.close()
+            self._state_writer = None
+        for conn in self._idle:
+            conn.close()
+        self._idle.clear()
+        for _, future in self._waiters:
+            if not future.done():
+                future.cancel()
+        self._waiters.clear()
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    # ------------------------------------------------------------------ 实时状态
+
+    async def _state_loop(self):
+        """读取 20004 数据流并逐帧发布快照"""
+        decoder = self.state_decoder
+        try:
+            while True:
+                data = await self._state_reader.read(65536)
+                if not data:
+                    print("接收机器人状态字节 -1")
+                    break
+                decoder.feed(data)
+                decoder.decode(self._on_state_frame)
+        except (OSError, asyncio.IncompleteReadError) as ex:
+            print("SDK读取机器人实时数据失败", ex)
+        finally:
+            for _, future in self._waiters:
+                if not future.done():
+                    future.set_exception(ConnectionError("机器人实时状态连接已断开"))
+            self._waiters.clear()
+
+    def _on_state_frame(self, state_pkg, frame):
+        state = state_snapshot_builder.build(state_pkg, self.state_decoder.frame_count, time.time())
+        self.robot_state = state
+        if self._first_frame is not None and not self._first_frame.done():
+            self._first_frame.set_result(state)
+        if self._waiters:
+            pending = []
+            for predicate, future in self._waiters:
+                if future.done():
+                    continue
+                try:
+                    if predicate(state):
+                        future.set_result(state)
+                        continue
+                except Exception as ex:
+                    future.set_exception(ex)
+                    continue
+                pending.append((predicate, future))
+            self._waiters = pending
+
+    def wait_for(self, predicate):
+        """
+        返回一个在状态帧满足 predicate(state) 时完成的 future, 结果为该帧快照
+
+        Args:
+            predicate: 以 RobotStateSnapshot 为参数的判断函数
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((predicate, future))
+        return future
+
+    def motion_done(self, settle_frames=3):
+        """
+        运动完成 future, 应在下发运动指令之前创建
+
+        控制器受理指令后需要若干周期才会清除到位信号, 因此只接受: 已观察到 motion_done==0
+        之后的到位帧, 或创建之后至少 settle_frames 帧仍为到位 (指令未引起运动)
+        """
+        start_seq = self.robot_state.seq
+        seen_moving = []
+
+        def predicate(state):
+            if state.motion_done == 0:
+                seen_moving.append(True)
+                return False
+            return bool(seen_moving) or state.seq - start_seq >= settle_frames
+
+        return self.wait_for(predicate)
+
+    async def wait_motion_done(self, timeout=None, settle_frames=3):
+        """等待当前运动完成, 返回完成时的状态快照, 超时抛出 asyncio.TimeoutError"""
+        return await asyncio.wait_for(self.motion_done(settle_frames), timeout)
+
+    # ------------------------------------------------------------------ 20003 指令
+
+    async def _acquire(self):
+        while self._idle:
+            conn = self._idle.pop()
+            if conn.keep_alive and not conn.writer.is_closing():
+                return conn
+        reader, writer = await asyncio.open_connection(self.ip_address, XMLRPC_PORT)
+        return _XmlRpcConnection(reader, writer)
+
+    async def call(self, method, *params):
+        """
+        异步调用控制器 XML-RPC 方法
+
+        Returns:
+            控制器返回值 (与 xmlrpc.client.ServerProxy 相同)
+        """
+        if self._closed:
+            raise ConnectionError("AsyncRPC 已关闭")
+        body = xmlrpc.client.dumps(params, method).encode('utf-8')
+        async with self._slots:
+            conn = await self._acquire()
+            try:
+                data = await asyncio.wait_for(conn.request(self.host, self.handler, body), self.timeout)
+            except BaseException:
+                conn.close()
+                raise
+            if conn.keep_alive:
+                self._idle.append(conn)
+        result, _ = xmlrpc.client.loads(data)
+        return result[0] if len(result) == 1 else result
+
+    def GetSafetyCode(self):
+        state = self.robot_state
+        if (state.safety_stop0_state == 1) or (state.safety_stop1_state == 1):
+            return 99
+        return 0
+
+    async def GetControllerIP(self):
+        _error = await self.call("GetControllerIP")
+        if _error[0] == 0:
+            return _error[0], _error[1]
+        return _error[0]
+
+    async def GetForwardKin(self, joint_pos):
+        joint_pos = list(map(float, joint_pos))
+        _error = await self.call("GetForwardKin", joint_pos)
+        if _error[0] == 0:
+            return _error[0], list(_error[1:7])
+        return _error[0]
+
+    async def GetInverseKin(self, type, desc_pos, config=-1):
+        _error = await self.call("GetInverseKin", int(type), list(map(float, desc_pos)), int(config))
+        if _error[0] == 0:
+            return _error[0], list(_error[1:7])
+        return _error[0]
+
+    async def MoveJ(self, joint_pos, tool, user, desc_pos=[0.0, 0.0, 0.0, 0.0, 0.0, 0.0], vel=20.0, acc=0.0,
+                    ovl=100.0, exaxis_pos=[0.0, 0.0, 0.0, 0.0], blendT=-1.0, offset_flag=0,
+                    offset_pos=[0.0, 0.0, 0.0, 0.0, 0.0, 0.0]):
+        """关节空间运动, 参数与 RPC.MoveJ 相同"""
+        if self.GetSafetyCode() != 0:
+            return self.GetSafetyCode()
+        joint_pos = list(map(float, joint_pos))
+        desc_pos = list(map(float, desc_pos))
+        if not any(desc_pos):  # 若未输入参数则调用正运动学求解
+            ret = await self.call("GetForwardKin", joint_pos)
+            if ret[0] != 0:
+                return ret[0]
+            desc_pos = list(ret[1:7])
+        return await self.call("MoveJ", joint_pos, desc_pos, int(tool), int(user), float(vel), float(acc),
+                               float(ovl), list(map(float, exaxis_pos)), float(blendT), int(offset_flag),
+                               list(map(float, offset_pos)))
+
+    async def MoveL(self, desc_pos, tool, user, joint_pos=[0.0, 0.0, 0.0, 0.0, 0.0, 0.0], vel=20.0, acc=0.0,
+                    ovl=100.0, blendR=-1.0, exaxis_pos=[0.0, 0.0, 0.0, 0.0], search=0, offset_flag=0,
+                    offset_pos=[0.0, 0.0, 0.0, 0.0, 0.0, 0.0]):
+        """笛卡尔空间直线运动, 参数与 RPC.MoveL 相同"""
+        if self.GetSafetyCode() != 0:
+            return self.GetSafetyCode()
+        desc_pos = list(map(float, desc_pos))
+        joint_pos = list(map(float, joint_pos))
+        if not any(joint_pos):  # 若未输入参数则调用逆运动学求解
+            ret = await self.call("GetInverseKin", 0, desc_pos, -1)
+            if ret[0] != 0:
+                return ret[0]
+            joint_pos = list(ret[1:7])
+        return await self.call("MoveL", joint_pos, desc_pos, int(tool), int(user), float(vel), float(acc),
+                               float(ovl), float(blendR), list(map(float, exaxis_pos)), int(search),
+                               int(offset_flag), list(map(float, offset_pos)))
+
+    async def MoveCart(self, desc_pos, tool, user, vel=20.0, acc=0.0, ovl=100.0, blendT=-1.0, config=-1):
+        """笛卡尔空间点到点运动, 参数与 RPC.MoveCart 相同"""
+        if self.GetSafetyCode() != 0:
+            return self.GetSafetyCode()
+        return await self.call("MoveCart", list(map(float, desc_pos)), int(tool), int(user), float(vel),
+                               float(acc), float(ovl), float(blendT), int(config))
+
+    async def ServoJ(self, joint_pos, axisPos, acc=0.0, vel=0.0, cmdT=0.008, filterT=0.0, gain=0.0):
+        """关节空间伺服模式运动, 参数与 RPC.ServoJ 相同"""
+        if self.GetSafetyCode() != 0:
+            return self.GetSafetyCode()
+        return await self.call("ServoJ", list(map(float, joint_pos)), list(map(float, axisPos)), float(acc),
+                               float(vel), float(cmdT), float(filterT), float(gain))
+
+    async def StopMotion(self):
+        """终止运动"""
+        return await self.call("StopMotion")
+
+    async def send_message(self, message):
+        """通过 8080 端口发送消息, 与 RPC.send_message 相同的应答解析"""
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.ip_address, MESSAGE_PORT), self.timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            print(f'An error occurred: {e}')
+            return -1
+        try:
+            writer.write(message.encode('utf-8'))
+            await writer.drain()
+            response = (await asyncio.wait_for(reader.read(1024), self.timeout)).decode('utf-8')
+        except (OSError, asyncio.TimeoutError) as e:
+            print(f'An error occurred: {e}')
+            return -1
+        finally:
+            writer.close()
+        value = response.split('III')
+        if len(value) == 6:
+            if value[4] == "1":
+                return 0
+            print("error happended", value[4])
+        return -1
+
+    async def PauseMotion(self):
+        """暂停运动"""
+        await self.send_message("/f/bIII0III103III5IIIPAUSEIII/b/f")
+        return 0
+
+    async def ResumeMotion(self):
+        """恢复运动"""
+        if self.GetSafetyCode() != 0:
+            return self.GetSafetyCode()
+        return await self.send_message("/f/bIII0III104III6IIIRESUMEIII/b/f")
+
+    async def RobotEnable(self, state):
+        """上使能或下使能"""
+        return await self.call("RobotEnable", int(state))
+
+    async def Mode(self, state):
+        """手自动模式切换"""
+        return await self.call("Mode", int(state))
+
+    async def SetSpeed(self, vel):
+        """设置全局速度"""
+        return await self.call("SetSpeed", int(vel))
+
+    async def ResetAllError(self):
+        """错误状态清除"""
+        return await self.call("ResetAllError")
+
+    async def MoveJAndWait(self, joint_pos, tool, user, timeout=None, **kwargs):
+        """下发 MoveJ 并等待运动完成, 返回错误码"""
+        done = self.motion_done()
+        error = await self.MoveJ(joint_pos, tool, user, **kwargs)
+        if error != 0:
+            done.cancel()
+            return error
+        await asyncio.wait_for(done, timeout)
+        return 0
+
+    async def MoveLAndWait(self, desc_pos, tool, user, timeout=None, **kwargs):
+        """下发 MoveL 并等待运动完成, 返回错误码"""
+        done = self.motion_done()
+        error = await self.MoveL(desc_pos, tool, user, **kwargs)
+        if error != 0:
+            done.cancel()
+            return error
+        await asyncio.wait_for(done, timeout)
+        return 0
+
+    # ------------------------------------------------------------------ 状态读取 (与 RPC 同名)
+
+    def GetActualJointPosDegree(self, flag=1):
+        return 0, list(self.robot_state.jt_cur_pos)
+
+    def GetActualTCPPose(self, flag=1):
+        return 0, list(self.robot_state.tl_cur_pos)
+
+    def GetRobotMotionDone(self):
+        return 0, self.robot_state.motion_done
+
+    def GetRobotErrorCode(self):
+        state = self.robot_state
+        return 0, [state.main_code, state.sub_code]
+
+    def GetRobotStateSnapshot(self):
+        return 0, self.robot_state
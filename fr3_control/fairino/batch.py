@@ -0,0 +1,229 @@
+"""
+批量指令提交
+
+在 with 块内调用的 RPC 接口不立即发送, 而是记录下来, 退出时合并为一次 system.multicall 请求发送,
+再将结果按顺序分发回各条指令。控制器不支持 multicall 时自动改用 HTTP 流水线发送。
+流水线被控制器中途断开时, 未收到返回值的指令可能已经执行, 不自动重发: 这些指令与尚未发送的指令
+均返回 -4, 是否重发由调用方决定。
+
+接口参数的类型转换、默认参数补全等仍由 RPC 原接口完成, 与逐条调用的效果一致。
+接口内部的查询 (Get*, 如 NewSplinePoint 未给定关节位置时的逆解) 会立即执行, 其结果用于补全参数。
+需要使用设置类指令返回值做进一步处理的接口 (如 SetRobotRealtimeStateSamplePeriod 成功后更新陈旧帧判定时间)
+不支持批量提交: 提交前读取 BatchResult 的比较/真值会抛出 TypeError, 该接口调用时即报 ValueError。
+
+示例:
+    with robot.Batch() as batch:
+        batch.SetSpeed(20)
+        batch.SetDO(0, 1)
+        done = batch.SetToolCoord(1, [0, 0, 100, 0, 0, 0], 0, 0, 1, 0)
+    print(done.value, batch.round_trips_saved)
+"""
+
+import inspect
+import xmlrpc.client
+
+ERR_RPC_ERROR = -4
+
+
+class BatchResult:
+    """
+    批量指令的结果句柄, 提交后 value 为该指令的返回值
+
+    远程调用失败时 value 为 -4, fault 为对应的 xmlrpc.client.Fault
+    """
+
+    __slots__ = ('method', 'params', 'value', 'fault', 'done')
+
+    def __init__(self, method, params):
+        self.method = method
+        self.params = params
+        self.value = None
+        self.fault = None
+        self.done = False
+
+    def set(self, value):
+        if isinstance(value, xmlrpc.client.Fault):
+            self.fault = value
+            value = ERR_RPC_ERROR
+        self.value = value
+        self.done = True
+
+    def _result(self):
+        if not self.done:
+            raise TypeError(f"{self.method} 的返回值在提交前不可用")
+        return self.value
+
+    # 接口在记录阶段判断返回值 (if error == 0: ...) 时报错, 避免后续处理被静默跳过
+    def __eq__(self, other):
+        return self._result() == other
+
+    def __ne__(self, other):
+        return self._result() != other
+
+    def __lt__(self, other):
+        return self._result() < other
+
+    def __le__(self, other):
+        return self._result() <= other
+
+    def __gt__(self, other):
+        return self._result() > other
+
+    def __ge__(self, other):
+        return self._result() >= other
+
+    def __bool__(self):
+        return bool(self._result())
+
+    __hash__ = object.__hash__
+
+    def __repr__(self):
+        state = repr(self.value) if self.done else 'pending'
+        return f"<BatchResult {self.method} {state}>"
+
+
+class _BatchRecorder:
+    """替代 RPC.robot 的记录代理: 设置类指令入队, 查询类指令立即执行"""
+
+    def __init__(self, batch):
+        self._batch = batch
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+
+        def method(*params):
+            if name.startswith('Get'):
+                return self._batch.rpc.robot.call(name, *params)
+            return self._batch._queue(name, params)
+
+        return method
+
+
+class _BatchTarget:
+    """在原接口中充当 self: robot 属性指向记录代理, 其余属性访问原 RPC 对象"""
+
+    def __init__(self, rpc, recorder):
+        self.__dict__['_rpc'] = rpc
+        self.__dict__['robot'] = recorder
+
+    def __getattr__(self, name):
+        return getattr(self._rpc, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._rpc, name, value)
+
+
+class CommandBatch:
+    """
+    批量指令上下文
+
+    Args:
+        rpc: Robot.RPC 实例
+        max_calls: 单次请求最多合并的指令数, 超出时分多次发送
+    """
+
+    def __init__(self, rpc, max_calls=100):
+        if max_calls <= 0:
+            raise ValueError("max_calls 必须大于0")
+        self.rpc = rpc
+        self.max_calls = int(max_calls)
+        self.calls = []             # 待提交的 BatchResult
+        self.round_trips = 0        # 实际往返次数
+        self.submitted = 0          # 已提交指令数
+        self.mode = None            # 最近一次提交方式: 'multicall' / 'pipeline' / 'sequential'
+        self._target = _BatchTarget(rpc, _BatchRecorder(self))
+
+    @property
+    def round_trips_saved(self):
+        """相比逐条调用节省的往返次数"""
+        return self.submitted - self.round_trips
+
+    def _queue(self, method, params):
+        result = BatchResult(method, params)
+        self.calls.append(result)
+        return result
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        func = getattr(type(self.rpc), name, None)
+        if not callable(func):
+            raise AttributeError(f"RPC 没有接口 {name}")
+        func = inspect.unwrap(func)
+
+        def method(*args, **kwargs):
+            start = len(self.calls)
+            try:
+                result = func(self._target, *args, **kwargs)
+            except (TypeError, IndexError, KeyError) as e:
+                del self.calls[start:]
+                raise ValueError(f"{name} 需要使用指令返回值, 不支持批量提交") from e
+            if isinstance(result, BatchResult):
+                return result
+            # 接口未发出指令即返回 (如安全停止时返回错误码), 直接给出结果
+            del self.calls[start:]
+            immediate = BatchResult(name, args)
+            immediate.set(result)
+            return immediate
+
+        return method
+
+    def submit(self):
+        """
+        发送全部已记录的指令
+
+        Returns:
+            与记录顺序一致的返回值列表, 未连接时返回 -4; 连接中途断开时未收到返回值的指令为 -4
+        """
+        calls, self.calls = self.calls, []
+        if not calls:
+            return []
+        if self.rpc.is_conect == False:
+            for result in calls:
+                result.set(ERR_RPC_ERROR)
+            return ERR_RPC_ERROR
+
+        pool = self.rpc.robot
+        unanswered = 0
+        for start in range(0, len(calls), self.max_calls):
+            chunk = calls[start:start + self.max_calls]
+            requests = [(result.method, result.params) for result in chunk]
+            values = None
+            if getattr(pool, 'multicall_supported', True):
+                try:
+                    values = pool.multicall(requests)
+                    self.mode = 'multicall'
+                except (xmlrpc.client.Fault, xmlrpc.client.ProtocolError):
+                    pool.multicall_supported = False
+            if values is None:
+                values = pool.pipeline(requests)
+                self.mode = 'pipeline' if getattr(pool, 'pipeline_supported', True) else 'sequential'
+            self.round_trips += len(values) if self.mode == 'sequential' else 1
+            for result, value in zip(chunk, values):
+                result.set(value)
+            self.submitted += len(values)
+            if len(values) < len(chunk):
+                # 流水线被控制器中途断开: 未应答的指令可能已执行, 不重发 (MoveJ 等指令重复执行有危险),
+                # 后续指令也不再发送, 以免跳过失败的指令继续执行
+                for result in calls[start + len(values):]:
+                    result.set(ERR_RPC_ERROR)
+                unanswered = len(calls) - start - len(values)
+                break
+
+        if unanswered:
+            self.rpc.log_warning(f"Batch connection dropped, {unanswered} of {len(calls)} calls unanswered "
+                                 f"and not resent.")
+        self.rpc.log_info(f"Batch submitted {len(calls) - unanswered} calls in {self.mode} mode, "
+                          f"{self.round_trips_saved} round trips saved.")
+        return [result.value for result in calls]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.submit()
+        else:
+            self.calls.clear()
+        return False
@@ -0,0 +1,270 @@
+"""
+双臂胶囊体自碰撞检测 (依赖 numpy)
+
+每个 FR3 连杆用胶囊体 (线段 + 半径) 包络, 线段端点取 DH 连杆坐标系原点, 由批量正解一次得到;
+胸部与升降轴 (尺寸与 ArmSimulationWidget.robot_structure 一致) 为固定胶囊体。
+间隙 = 两条线段的最短距离 - 两个半径, 负值表示包络相交。
+
+检测的胶囊对:
+    左臂 × 右臂     全部连杆 (含工具)
+    手臂 × 机身     除安装在胸部上的基座连杆外的全部连杆
+    同一手臂        不相邻的连杆 (基座-前臂/手腕/工具, 上臂-手腕/工具)
+
+全部胶囊对的线段距离在 (N, 对数) 数组上逐元素计算, 单帧 (8ms 状态帧) 与 N 组规划位姿共用同一实现。
+"""
+
+import numpy as np
+
+from .kinematics import _CHUNK, ArmKinematics, _tool_matrix, pose_to_matrix
+
+# 连杆胶囊体: (名称, 起点, 终点, 半径 mm); 端点 0 为基座原点, 1~6 为 DH 连杆坐标系原点 (6 为法兰)
+ARM_CAPSULES = [
+    ('base', 0, 1, 60.0),           # 基座 -> 肩部 (d1)
+    ('upper_arm', 2, 3, 50.0),      # 上臂 (a3)
+    ('forearm', 3, 4, 45.0),        # 前臂 (d4)
+    ('wrist', 4, 6, 40.0),          # 手腕 -> 法兰 (d6)
+]
+
+# 机身结构 (mm), 与 gui/widgets/simulation_widget.py 中 ArmSimulationWidget.robot_structure 一致
+ROBOT_STRUCTURE = {
+    'chest_width': 380,
+    'chest_length': 350,
+    'chest_height': 200,
+    'base_separation': 380,
+    'lift_column_height': 800,
+    'lift_column_width': 150,
+}
+
+
+def body_capsules(structure=ROBOT_STRUCTURE):
+    """
+    机身胶囊体 (世界坐标系: 原点在升降轴底部中心, z 向上, x 指向右臂)
+
+    升降轴为竖直胶囊体; 胸部长方体用两条沿宽度方向、前后并排的胶囊体覆盖 (棱边为圆角)
+
+    Returns:
+        [(名称, 起点, 终点, 半径), ...]
+    """
+    column_h = float(structure['lift_column_height'])
+    column_r = float(structure['lift_column_width']) / 2.0
+    half_w = float(structure['chest_width']) / 2.0
+    half_l = float(structure['chest_length']) / 2.0
+    chest_r = float(structure['chest_height']) / 2.0
+    z = column_h + chest_r
+    x = max(half_w - chest_r, 0.0)
+    y = max(half_l - chest_r, 0.0)
+    return [
+        ('lift_column', (0.0, 0.0, 0.0), (0.0, 0.0, column_h - column_r), column_r),
+        ('chest_front', (-x, -y, z), (x, -y, z), chest_r),
+        ('chest_back', (-x, y, z), (x, y, z), chest_r),
+    ]
+
+
+def arm_bases(structure=ROBOT_STRUCTURE):
+    """双臂基座位姿 (胸部顶面, 左臂在 -x, 右臂在 +x, z 向上), 返回 (左, 右) [x, y, z, rx, ry, rz]"""
+    z = float(structure['lift_column_height'] + structure['chest_height'])
+    half = float(structure['base_separation']) / 2.0
+    return [-half, 0.0, z, 0.0, 0.0, 0.0], [half, 0.0, z, 0.0, 0.0, 0.0]
+
+
+def _segment_distance(p1, d1, p2, d2):
+    """segment_distance 的分量优先实现: 各参数为 (3, ...) 数组, d1/d2 为线段方向向量 (终点 - 起点)"""
+    r = p1 - p2
+    a = d1[0] * d1[0] + d1[1] * d1[1] + d1[2] * d1[2]
+    e = d2[0] * d2[0] + d2[1] * d2[1] + d2[2] * d2[2]
+    b = d1[0] * d2[0] + d1[1] * d2[1] + d1[2] * d2[2]
+    c = d1[0] * r[0] + d1[1] * r[1] + d1[2] * r[2]
+    f = d2[0] * r[0] + d2[1] * r[1] + d2[2] * r[2]
+    tiny = 1e-12
+    a_safe = np.maximum(a, tiny)
+    e_safe = np.maximum(e, tiny)
+    denom = a * e - b * b
+    # 公垂线参数 s (平行时取 0), 再求 s 固定时最近的 t 并截断, 最后按截断后的 t 重新求 s;
+    # 两个参数都是在另一个固定时的最优值, 截断后的结果即线段间最近点 (退化线段的方向向量为 0, 参数取值不影响距离)
+    s = np.clip(np.where(denom > tiny * a_safe * e_safe, (b * f - c * e) / np.maximum(denom, tiny), 0.0), 0.0, 1.0)
+    t = np.clip((b * s + f) / e_safe, 0.0, 1.0)
+    s = np.clip((b * t - c) / a_safe, 0.0, 1.0)
+    x = r[0] + d1[0] * s - d2[0] * t
+    y = r[1] + d1[1] * s - d2[1] * t
+    z = r[2] + d1[2] * s - d2[2] * t
+    return np.sqrt(x * x + y * y + z * z)
+
+
+def segment_distance(p1, q1, p2, q2):
+    """
+    批量线段-线段最短距离
+
+    线段 1 上 p1 + s·(q1 - p1) 与线段 2 上 p2 + t·(q2 - p2) (s, t ∈ [0, 1]) 的最近点: 先求两直线公垂线参数,
+    再交替截断到线段内; 平行与退化 (线段退化为点) 的情况逐元素处理。
+
+    Args:
+        p1, q1, p2, q2: (..., 3) 线段端点, 可广播
+
+    Returns:
+        (...) 最短距离
+    """
+    p1, q1, p2, q2 = (np.moveaxis(np.asarray(v, dtype=float), -1, 0) for v in (p1, q1, p2, q2))
+    return _segment_distance(p1, q1 - p1, p2, q2 - p2)
+
+
+def _frame(pose):
+    pose = np.asarray(pose, dtype=float)
+    return pose if pose.shape == (4, 4) else pose_to_matrix(pose)
+
+
+class DualArmCollisionModel:
+    """
+    双臂胶囊体碰撞模型
+
+    Args:
+        model: ArmKinematics 实例, 默认 FR3 参数 (两臂相同)
+        left_base: 左臂基座在世界坐标系中的位姿 ([x, y, z, rx, ry, rz] 或 4x4), 默认 arm_bases()
+        right_base: 右臂基座位姿
+        arm_capsules: 连杆胶囊体表, 默认 ARM_CAPSULES
+        body: 机身胶囊体表, 默认 body_capsules()
+        tool: 工具坐标系 (法兰 -> TCP), 指定时增加法兰到 TCP 的工具胶囊体
+        tool_radius: 工具胶囊体半径 (mm)
+    """
+
+    def __init__(self, model=None, left_base=None, right_base=None, arm_capsules=ARM_CAPSULES, body=None,
+                 tool=None, tool_radius=30.0):
+        self.model = model if model is not None else ArmKinematics()
+        default_left, default_right = arm_bases()
+        self.bases = np.stack((_frame(left_base if left_base is not None else default_left),
+                               _frame(right_base if right_base is not None else default_right)))
+        self.tool = _tool_matrix(tool)
+
+        capsules = list(arm_capsules)
+        if self.tool is not None:
+            capsules.append(('tool', 6, 7, float(tool_radius)))
+        self.arm_names = [c[0] for c in capsules]
+        self._start = np.array([c[1] for c in capsules])
+        self._end = np.array([c[2] for c in capsules])
+        arm_radius = np.array([c[3] for c in capsules], dtype=float)
+
+        body = body if body is not None else body_capsules()
+        self.body_names = [c[0] for c in body]
+        self._body_a = np.array([c[1] for c in body], dtype=float).reshape(-1, 3)
+        self._body_b = np.array([c[2] for c in body], dtype=float).reshape(-1, 3)
+        body_radius = np.array([c[3] for c in body], dtype=float)
+
+        # 全部胶囊体依次为 左臂 K 个、右臂 K 个、机身 M 个
+        k = len(capsules)
+        m = len(body)
+        names = ([f'left.{n}' for n in self.arm_names] + [f'right.{n}' for n in self.arm_names]
+                 + [f'body.{n}' for n in self.body_names])
+        self.radius = np.concatenate((arm_radius, arm_radius, body_radius))
+
+        adjacent = {(i, i + 1) for i in range(k - 1)}
+        pairs = []
+        for i in range(k):
+            for j in range(k):
+                pairs.append((i, k + j))                    # 左臂 × 右臂
+        for arm in (0, k):
+            for i in range(k):
+                if self._start[i] == 0:
+                    continue                                # 基座连杆安装在胸部上
+                for j in range(m):
+                    pairs.append((arm + i, 2 * k + j))      # 手臂 × 机身
+            for i in range(k):
+                for j in range(i + 2, k):
+                    if (i, j) not in adjacent:
+                        pairs.append((arm + i, arm + j))    # 同一手臂不相邻连杆
+        self.pairs = np.array(pairs)
+        # 左臂 × 右臂 中两侧都是运动连杆的胶囊对; 基座连杆固定在胸部上, 两基座间隙为常数, 不计入双臂距离
+        moving = self._start != 0
+        self.arm_pairs = np.zeros(len(pairs), dtype=bool)
+        self.arm_pairs[:k * k] = np.outer(moving, moving).ravel()
+        self.pair_names = [(names[i], names[j]) for i, j in pairs]
+        self.names = names
+        self._clearance_offset = self.radius[self.pairs[:, 0]] + self.radius[self.pairs[:, 1]]
+
+    def _capsules(self, left_joints, right_joints):
+        """全部胶囊体线段的起点与终点 (世界坐标系), 分量优先 (3, N, 胶囊体数)"""
+        left = np.atleast_2d(np.asarray(left_joints, dtype=float))
+        right = np.atleast_2d(np.asarray(right_joints, dtype=float))
+        left, right = np.broadcast_arrays(left, right)
+        count = len(left)
+        # 两臂一次批量正解, 连杆原点 (2, N, 8, 3): 0-基座, 1~6-连杆, 7-TCP
+        frames = self.model.forward_batch(np.concatenate((left, right)), link_frames=True)
+        points = np.empty((2 * count, 8, 3))
+        points[:, 0] = 0.0
+        points[:, 1:7] = frames[:, :, :3, 3]
+        if self.tool is not None:
+            points[:, 7] = (frames[:, -1] @ self.tool)[:, :3, 3]
+        else:
+            points[:, 7] = points[:, 6]
+        # 基座坐标系 -> 世界坐标系
+        points = points.reshape(2, count * 8, 3) @ self.bases[:, :3, :3].transpose(0, 2, 1) + self.bases[:, None, :3, 3]
+        points = points.reshape(2, count, 8, 3)
+        start = np.concatenate((points[0][:, self._start], points[1][:, self._start],
+                                np.broadcast_to(self._body_a, (count,) + self._body_a.shape)), axis=1)
+        end = np.concatenate((points[0][:, self._end], points[1][:, self._end],
+                              np.broadcast_to(self._body_b, (count,) + self._body_b.shape)), axis=1)
+        return np.ascontiguousarray(start.transpose(2, 0, 1)), np.ascontiguousarray(end.transpose(2, 0, 1))
+
+    def segments(self, left_joints, right_joints):
+        """
+        全部胶囊体的线段端点 (世界坐标系)
+
+        Args:
+            left_joints/right_joints: (N, 6) 或 (6,) 关节角 (度)
+
+        Returns:
+            (A, B) 均为 (N, 胶囊体数, 3), 与 self.names/self.radius 对应
+        """
+        start, end = self._capsules(left_joints, right_joints)
+        return np.moveaxis(start, 0, -1), np.moveaxis(end, 0, -1)
+
+    def clearances(self, left_joints, right_joints):
+        """
+        各胶囊对的间隙
+
+        Returns:
+            (N, 对数) 间隙 (mm), 负值为包络相交; 列与 self.pair_names 对应
+        """
+        left = np.atleast_2d(np.asarray(left_joints, dtype=float))
+        right = np.atleast_2d(np.asarray(right_joints, dtype=float))
+        left, right = np.broadcast_arrays(left, right)
+        out = np.empty((len(left), len(self.pairs)))
+        i, j = self.pairs[:, 0], self.pairs[:, 1]
+        # 分块计算, 中间数组留在缓存内
+        for k in range(0, len(left), _CHUNK):
+            start, end = self._capsules(left[k:k + _CHUNK], right[k:k + _CHUNK])
+            direction = end - start
+            out[k:k + _CHUNK] = _segment_distance(start[:, :, i], direction[:, :, i], start[:, :, j], direction[:, :, j])
+        return out - self._clearance_offset
+
+    def min_clearance(self, left_joints, right_joints):
+        """
+        每组位姿的最小间隙
+
+        Returns:
+            (clearance, pair) clearance 为 (N,) 最小间隙 (mm), pair 为 (N,) 最近胶囊对在 self.pairs 中的下标
+        """
+        d = self.clearances(left_joints, right_joints)
+        pair = np.argmin(d, axis=1)
+        return d[np.arange(len(d)), pair], pair
+
+    def arm_clearance(self, left_joints, right_joints):
+        """双臂运动连杆之间 (不含基座连杆、机身与自身) 的最小间隙 (N,) (mm)"""
+        return self.clearances(left_joints, right_joints)[:, self.arm_pairs].min(axis=1)
+
+    def check(self, left_joints, right_joints, threshold=0.0):
+        """
+        单组位姿检查 (如每个状态帧)
+
+        Args:
+            left_joints/right_joints: 关节角 (度)
+            threshold: 间隙小于该值 (mm) 时判定为碰撞风险
+
+        Returns:
+            字典: min_clearance 最小间隙 (mm), pair 最近的两个胶囊体名称, collision 是否低于阈值
+        """
+        clearance, pair = self.min_clearance(left_joints, right_joints)
+        value = float(clearance[0])
+        return {
+            'min_clearance': value,
+            'pair': self.pair_names[int(pair[0])],
+            'collision': value < threshold,
+        }
@@ -0,0 +1,556 @@
+"""
+FR3 控制器仿真 (本机)
+
+在本机回环地址上模拟控制器的对外接口, 供 CI、GUI 调试与多机压力测试使用, 不需要真实机器人:
+    20003  XML-RPC 指令 (含 system.multicall)
+    20004  实时状态帧, 按 SetRobotRealtimeStateSamplePeriod 设置的周期发送带校验和的 RobotStatePkg
+    20010  文件上传 / 20011 文件下载 (Lua 程序、轨迹文件、点位表)
+    8080   暂停/恢复等 TCP 指令
+
+Robot.RPC 的端口号固定, 每台仿真机器人绑定一个独立的回环地址 (Linux 下 127.0.0.0/8 全部可用),
+例如 127.0.0.2、127.0.0.3 ..., 客户端代码只需把 IP 换成仿真地址。
+
+运动仿真: MoveJ/MoveL 等指令进入运动队列, 在关节空间按速度百分比匀速插补到目标关节位置
+(MoveL 目标关节由 SDK 逆解补全, 仿真不做笛卡尔直线插补); blendT/blendR < 0 时指令阻塞到运动完成。
+StopMotion 清空队列, PauseMotion/ResumeMotion 暂停/恢复插补, ServoJ 直接设置关节位置,
+StartJOG 关节点动向 max_dis 处运动, StopJOG/ImmStopJOG 停止。
+正逆解使用 fairino.kinematics 的 FR3 模型。
+
+所有仿真机器人共用一个状态发送线程与一个连接接收线程, 每台机器人额外一个 XML-RPC 服务线程,
+单机可运行数百台仿真机器人。未实现的接口默认返回成功 (Get* 返回 [0, 0, ...]), strict=True 时返回 XML-RPC 错误。
+
+示例:
+    emulator = FR3Emulator()
+    emulator.add_arm('127.0.0.2')
+    emulator.add_arm('127.0.0.3')
+    emulator.start()
+    robot = Robot.RPC('127.0.0.2')
+    ...
+    emulator.stop()
+"""
+
+import ctypes
+import hashlib
+import selectors
+import socket
+import threading
+import time
+import xmlrpc.server
+from socketserver import ThreadingMixIn
+
+from .kinematics import ArmKinematics
+from .state_decoder import build_state_frame
+
+RPC_PORT = 20003
+STATE_PORT = 20004
+UPLOAD_PORT = 20010
+DOWNLOAD_PORT = 20011
+MESSAGE_PORT = 8080
+
+MAX_JOINT_SPEED = 180.0     # 速度百分比 100% 对应的关节速度 (°/s)
+UNIMPLEMENTED_GET_LENGTH = 16
+
+
+class _Motion:
+    """运动队列中的一条指令"""
+
+    __slots__ = ('target', 'speed', 'done')
+
+    def __init__(self, target, speed):
+        self.target = [float(v) for v in target]
+        self.speed = speed
+        self.done = threading.Event()
+
+
+class EmulatedArm:
+    """
+    单台仿真机器人的状态与运动仿真
+
+    Args:
+        ip: 仿真机器人绑定的地址
+        pkg_type: 状态包类型 (Robot.RobotStatePkg)
+        joint_pos: 初始关节位置 (度)
+        period: 状态帧发送周期 (s)
+    """
+
+    def __init__(self, ip, pkg_type, joint_pos=(0.0, -90.0, 90.0, 0.0, 90.0, 0.0), period=0.008):
+        self.ip = ip
+        self.pkg = pkg_type()
+        self.kinematics = ArmKinematics()
+        self.joints = [float(v) for v in joint_pos]
+        self.velocity = [0.0] * 6
+        self.queue = []
+        self.paused = False
+        self.speed = 100.0          # SetSpeed 全局速度百分比
+        self.enabled = 1
+        self.mode = 0
+        self.period = period
+        self.files = {}             # (文件类型, 文件名) -> bytes
+        self.pending_upload = None
+        self.pending_download = None
+        self.calls = {}             # 接口名 -> 调用次数
+        self.lock = threading.Lock()
+
+        self.frame_cnt = 0
+        self.next_frame = 0.0
+        self.last_step = None
+        self.subscribers = []
+        self._fk_joints = None
+
+    # ------------------------------------------------------------------ 运动仿真
+    def enqueue(self, target, vel, ovl=100.0):
+        speed = MAX_JOINT_SPEED * max(vel, 1.0) / 100.0 * max(ovl, 1.0) / 100.0
+        motion = _Motion(target, speed)
+        with self.lock:
+            self.queue.append(motion)
+        return motion
+
+    def stop_motion(self):
+        with self.lock:
+            for motion in self.queue:
+                motion.done.set()
+            self.queue.clear()
+            self.velocity = [0.0] * 6
+            self.paused = False
+
+    def step(self, now):
+        """按经过的时间插补运动队列, 返回本次完成的运动指令 (状态帧发出后再通知等待者)"""
+        dt = 0.0 if self.last_step is None else now - self.last_step
+        self.last_step = now
+        with self.lock:
+            if not self.queue or self.paused:
+                self.velocity = [0.0] * 6
+                return None
+            motion = self.queue[0]
+            max_step = motion.speed * self.speed / 100.0 * dt
+            delta = [t - q for t, q in zip(motion.target, self.joints)]
+            distance = max(abs(d) for d in delta)
+            if distance <= max_step or distance < 1e-9:
+                self.velocity = [d / dt if dt > 0 else 0.0 for d in delta]
+                self.joints = list(motion.target)
+                return self.queue.pop(0)
+            scale = max_step / distance
+            self.velocity = [d * scale / dt for d in delta]
+            self.joints = [q + d * scale for q, d in zip(self.joints, delta)]
+            return None
+
+    @property
+    def moving(self):
+        return bool(self.queue)
+
+    def fill(self, now):
+        """将仿真状态写入状态包并打包为状态帧"""
+        pkg = self.pkg
+        joints = self.joints
+        for i in range(6):
+            pkg.jt_cur_pos[i] = joints[i]
+            pkg.actual_qd[i] = self.velocity[i]
+        if self._fk_joints != joints:
+            pose = self.kinematics.forward_pose(joints)
+            for i in range(6):
+                pkg.tl_cur_pos[i] = pose[i]
+                pkg.flange_cur_pos[i] = pose[i]
+            self._fk_joints = list(joints)
+        moving = self.moving
+        pkg.motion_done = 0 if moving else 1
+        pkg.mc_queue_len = len(self.queue)
+        pkg.robot_state = 3 if (moving and self.paused) else (2 if moving else 1)
+        pkg.program_state = 1
+        pkg.robot_mode = self.mode
+        pkg.rbtEnableState = self.enabled
+        local = time.localtime(now)
+        pkg.year, pkg.mouth, pkg.day = local.tm_year, local.tm_mon, local.tm_mday
+        pkg.hour, pkg.minute, pkg.second = local.tm_hour, local.tm_min, local.tm_sec
+        pkg.millisecond = int((now % 1) * 1000)
+        self.frame_cnt += 1
+        return build_state_frame(pkg, self.frame_cnt)
+
+    # ------------------------------------------------------------------ IO
+    def set_do(self, id, status):
+        byte = 'cl_dgt_output_l' if id < 8 else 'cl_dgt_output_h'
+        self._set_bit(byte, id % 8, status)
+
+    def set_di(self, id, status):
+        """设置控制箱数字输入 (测试用)"""
+        byte = 'cl_dgt_input_l' if id < 8 else 'cl_dgt_input_h'
+        self._set_bit(byte, id % 8, status)
+
+    def _set_bit(self, field, bit, status):
+        value = getattr(self.pkg, field) & 0xFF
+        value = value | (1 << bit) if status else value & ~(1 << bit)
+        setattr(self.pkg, field, ctypes.c_byte(value & 0xFF).value)
+
+
+class _ArmRpcHandler:
+    """20003 端口的 XML-RPC 指令实现"""
+
+    def __init__(self, arm, strict=False):
+        self.arm = arm
+        self.strict = strict
+
+    def _dispatch(self, method, params):
+        arm = self.arm
+        arm.calls[method] = arm.calls.get(method, 0) + 1
+        func = getattr(self, 'rpc_' + method, None)
+        if func is not None:
+            return func(*params)
+        if self.strict:
+            raise xmlrpc.server.Fault(1, f"method {method} is not supported")
+        if method.startswith('Get'):
+            return [0] + [0] * UNIMPLEMENTED_GET_LENGTH
+        return 0
+
+    def _move(self, joint_pos, vel, ovl, blend):
+        motion = self.arm.enqueue(joint_pos, vel, ovl)
+        if blend < 0:
+            motion.done.wait()
+        return 0
+
+    def rpc_GetControllerIP(self):
+        return [0, self.arm.ip]
+
+    def rpc_GetForwardKin(self, joint_pos):
+        return [0] + self.arm.kinematics.forward_pose(joint_pos)
+
+    def rpc_GetInverseKin(self, type, desc_pos, config=-1):
+        return self.rpc_GetInverseKinRef(type, desc_pos, self.arm.joints)
+
+    def rpc_GetInverseKinRef(self, type, desc_pos, joint_pos_ref):
+        joints = self.arm.kinematics.inverse(desc_pos, joint_pos_ref)
+        if joints is None:
+            return [-1, 0, 0, 0, 0, 0, 0]
+        return [0] + joints
+
+    def rpc_GetInverseKinHasSolution(self, type, desc_pos, joint_pos_ref):
+        return [0, self.arm.kinematics.inverse(desc_pos, joint_pos_ref) is not None]
+
+    def rpc_MoveJ(self, joint_pos, desc_pos, tool, user, vel, acc, ovl, exaxis_pos, blendT, *args):
+        return self._move(joint_pos, vel, ovl, blendT)
+
+    def rpc_MoveL(self, joint_pos, desc_pos, tool, user, vel, acc, ovl, blendR, *args):
+        return self._move(joint_pos, vel, ovl, blendR)
+
+    def rpc_SplinePTP(self, joint_pos, desc_pos, tool, user, vel, acc, ovl):
+        return self._move(joint_pos, vel, ovl, -1)
+
+    def rpc_ServoJ(self, joint_pos, *args):
+        arm = self.arm
+        with arm.lock:
+            arm.joints = [float(v) for v in joint_pos]
+        return 0
+
+    def rpc_StopMotion(self):
+        self.arm.stop_motion()
+        return 0
+
+    def rpc_StartJOG(self, ref, nb, dir, vel, acc, max_dis):
+        # 只仿真关节点动: 以点动速度向 max_dis 处运动, 直到 StopJOG/ImmStopJOG
+        arm = self.arm
+        arm.stop_motion()
+        if int(ref) == 0 and 1 <= int(nb) <= 6:
+            target = list(arm.joints)
+            target[int(nb) - 1] += float(max_dis) if int(dir) == 1 else -float(max_dis)
+            arm.enqueue(target, vel)
+        return 0
+
+    def rpc_StopJOG(self, ref):
+        self.arm.stop_motion()
+        return 0
+
+    rpc_ImmStopJOG = rpc_StopMotion
+
+    rpc_ProgramStop = rpc_StopMotion
+
+    def rpc_PauseMotion(self):
+        self.arm.paused = True
+        return 0
+
+    def rpc_ResumeMotion(self):
+        self.arm.paused = False
+        return 0
+
+    def rpc_RobotEnable(self, state):
+        self.arm.enabled = int(state)
+        return 0
+
+    def rpc_Mode(self, state):
+        self.arm.mode = int(state)
+        return 0
+
+    def rpc_SetSpeed(self, vel):
+        self.arm.speed = float(vel)
+        return 0
+
+    def rpc_ResetAllError(self):
+        self.arm.pkg.main_code = 0
+        self.arm.pkg.sub_code = 0
+        return 0
+
+    def rpc_SetDO(self, id, status, smooth=0, block=0):
+        self.arm.set_do(int(id), int(status))
+        return 0
+
+    def rpc_SetToolDO(self, id, status, smooth=0, block=0):
+        self.arm._set_bit('tl_dgt_output_l', int(id), int(status))
+        return 0
+
+    def rpc_SetRobotRealtimeStateSamplePeriod(self, period):
+        self.arm.period = max(int(period), 1) / 1000.0
+        return 0
+
+    def rpc_GetRobotRealtimeStateSamplePeriod(self):
+        return [0, int(round(self.arm.period * 1000))]
+
+    # 文件传输: 先由 RPC 指定文件, 再在 20010/20011 端口传输内容
+    def rpc_FileUpload(self, file_type, name):
+        self.arm.pending_upload = (file_type, name, 10)
+        return 0
+
+    def rpc_PointTableUpload(self, name):
+        self.arm.pending_upload = ('pointtable', name, 8)
+        return 0
+
+    def rpc_FileDownload(self, file_type, name):
+        if (file_type, name) not in self.arm.files:
+            return -1
+        self.arm.pending_download = (file_type, name)
+        return 0
+
+    def rpc_PointTableDownload(self, name):
+        if ('pointtable', name) not in self.arm.files:
+            return -1
+        self.arm.pending_download = ('pointtable', name)
+        return 0
+
+    def rpc_FileDelete(self, file_type, name):
+        return 0 if self.arm.files.pop((file_type, name), None) is not None else -1
+
+    def rpc_LuaUpLoadUpdate(self, name):
+        return [0, ""]
+
+
+class _XMLRPCServer(ThreadingMixIn, xmlrpc.server.SimpleXMLRPCServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _RequestHandler(xmlrpc.server.SimpleXMLRPCRequestHandler):
+    protocol_version = "HTTP/1.1"
+    rpc_paths = ('/', '/RPC2')
+
+
+class FR3Emulator:
+    """
+    多台仿真机器人的管理器
+
+    Args:
+        pkg_type: 状态包类型, 默认 Robot.RobotStatePkg
+        strict: 未实现的接口是否返回 XML-RPC 错误
+    """
+
+    def __init__(self, pkg_type=None, strict=False):
+        if pkg_type is None:
+            from .Robot import RobotStatePkg
+            pkg_type = RobotStatePkg
+        self.pkg_type = pkg_type
+        self.strict = strict
+        self.arms = {}
+        self._servers = []
+        self._listeners = {}        # 监听套接字 -> (arm, 端口)
+        self._selector = selectors.DefaultSelector()
+        self._stop = threading.Event()
+        self._threads = []
+        self.frames_sent = 0
+        self.frames_dropped = 0
+
+    def add_arm(self, ip, joint_pos=(0.0, -90.0, 90.0, 0.0, 90.0, 0.0), period=0.008):
+        """添加一台仿真机器人并绑定端口, 返回 EmulatedArm"""
+        arm = EmulatedArm(ip, self.pkg_type, joint_pos, period)
+        server = _XMLRPCServer((ip, RPC_PORT), requestHandler=_RequestHandler, logRequests=False,
+                               allow_none=True)
+        server.register_instance(_ArmRpcHandler(arm, self.strict))
+        server.register_multicall_functions()
+        self._servers.append(server)
+        for port in (STATE_PORT, UPLOAD_PORT, DOWNLOAD_PORT, MESSAGE_PORT):
+            listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            listener.bind((ip, port))
+            listener.listen(16)
+            listener.setblocking(False)
+            self._listeners[listener] = (arm, port)
+            self._selector.register(listener, selectors.EVENT_READ)
+        self.arms[ip] = arm
+        if self._threads:
+            self._start_thread(server.serve_forever)
+        return arm
+
+    def start(self):
+        """启动状态发送、连接接收与 XML-RPC 服务线程"""
+        self._stop.clear()
+        self._start_thread(self._stream_loop)
+        self._start_thread(self._accept_loop)
+        for server in self._servers:
+            self._start_thread(server.serve_forever)
+        return self
+
+    def _start_thread(self, target, *args):
+        thread = threading.Thread(target=target, args=args, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def stop(self):
+        """停止全部仿真机器人并释放端口"""
+        self._stop.set()
+        for arm in self.arms.values():
+            arm.stop_motion()
+        # serve_forever 每 0.5s 检查一次停止标志, 并行停止避免数百台仿真机器人逐个等待
+        stoppers = [threading.Thread(target=server.shutdown) for server in self._servers]
+        for stopper in stoppers:
+            stopper.start()
+        for stopper in stoppers:
+            stopper.join()
+        for server in self._servers:
+            server.server_close()
+        for listener in list(self._listeners):
+            self._selector.unregister(listener)
+            listener.close()
+        self._listeners.clear()
+        for arm in self.arms.values():
+            for sock in arm.subscribers:
+                sock.close()
+            arm.subscribers.clear()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=1.0)
+        self._threads.clear()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    # ------------------------------------------------------------------ 20004
+    def _stream_loop(self):
+        """所有仿真机器人共用的状态发送循环, 每台机器人按各自周期插补并发送一帧"""
+        while not self._stop.is_set():
+            now = time.perf_counter()
+            wake = now + 0.05
+            for arm in list(self.arms.values()):
+                if now >= arm.next_frame:
+                    finished = arm.step(now)
+                    if arm.subscribers:
+                        frame = arm.fill(time.time())
+                        for sock in list(arm.subscribers):
+                            try:
+                                sock.send(frame)
+                                self.frames_sent += 1
+                            except BlockingIOError:
+                                # 客户端读取太慢, 丢弃该帧而不阻塞其他机器人
+                                self.frames_dropped += 1
+                            except OSError:
+                                arm.subscribers.remove(sock)
+                                sock.close()
+                    if finished is not None:
+                        # 到位的状态帧先于阻塞指令的返回发出, 客户端返回后即可读到 motion_done
+                        finished.done.set()
+                    arm.next_frame = max(arm.next_frame + arm.period, now)
+                wake = min(wake, arm.next_frame)
+            delay = wake - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+
+    # ------------------------------------------------------------------ 连接接收
+    def _accept_loop(self):
+        while not self._stop.is_set():
+            try:
+                events = self._selector.select(timeout=0.1)
+            except (OSError, ValueError):
+                break
+            for key, _ in events:
+                listener = key.fileobj
+                try:
+                    sock, _ = listener.accept()
+                except OSError:
+                    continue
+                arm, port = self._listeners[listener]
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                if port == STATE_PORT:
+                    sock.setblocking(False)
+                    arm.subscribers.append(sock)
+                elif port == UPLOAD_PORT:
+                    threading.Thread(target=self._handle_upload, args=(arm, sock), daemon=True).start()
+                elif port == DOWNLOAD_PORT:
+                    threading.Thread(target=self._handle_download, args=(arm, sock), daemon=True).start()
+                else:
+                    threading.Thread(target=self._handle_message, args=(arm, sock), daemon=True).start()
+
+    # ------------------------------------------------------------------ 20010/20011/8080
+    @staticmethod
+    def _recv_exact(sock, n):
+        data = bytearray()
+        while len(data) < n:
+            chunk = sock.recv(min(n - len(data), 1024 * 1024))
+            if not chunk:
+                raise ConnectionError("连接断开")
+            data += chunk
+        return bytes(data)
+
+    def _handle_upload(self, arm, sock):
+        with sock:
+            sock.settimeout(20)
+            pending, arm.pending_upload = arm.pending_upload, None
+            if pending is None:
+                return
+            file_type, name, size_digits = pending
+            try:
+                head = self._recv_exact(sock, 4 + size_digits + 32)
+                total = int(head[4:4 + size_digits].decode('utf-8'))
+                md5 = head[4 + size_digits:].decode('utf-8')
+                rest = self._recv_exact(sock, total - len(head))
+            except (OSError, ValueError):
+                return
+            content = rest[:-4]
+            if head[:4] == b"/f/b" and rest[-4:] == b"/b/f" and hashlib.md5(content).hexdigest() == md5:
+                arm.files[(file_type, name)] = content
+                sock.sendall(b"SUCCESS")
+            else:
+                sock.sendall(b"FAIL")
+
+    def _handle_download(self, arm, sock):
+        with sock:
+            sock.settimeout(20)
+            pending, arm.pending_download = arm.pending_download, None
+            if pending is None:
+                return
+            content = arm.files[pending]
+            md5 = hashlib.md5(content).hexdigest().encode('utf-8')
+            total = 4 + 8 + 32 + len(content) + 4
+            try:
+                sock.sendall(b"/f/b" + f"{total:08d}".encode('utf-8') + md5 + content + b"/b/f")
+                sock.recv(16)
+            except OSError:
+                pass
+
+    def _handle_message(self, arm, sock):
+        """8080 端口: /f/bIII<cnt>III<cmd_id>III<len>III<content>III/b/f"""
+        with sock:
+            sock.settimeout(5)
+            try:
+                message = sock.recv(1024).decode('utf-8')
+            except OSError:
+                return
+            parts = message.split('III')
+            if len(parts) >= 5:
+                if parts[4] == 'PAUSE':
+                    arm.paused = True
+                elif parts[4] == 'RESUME':
+                    arm.paused = False
+                reply = f"/f/bIII{parts[1]}III{parts[2]}III1III1III/b/f"
+            else:
+                reply = "/f/bIII0III0III1III0III/b/f"
+            try:
+                sock.sendall(reply.encode('utf-8'))
+            except OSError:
+                pass
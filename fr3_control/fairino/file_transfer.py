@@ -0,0 +1,229 @@
+"""
+20010/20011端口文件流式传输
+
+帧格式: "/f/b" + 总长度(ASCII数字) + MD5(32) + 文件内容 + "/b/f", 总长度包含帧头与帧尾。
+下载时用 recv_into 将数据接收到固定的大缓冲区, 文件内容边接收边写入磁盘并增量计算 MD5,
+不再整帧缓存在内存中、也不再写完后重新读盘校验; 上传时用 socket.sendfile 直接发送文件。
+
+传输协议不支持断点续传 (帧头不含偏移), 中断或校验失败时重新发起整个传输 (最多 retries 次)。
+下载先写入 <文件名>.part, MD5 校验通过后再替换目标文件, 中断的传输不会留下不完整的文件。
+"""
+
+import hashlib
+import os
+import socket
+import time
+
+FILE_HEAD = b"/f/b"
+FILE_TAIL = b"/b/f"
+MD5_LEN = 32
+DOWNLOAD_PORT = 20011
+UPLOAD_PORT = 20010
+
+
+class FileTransferError(Exception):
+    """传输失败, 可重试"""
+
+
+def file_md5(file_path, chunk_size=4 * 1024 * 1024):
+    """按大块读取计算文件 MD5"""
+    md5 = hashlib.md5()
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(file_path, 'rb', buffering=0) as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            md5.update(view[:n])
+    return md5.hexdigest()
+
+
+class TransferStats:
+    """单次传输的进度与吞吐量"""
+
+    def __init__(self, name, total):
+        self.name = name
+        self.total = total          # 文件字节数
+        self.done = 0               # 已传输的文件字节数
+        self.attempts = 0
+        self.start = time.perf_counter()
+        self.elapsed = 0.0
+
+    def update(self, n):
+        self.done += n
+        self.elapsed = time.perf_counter() - self.start
+
+    @property
+    def throughput(self):
+        """吞吐量 (MB/s)"""
+        return self.done / self.elapsed / 1e6 if self.elapsed > 0 else 0.0
+
+    def as_dict(self):
+        return {'name': self.name, 'total': self.total, 'done': self.done, 'attempts': self.attempts,
+                'elapsed': self.elapsed, 'throughput_mb_s': self.throughput}
+
+
+class FileTransfer:
+    """
+    文件传输引擎
+
+    Args:
+        ip: 控制器IP
+        chunk_size: 接收缓冲区/发送分块大小 (字节)
+        retries: 失败后的重试次数
+        timeout: 套接字超时 (s)
+        progress: 可选的进度回调 progress(stats), stats 为 TransferStats
+    """
+
+    def __init__(self, ip, chunk_size=1024 * 1024, retries=2, timeout=20.0, progress=None):
+        self.ip = ip
+        self.chunk_size = int(chunk_size)
+        self.retries = int(retries)
+        self.timeout = timeout
+        self.progress = progress
+        self.last_stats = None
+        self._buffer = bytearray(self.chunk_size)
+
+    def _connect(self, port):
+        try:
+            return socket.create_connection((self.ip, port), timeout=self.timeout)
+        except OSError as e:
+            raise FileTransferError(f"连接 {self.ip}:{port} 失败: {e}") from e
+
+    def _report(self, stats):
+        if self.progress is not None:
+            self.progress(stats)
+
+    def _retry(self, name, prepare, attempt_func):
+        """
+        执行传输并在失败时重试
+
+        Args:
+            prepare: 每次传输前调用的 RPC 准备指令, 返回非 0 错误码时直接返回该错误码
+            attempt_func: attempt_func(stats) 执行一次传输, 失败抛出 FileTransferError
+        """
+        stats = None
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt > 0:
+                time.sleep(0.5 * attempt)
+            rtn = prepare()
+            if rtn != 0:
+                return rtn
+            stats = TransferStats(name, 0)
+            stats.attempts = attempt + 1
+            try:
+                attempt_func(stats)
+                self.last_stats = stats
+                return 0
+            except (FileTransferError, OSError) as e:
+                error = e
+        self.last_stats = stats
+        raise FileTransferError(f"{name} 传输失败 ({self.retries + 1} 次): {error}")
+
+    def download(self, prepare, file_path):
+        """
+        从 20011 端口下载文件到 file_path
+
+        Args:
+            prepare: 通知控制器开始发送的 RPC 调用 (FileDownload/PointTableDownload)
+            file_path: 保存路径 (含文件名)
+
+        Returns:
+            0 成功, 其他为 prepare 返回的错误码; 多次重试仍失败时抛出 FileTransferError
+        """
+        return self._retry(os.path.basename(file_path), prepare,
+                           lambda stats: self._download_once(file_path, stats))
+
+    def _download_once(self, file_path, stats):
+        part_path = file_path + ".part"
+        buffer = self._buffer
+        view = memoryview(buffer)
+        md5 = hashlib.md5()
+        with self._connect(DOWNLOAD_PORT) as sock:
+            # 帧头: "/f/b" + 8位总长度 + 32位MD5
+            head_len = len(FILE_HEAD) + 8 + MD5_LEN
+            received = 0
+            while received < head_len:
+                n = sock.recv_into(view[received:])
+                if n == 0:
+                    raise FileTransferError("接收文件头时连接断开")
+                received += n
+            if bytes(buffer[:4]) != FILE_HEAD:
+                raise FileTransferError("文件头错误")
+            total = int(bytes(buffer[4:12]).decode('utf-8'))
+            recv_md5 = bytes(buffer[12:head_len]).decode('utf-8')
+            file_size = total - head_len - len(FILE_TAIL)
+            if file_size < 0:
+                raise FileTransferError(f"文件长度错误: {total}")
+            stats.total = file_size
+
+            written = 0
+            try:
+                with open(part_path, 'wb') as f:
+                    pending = view[head_len:received]
+                    while True:
+                        # 只写入文件内容部分, 帧尾 "/b/f" 不写入
+                        n = min(len(pending), file_size - written)
+                        if n > 0:
+                            f.write(pending[:n])
+                            md5.update(pending[:n])
+                            written += n
+                            stats.update(n)
+                            self._report(stats)
+                        if received >= total:
+                            break
+                        n = sock.recv_into(view, min(len(buffer), total - received))
+                        if n == 0:
+                            raise FileTransferError(f"接收中断: {received}/{total} 字节")
+                        received += n
+                        pending = view[:n]
+
+                if md5.hexdigest() != recv_md5:
+                    sock.sendall(b"FAIL")
+                    raise FileTransferError("MD5 校验失败")
+                sock.sendall(b"SUCCESS")
+                os.replace(part_path, file_path)
+            finally:
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+
+    def upload(self, prepare, file_path, size_format="{:10d}", md5=None):
+        """
+        通过 20010 端口上传文件
+
+        Args:
+            prepare: 通知控制器准备接收的 RPC 调用 (FileUpload/PointTableUpload)
+            file_path: 本地文件全路径
+            size_format: 帧头中总长度字段的格式, 文件上传为 10 位, 点位表为 8 位补零
+            md5: 已知的文件 MD5, 不指定时计算一次, 重试时复用
+
+        Returns:
+            0 成功, 其他为 prepare 返回的错误码; 多次重试仍失败时抛出 FileTransferError
+        """
+        file_md5_value = md5 or file_md5(file_path, self.chunk_size)
+        return self._retry(os.path.basename(file_path), prepare,
+                           lambda stats: self._upload_once(file_path, size_format, file_md5_value, stats))
+
+    def _upload_once(self, file_path, size_format, md5, stats):
+        file_size = os.path.getsize(file_path)
+        head_len = len(FILE_HEAD) + len(size_format.format(0)) + MD5_LEN
+        total = file_size + head_len + len(FILE_TAIL)
+        stats.total = file_size
+        with self._connect(UPLOAD_PORT) as sock:
+            sock.sendall(FILE_HEAD + size_format.format(total).encode('utf-8') + md5.encode('utf-8'))
+            with open(file_path, 'rb') as f:
+                offset = 0
+                while offset < file_size:
+                    count = min(self.chunk_size * 4, file_size - offset)
+                    sent = sock.sendfile(f, offset, count)
+                    if sent == 0:
+                        raise FileTransferError(f"发送中断: {offset}/{file_size} 字节")
+                    offset += sent
+                    stats.update(sent)
+                    self._report(stats)
+            sock.sendall(FILE_TAIL)
+            result = sock.recv(1024)
+            if result[:7] != b"SUCCESS":
+                raise FileTransferError(f"控制器校验失败: {result[:32]!r}")
@@ -0,0 +1,189 @@
+"""
+RPC 接口调用统计与采样追踪
+
+CallStats 按接口记录调用次数、耗时直方图 (p50/p99/max) 与错误码计数, 可导出为 JSON 或 Prometheus 文本格式。
+SamplingTracer 对高频接口 (ServoJ/ServoCart 等) 每 N 次调用记录一次耗时与调用间隔, 用于分析伺服周期抖动。
+
+统计默认关闭, RPC.EnableCallStats() 开启后由 log_call 装饰器在每次调用后记录一次;
+关闭时 log_call 只多一次属性判断。
+"""
+
+import bisect
+import json
+import threading
+import time
+from collections import deque
+
+# 耗时直方图桶上界 (秒): 10us ~ 80s, 每个数量级 10 个桶 (相邻约 1.25 倍)
+_MANTISSAS = (1.0, 1.25, 1.6, 2.0, 2.5, 3.2, 4.0, 5.0, 6.3, 8.0)
+LATENCY_BUCKETS = tuple(round(m * 10.0 ** e, 12) for e in range(-5, 2) for m in _MANTISSAS)
+# Prometheus 导出使用的 1-2-5 桶上界
+PROMETHEUS_BUCKETS = tuple(round(m * 10.0 ** e, 12) for e in range(-5, 2) for m in (1.0, 2.0, 5.0))
+
+DEFAULT_TRACE_METHODS = ('ServoJ', 'ServoCart')
+
+
+def result_code(result):
+    """从接口返回值中取错误码: (code, ...) 取 code, 整数直接返回, 其他返回 0"""
+    if isinstance(result, (list, tuple)):
+        result = result[0] if len(result) > 0 else 0
+    return result if isinstance(result, int) else 0
+
+
+class MethodStats:
+    """单个接口的调用统计"""
+
+    __slots__ = ('name', 'count', 'total', 'max', 'buckets', 'errors')
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)    # 最后一个为超出上界
+        self.errors = {}        # 错误码 -> 次数, 抛出异常记为 'exception'
+
+    def add(self, elapsed, code):
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+        if code != 0:
+            self.errors[code] = self.errors.get(code, 0) + 1
+
+    def percentile(self, q):
+        """由直方图估计分位耗时 (秒), 返回所在桶的上界, 不超过最大值"""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n > 0:
+                upper = LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else self.max
+                return min(upper, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count * 1e3 if self.count else 0.0,
+            'p50_ms': self.percentile(0.50) * 1e3,
+            'p99_ms': self.percentile(0.99) * 1e3,
+            'max_ms': self.max * 1e3,
+            'total_s': self.total,
+            'errors': {str(code): n for code, n in self.errors.items()},
+        }
+
+
+class SamplingTracer:
+    """
+    高频接口采样追踪
+
+    Args:
+        methods: 追踪的接口名
+        sample_every: 每 N 次调用记录一次
+        capacity: 最多保留的记录数
+    """
+
+    def __init__(self, methods=DEFAULT_TRACE_METHODS, sample_every=10, capacity=10000):
+        if sample_every <= 0:
+            raise ValueError("sample_every 必须大于0")
+        self.methods = frozenset(methods)
+        self.sample_every = int(sample_every)
+        self.records = deque(maxlen=int(capacity))
+        self._calls = {}        # 接口名 -> 调用次数
+        self._last_start = {}   # 接口名 -> 上次调用开始时间
+
+    def trace(self, name, start, elapsed, code):
+        """记录一次调用, start 为 perf_counter 开始时间"""
+        if name not in self.methods:
+            return
+        n = self._calls.get(name, 0) + 1
+        self._calls[name] = n
+        last = self._last_start.get(name)
+        self._last_start[name] = start
+        if n % self.sample_every == 0:
+            interval = start - last if last is not None else 0.0
+            self.records.append((time.time(), name, elapsed, interval, code))
+
+    def dump(self):
+        """返回采样记录列表: [{'time', 'method', 'elapsed_ms', 'interval_ms', 'code'}, ...]"""
+        return [{'time': t, 'method': name, 'elapsed_ms': elapsed * 1e3, 'interval_ms': interval * 1e3, 'code': code}
+                for t, name, elapsed, interval, code in list(self.records)]
+
+
+class CallStats:
+    """
+    RPC 接口调用统计
+
+    Args:
+        tracer: 可选的 SamplingTracer
+    """
+
+    def __init__(self, tracer=None):
+        self.methods = {}
+        self.tracer = tracer
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def record(self, name, start, elapsed, result=0, exception=False):
+        """记录一次调用, start 为 perf_counter 开始时间, elapsed 为耗时(秒)"""
+        code = 'exception' if exception else result_code(result)
+        with self._lock:
+            stats = self.methods.get(name)
+            if stats is None:
+                stats = self.methods[name] = MethodStats(name)
+            stats.add(elapsed, code)
+            if self.tracer is not None:
+                self.tracer.trace(name, start, elapsed, code)
+
+    def reset(self):
+        with self._lock:
+            self.methods.clear()
+            if self.tracer is not None:
+                self.tracer.records.clear()
+            self.started = time.time()
+
+    def summary(self):
+        """按累计耗时降序的统计字典"""
+        with self._lock:
+            methods = sorted(self.methods.values(), key=lambda s: s.total, reverse=True)
+            result = {
+                'since': self.started,
+                'methods': {s.name: s.summary() for s in methods},
+            }
+            if self.tracer is not None:
+                result['trace'] = self.tracer.dump()
+        return result
+
+    def to_json(self, indent=None):
+        return json.dumps(self.summary(), ensure_ascii=False, indent=indent)
+
+    def to_prometheus(self, prefix='fairino_rpc'):
+        """Prometheus 文本格式"""
+        lines = [
+            f"# HELP {prefix}_latency_seconds RPC call latency",
+            f"# TYPE {prefix}_latency_seconds histogram",
+        ]
+        errors = []
+        with self._lock:
+            for name in sorted(self.methods):
+                stats = self.methods[name]
+                cumulative = 0
+                i = 0
+                for bound in PROMETHEUS_BUCKETS:
+                    while i < len(LATENCY_BUCKETS) and LATENCY_BUCKETS[i] <= bound:
+                        cumulative += stats.buckets[i]
+                        i += 1
+                    lines.append(f'{prefix}_latency_seconds_bucket{{method="{name}",le="{bound:g}"}} {cumulative}')
+                lines.append(f'{prefix}_latency_seconds_bucket{{method="{name}",le="+Inf"}} {stats.count}')
+                lines.append(f'{prefix}_latency_seconds_sum{{method="{name}"}} {stats.total:.9f}')
+                lines.append(f'{prefix}_latency_seconds_count{{method="{name}"}} {stats.count}')
+                for code, n in sorted(stats.errors.items(), key=lambda item: str(item[0])):
+                    errors.append(f'{prefix}_errors_total{{method="{name}",code="{code}"}} {n}')
+        lines.append(f"# HELP {prefix}_errors_total RPC calls returning a non-zero error code")
+        lines.append(f"# TYPE {prefix}_errors_total counter")
+        lines.extend(errors)
+        return "\n".join(lines) + "\n"
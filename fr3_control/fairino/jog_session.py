@@ -0,0 +1,241 @@
+"""
+交互式点动会话: 指令合并、限速与保活
+
+界面按钮每次按下/松开各发送一次 StartJOG/StopJOG 往返, 连续快速点按时指令在连接上排队, 机器人滞后于操作者。
+JogSession 由独立线程发送点动指令:
+    合并   发送线程空闲前到达的多个点动意图只保留最新一个 (被覆盖的计入 coalesced),
+           与正在执行的点动相同的意图不重复发送
+    限速   相邻两条指令间隔不小于 min_interval, 期间到达的意图继续合并
+    保活   点动期间调用方须在 keepalive_timeout 内调用 keepalive()/jog() 续期 (按钮按住时定时调用),
+           超时 (松开事件丢失、网页断开、界面卡死) 立即发送 ImmStopJOG
+    延迟   记录每条指令的往返耗时, latency() 供界面显示
+
+点动指令使用连接池中独占租用的连接, 不与其他接口调用排队; immediate_stop() 在调用线程中经连接池的另一条连接
+发送 ImmStopJOG, 发送线程阻塞在慢速往返中时也能立即停止。
+"""
+
+import threading
+import time
+
+from .instrumentation import MethodStats
+
+_JOG = 'jog'
+_STOP = 'stop'
+
+
+class JogSession:
+    """
+    点动会话
+
+    Args:
+        rpc: Robot.RPC 实例
+        ref: 默认点动坐标系, 0-关节, 2-基坐标系, 4-工具坐标系, 8-工件坐标系
+        vel: 默认速度百分比
+        acc: 加速度百分比
+        max_dis: 单次点动最大角度/距离 (° 或 mm)
+        min_interval: 相邻两条指令的最小间隔 (s)
+        keepalive_timeout: 保活超时 (s), 超时立即停止点动
+    """
+
+    def __init__(self, rpc, ref=0, vel=20.0, acc=100.0, max_dis=30.0, min_interval=0.05, keepalive_timeout=0.3):
+        self.rpc = rpc
+        self.ref = int(ref)
+        self.vel = float(vel)
+        self.acc = float(acc)
+        self.max_dis = float(max_dis)
+        self.min_interval = float(min_interval)
+        self.keepalive_timeout = float(keepalive_timeout)
+
+        self.active = None              # 正在执行的点动意图 ('jog', ref, nb, dir, vel)
+        self._pending = None            # 待发送的意图
+        self._deadline = 0.0            # 保活截止时间 (perf_counter)
+        self._last_send = 0.0
+        self._inflight = False          # 发送线程正在发送点动指令
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = None
+
+        self.intents = 0                # 收到的点动/停止意图数
+        self.sent = 0                   # 发送的指令数
+        self.coalesced = 0              # 被后到意图覆盖而未发送的意图数
+        self.keepalive_stops = 0        # 保活超时触发的立即停止次数
+        self.errors = 0
+        self.last_error = 0
+        self.last_rtt = 0.0
+        self.rtt = MethodStats('rtt')
+
+    # ------------------------------------------------------------------ 调用方
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._closed = False
+            self._thread = threading.Thread(target=self._run, name="JogSession", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self):
+        """停止发送线程, 点动中时立即停止"""
+        with self._cond:
+            self._closed = True
+            self._pending = None
+            active = self.active
+            self._cond.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        if active is not None:
+            self.immediate_stop()
+
+    def _post(self, intent):
+        with self._cond:
+            self.intents += 1
+            if self._pending is not None:
+                self.coalesced += 1
+            if intent is not None and intent == self.active:
+                # 与正在执行的点动相同: 撤销尚未发送的意图即可
+                intent = None
+            self._pending = intent
+            self._deadline = time.perf_counter() + self.keepalive_timeout
+            self._cond.notify()
+
+    def jog(self, nb, direction, vel=None, ref=None):
+        """
+        点动意图 (同时续期保活)
+
+        Args:
+            nb: 1~6, 关节号或坐标轴
+            direction: 0/负数-负方向, 1/正数-正方向
+            vel: 速度百分比, 默认会话速度
+            ref: 点动坐标系, 默认会话坐标系
+        """
+        ref = self.ref if ref is None else int(ref)
+        vel = self.vel if vel is None else float(vel)
+        self._post((_JOG, ref, int(nb), 1 if direction > 0 else 0, vel))
+
+    def stop(self):
+        """减速停止意图"""
+        with self._cond:
+            if self.active is None and not self._inflight:
+                # 尚未发送的点动直接撤销
+                self.intents += 1
+                if self._pending is not None:
+                    self.coalesced += 1
+                    self._pending = None
+                return
+        self._post((_STOP,))
+
+    def keepalive(self):
+        """续期保活, 按钮按住期间按小于 keepalive_timeout 的间隔调用"""
+        with self._cond:
+            self._deadline = time.perf_counter() + self.keepalive_timeout
+
+    def immediate_stop(self):
+        """在调用线程中立即发送 ImmStopJOG, 返回错误码"""
+        with self._cond:
+            if self._pending is not None:
+                self.coalesced += 1
+            self._pending = None
+            self.active = None
+        return self._send(self.rpc.robot.ImmStopJOG)
+
+    # ------------------------------------------------------------------ 发送线程
+    def _send(self, func, *args):
+        start = time.perf_counter()
+        try:
+            error = func(*args)
+        except Exception as ex:
+            error = 'exception'
+            self.last_error = str(ex)
+        end = time.perf_counter()
+        self.sent += 1
+        self.last_rtt = end - start
+        self.rtt.add(end - start, error)
+        if error != 0:
+            self.errors += 1
+            if error != 'exception':
+                self.last_error = error
+        return error
+
+    def _next_command(self):
+        """等待下一条要发送的指令, 关闭时返回 None"""
+        with self._cond:
+            while not self._closed:
+                now = time.perf_counter()
+                if self.active is not None and now >= self._deadline:
+                    # 保活超时优先于待发送的意图
+                    self._pending = None
+                    self.active = None
+                    self.keepalive_stops += 1
+                    return 'lapse', None
+                timeout = None
+                if self._pending is not None:
+                    ready = self._last_send + self.min_interval
+                    if now >= ready:
+                        intent, self._pending = self._pending, None
+                        self._inflight = True
+                        return 'intent', intent
+                    timeout = ready - now
+                if self.active is not None:
+                    remaining = self._deadline - now
+                    timeout = remaining if timeout is None else min(timeout, remaining)
+                self._cond.wait(timeout)
+            return None, None
+
+    def _run(self):
+        rpc = self.rpc
+        with rpc.robot.lease() as proxy:
+            while True:
+                kind, intent = self._next_command()
+                if kind is None:
+                    break
+                if kind == 'lapse':
+                    self._send(proxy.ImmStopJOG)
+                elif intent[0] == _STOP:
+                    active = self.active
+                    if active is not None:
+                        self._send(proxy.StopJOG, active[1] + 1)
+                        with self._cond:
+                            if self.active is active:
+                                self.active = None
+                else:
+                    self._start(proxy, intent)
+                self._last_send = time.perf_counter()
+                self._inflight = False
+
+    def _start(self, proxy, intent):
+        _, ref, nb, direction, vel = intent
+        rpc = self.rpc
+        if rpc.GetSafetyCode() != 0:
+            self.errors += 1
+            self.last_error = rpc.GetSafetyCode()
+            return
+        # 状态陈旧 (断线) 时操作者看不到机器人实际位置, 不再开始点动
+        if rpc.state_stale():
+            self.errors += 1
+            self.last_error = 'stale state'
+            return
+        active = self.active
+        if active is not None:
+            # 切换关节/方向: 先停止当前点动
+            self._send(proxy.StopJOG, active[1] + 1)
+        error = self._send(proxy.StartJOG, ref, nb, direction, vel, self.acc, self.max_dis)
+        with self._cond:
+            self.active = intent if error == 0 else None
+
+    # ------------------------------------------------------------------ 统计
+    def latency(self):
+        """指令往返耗时 (ms): 最近一次与 mean/p50/p99/max"""
+        summary = self.rtt.summary()
+        result = {k: summary[k] for k in ('mean_ms', 'p50_ms', 'p99_ms', 'max_ms')}
+        result['last_ms'] = self.last_rtt * 1e3
+        return result
+
+    def stats(self):
+        return {
+            'active': self.active is not None,
+            'intents': self.intents,
+            'sent': self.sent,
+            'coalesced': self.coalesced,
+            'keepalive_stops': self.keepalive_stops,
+            'errors': self.errors,
+            'last_error': self.last_error,
+            'latency_ms': self.latency(),
+        }
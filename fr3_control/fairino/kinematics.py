@@ -0,0 +1,869 @@
+"""
+FR3 本地运动学 (依赖 numpy)
+
+ArmKinematics 按 Modified DH 参数计算法兰正解与逆解。FR3 为腕部三轴交于一点的球形手腕 (a1=a2=a4=a5=a6=0,
+d2=d3=d5=0), 逆解有闭式解: 由法兰位姿减去 d6 得腕心, 腕心位置决定 j1~j3 (肩部左右 × 肘部上下),
+腕部姿态决定 j4~j6 (手腕翻转), 共 8 组分支, inverse_all/inverse_batch 返回限位内的全部构型,
+inverse 取最接近当前构型的一组。参数不满足上述结构时 inverse 以当前关节为初值数值求解 (inverse_numeric)。
+LocalKinematics 在其上加 LRU 缓存 (按量化后的关节/位姿为键) 与控制器比对校验,
+供 MoveJ/MoveL 等接口补全缺省的位姿/关节位置, 省去一次 GetForwardKin/GetInverseKin 往返:
+    - 正解与逆解分别对每个 (工具号, 工件号) 组合的前 validate_count 次求解同时调用控制器比对, 一致后才使用本地结果;
+      比对不一致 (工具/工件坐标系非零、模型参数与控制器不符) 则该组合此后一律使用控制器求解
+      (逆解比对的是所选构型, 与控制器 config=-1 选取的构型不同也视为不一致)
+    - 本地逆解未收敛或超出关节限位时, 本次回退控制器求解
+
+dh_chain/ArmKinematics.forward_batch 对 (N, 6) 关节数组批量求正解, 返回 (N, 4, 4) 法兰位姿 (可选全部连杆坐标系),
+供工作空间扫描、轨迹预览与碰撞检测使用; 逐连杆以 (N, 3) 列向量做逐元素运算, 不逐位姿进入 Python。
+inverse_batch 同样对 (N, 6) 位姿批量求 8 组分支的闭式逆解, select_nearest 按初值批量选取构型。
+
+带工具坐标系或需要沿路径连续求解时使用数值逆解: jacobian 由连杆坐标系解析计算几何雅可比,
+inverse_dls_batch 为阻尼最小二乘迭代 (关节限位截断、逐行收敛后提前退出), inverse_path 对 interpolate_line/
+interpolate_arc 离散的笛卡尔折线整条求解 (热启动), 并返回每点的位置/姿态残差。
+
+位姿格式与控制器一致: [x, y, z, rx, ry, rz], 单位 mm 与 °, 姿态为 Z-Y-X 欧拉角 (R = Rz·Ry·Rx)。
+"""
+
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# FR3 DH 参数 (Modified DH), 与 tools/dh_parameter_analyzer.py 一致
+FR3_DH_PARAMS = {
+    'alpha': [0, -90, 0, 90, -90, 90],      # 连杆扭转角 (度)
+    'a': [0, 0, 316, 0, 0, 0],              # 连杆长度 (mm)
+    'd': [333, 0, 0, 384, 0, 107],          # 连杆偏移 (mm)
+    'theta_offset': [0, -90, 90, 0, 0, 0],  # 关节角偏移 (度)
+}
+
+# 关节限位 (度)
+FR3_JOINT_LIMITS = [(-170, 170), (-120, 120), (-170, 170), (-170, 170), (-120, 120), (-175, 175)]
+
+
+def rpy_to_matrix(rx, ry, rz):
+    """Z-Y-X 欧拉角 (度) 转旋转矩阵"""
+    cx, sx = math.cos(math.radians(rx)), math.sin(math.radians(rx))
+    cy, sy = math.cos(math.radians(ry)), math.sin(math.radians(ry))
+    cz, sz = math.cos(math.radians(rz)), math.sin(math.radians(rz))
+    return np.array([
+        [cz * cy, cz * sy * sx - sz * cx, cz * sy * cx + sz * sx],
+        [sz * cy, sz * sy * sx + cz * cx, sz * sy * cx - cz * sx],
+        [-sy, cy * sx, cy * cx],
+    ])
+
+
+def matrix_to_rpy(R):
+    """旋转矩阵转 Z-Y-X 欧拉角 (度)"""
+    sy = math.hypot(R[0, 0], R[1, 0])
+    if sy > 1e-9:
+        rx = math.atan2(R[2, 1], R[2, 2])
+        ry = math.atan2(-R[2, 0], sy)
+        rz = math.atan2(R[1, 0], R[0, 0])
+    else:
+        rx = math.atan2(-R[1, 2], R[1, 1])
+        ry = math.atan2(-R[2, 0], sy)
+        rz = 0.0
+    return [math.degrees(rx), math.degrees(ry), math.degrees(rz)]
+
+
+def pose_to_matrix(pose):
+    """[x, y, z, rx, ry, rz] 转 4x4 齐次矩阵"""
+    T = np.eye(4)
+    T[:3, :3] = rpy_to_matrix(pose[3], pose[4], pose[5])
+    T[:3, 3] = pose[:3]
+    return T
+
+
+def matrix_to_pose(T):
+    """4x4 齐次矩阵转 [x, y, z, rx, ry, rz]"""
+    return [float(T[0, 3]), float(T[1, 3]), float(T[2, 3])] + matrix_to_rpy(T)
+
+
+def poses_to_matrices(poses):
+    """(N, 6) 位姿 [x, y, z, rx, ry, rz] 批量转 (N, 4, 4) 齐次矩阵, 与 pose_to_matrix 相同的 Z-Y-X 欧拉角"""
+    poses = np.asarray(poses, dtype=float)
+    angles = np.radians(poses[..., 3:6])
+    c = np.cos(angles)
+    s = np.sin(angles)
+    cx, cy, cz = c[..., 0], c[..., 1], c[..., 2]
+    sx, sy, sz = s[..., 0], s[..., 1], s[..., 2]
+    T = np.zeros(poses.shape[:-1] + (4, 4))
+    T[..., 0, 0] = cz * cy
+    T[..., 0, 1] = cz * sy * sx - sz * cx
+    T[..., 0, 2] = cz * sy * cx + sz * sx
+    T[..., 1, 0] = sz * cy
+    T[..., 1, 1] = sz * sy * sx + cz * cx
+    T[..., 1, 2] = sz * sy * cx - cz * sx
+    T[..., 2, 0] = -sy
+    T[..., 2, 1] = cy * sx
+    T[..., 2, 2] = cy * cx
+    T[..., :3, 3] = poses[..., :3]
+    T[..., 3, 3] = 1.0
+    return T
+
+
+def matrices_to_poses(T):
+    """(N, 4, 4) 齐次矩阵批量转 (N, 6) 位姿 [x, y, z, rx, ry, rz], 与 matrix_to_pose 相同的 Z-Y-X 欧拉角"""
+    T = np.asarray(T, dtype=float)
+    R = T[..., :3, :3]
+    sy = np.hypot(R[..., 0, 0], R[..., 1, 0])
+    regular = sy > 1e-9
+    rx = np.where(regular, np.arctan2(R[..., 2, 1], R[..., 2, 2]), np.arctan2(-R[..., 1, 2], R[..., 1, 1]))
+    ry = np.arctan2(-R[..., 2, 0], sy)
+    rz = np.where(regular, np.arctan2(R[..., 1, 0], R[..., 0, 0]), 0.0)
+    return np.concatenate((T[..., :3, 3], np.degrees(np.stack((rx, ry, rz), axis=-1))), axis=-1)
+
+
+def dh_chain(theta, alpha, a, d, modified=True, link_frames=False):
+    """
+    批量 DH 正解
+
+    旋转矩阵按列保存为 (3, N) 数组, 每个连杆只做逐元素乘加 (绕 z/x 轴旋转只混合两列, 平移为列的线性组合),
+    比逐位姿构造 4x4 矩阵再连乘快两个数量级以上。
+
+    Args:
+        theta: (N, n) 关节转角 (弧度, 已加关节角偏移), 或 (n,) 单个构型
+        alpha: (n,) 连杆扭转角 (弧度)
+        a: (n,) 连杆长度
+        d: (n,) 连杆偏移
+        modified: True-Modified DH (Craig, T = RotX(α)·TransX(a)·RotZ(θ)·TransZ(d)),
+                  False-标准 DH (T = RotZ(θ)·TransZ(d)·TransX(a)·RotX(α))
+        link_frames: 返回全部连杆坐标系
+
+    Returns:
+        (N, 4, 4) 末端位姿, link_frames 时为 (N, n, 4, 4), 最后一个为末端; 输入为单个构型时去掉 N 维
+    """
+    theta = np.asarray(theta, dtype=float)
+    single = theta.ndim == 1
+    theta = np.atleast_2d(theta)
+    count, joints = theta.shape
+    ca = np.cos(np.asarray(alpha, dtype=float))
+    sa = np.sin(np.asarray(alpha, dtype=float))
+    a = np.asarray(a, dtype=float)
+    d = np.asarray(d, dtype=float)
+    out = np.empty((count, joints, 4, 4) if link_frames else (count, 4, 4))
+    # 分块计算, 中间数组留在 CPU 缓存内
+    for start in range(0, count, _CHUNK):
+        end = min(start + _CHUNK, count)
+        _dh_block(theta[start:end], ca, sa, a, d, modified, out[start:end], link_frames)
+    return out[0] if single else out
+
+
+_CHUNK = 4096
+
+
+def _dh_block(theta, ca, sa, a, d, modified, out, link_frames):
+    count, joints = theta.shape
+    ct = np.cos(theta.T)
+    st = np.sin(theta.T)
+    # 旋转矩阵的三列与位置, 均为 (3, N) (每个分量连续存放)
+    r0 = np.zeros((3, count))
+    r1 = np.zeros((3, count))
+    r2 = np.zeros((3, count))
+    r0[0] = r1[1] = r2[2] = 1.0
+    p = np.zeros((3, count))
+    for i in range(joints):
+        c = ct[i]
+        s = st[i]
+        if modified:
+            # R·RotX(α) = [r0, u, w], 平移 a·r0 + d·w, 再右乘 RotZ(θ)
+            u = ca[i] * r1 + sa[i] * r2
+            w = ca[i] * r2 - sa[i] * r1
+            p = p + a[i] * r0 + d[i] * w
+            r0, r1, r2 = c * r0 + s * u, c * u - s * r0, w
+        else:
+            # R·RotZ(θ) = [c0, c1, r2], 平移 d·r2 + a·c0, 再右乘 RotX(α)
+            c0 = c * r0 + s * r1
+            c1 = c * r1 - s * r0
+            p = p + d[i] * r2 + a[i] * c0
+            r0, r1, r2 = c0, ca[i] * c1 + sa[i] * r2, ca[i] * r2 - sa[i] * c1
+        if link_frames:
+            _store(out[:, i], r0, r1, r2, p)
+    if not link_frames:
+        _store(out, r0, r1, r2, p)
+
+
+def _store(T, r0, r1, r2, p):
+    T[:, :3, 0] = r0.T
+    T[:, :3, 1] = r1.T
+    T[:, :3, 2] = r2.T
+    T[:, :3, 3] = p.T
+    T[:, 3, :3] = 0.0
+    T[:, 3, 3] = 1.0
+
+
+def rotation_error(R, R_target):
+    """R 到 R_target 的旋转误差向量 (基坐标系, 弧度), 小角度时近似为轴角"""
+    return 0.5 * (np.cross(R[:, 0], R_target[:, 0]) + np.cross(R[:, 1], R_target[:, 1])
+                  + np.cross(R[:, 2], R_target[:, 2]))
+
+
+def rotation_angle(R1, R2):
+    """两个旋转矩阵之间的夹角 (度)"""
+    c = (np.trace(R1.T @ R2) - 1.0) / 2.0
+    return math.degrees(math.acos(max(-1.0, min(1.0, c))))
+
+
+def joint_distance(q1, q2):
+    """两组关节角 (度) 的最大差值, 按 360° 取最短"""
+    return max(abs((a - b + 180.0) % 360.0 - 180.0) for a, b in zip(q1, q2))
+
+
+def rotation_log(R):
+    """
+    批量旋转矩阵转轴角向量 (弧度), 与 rotation_exp 互逆
+
+    Args:
+        R: (..., 3, 3) 旋转矩阵
+
+    Returns:
+        (..., 3) 轴角向量, 模为转角 (0~π)
+    """
+    R = np.asarray(R, dtype=float)
+    cos = np.clip((np.trace(R, axis1=-2, axis2=-1) - 1.0) / 2.0, -1.0, 1.0)
+    angle = np.arccos(cos)
+    v = np.stack((R[..., 2, 1] - R[..., 1, 2], R[..., 0, 2] - R[..., 2, 0], R[..., 1, 0] - R[..., 0, 1]), axis=-1)
+    sin = np.sin(angle)
+    w = v * np.where(sin > 1e-6, angle / np.maximum(2.0 * sin, 1e-12), 0.5)[..., None]
+    near_pi = (sin <= 1e-6) & (cos < 0)
+    if near_pi.any():
+        # 转角接近 π 时反对称部分趋于 0, 转轴取 R + I 中模最大的列
+        Rp = R[near_pi] + np.eye(3)
+        cols = np.take_along_axis(Rp, np.argmax(np.diagonal(Rp, axis1=-2, axis2=-1), axis=-1)[:, None, None], axis=-1)
+        axis = cols[..., 0] / np.linalg.norm(cols[..., 0], axis=-1, keepdims=True)
+        w[near_pi] = axis * angle[near_pi][:, None]
+    return w
+
+
+def rotation_exp(w):
+    """批量轴角向量 (弧度) 转旋转矩阵 (Rodrigues 公式), (..., 3) -> (..., 3, 3)"""
+    w = np.asarray(w, dtype=float)
+    angle = np.linalg.norm(w, axis=-1)
+    small = angle < 1e-12
+    k = w / np.where(small, 1.0, angle)[..., None]
+    K = np.zeros(w.shape[:-1] + (3, 3))
+    K[..., 0, 1], K[..., 0, 2] = -k[..., 2], k[..., 1]
+    K[..., 1, 0], K[..., 1, 2] = k[..., 2], -k[..., 0]
+    K[..., 2, 0], K[..., 2, 1] = -k[..., 1], k[..., 0]
+    s = np.sin(angle)[..., None, None]
+    c = (1.0 - np.cos(angle))[..., None, None]
+    return np.eye(3) + s * K + c * (K @ K)
+
+
+def _interpolate_rotation(R0, R1, t):
+    """R0 到 R1 按比例 t (M,) 匀速插值 (绕固定轴转动), 返回 (M, 3, 3)"""
+    w = rotation_log(R1 @ R0.T)
+    return rotation_exp(t[:, None] * w) @ R0
+
+
+def interpolate_line(start, end, step=1.0, rot_step=1.0):
+    """
+    直线段离散为位姿折线 (MoveL 路径)
+
+    位置线性插值, 姿态绕固定轴匀速转动; 点数由位置步长与姿态步长中较密者决定
+
+    Args:
+        start: 起点位姿 [x, y, z, rx, ry, rz]
+        end: 终点位姿
+        step: 位置步长 (mm)
+        rot_step: 姿态步长 (度)
+
+    Returns:
+        (M, 6) 位姿数组, 含起点与终点
+    """
+    T0, T1 = pose_to_matrix(start), pose_to_matrix(end)
+    angle = math.degrees(np.linalg.norm(rotation_log(T1[:3, :3] @ T0[:3, :3].T)))
+    count = max(1, int(math.ceil(max(np.linalg.norm(T1[:3, 3] - T0[:3, 3]) / step, angle / rot_step))))
+    t = np.linspace(0.0, 1.0, count + 1)
+    T = np.zeros((count + 1, 4, 4))
+    T[:, :3, :3] = _interpolate_rotation(T0[:3, :3], T1[:3, :3], t)
+    T[:, :3, 3] = T0[:3, 3] + t[:, None] * (T1[:3, 3] - T0[:3, 3])
+    T[:, 3, 3] = 1.0
+    return matrices_to_poses(T)
+
+
+def interpolate_arc(start, via, end, step=1.0):
+    """
+    三点圆弧离散为位姿折线 (MoveC 路径: 起点 -> 经过 via -> 终点)
+
+    位置沿过三点的圆弧等弧长分布, 姿态按弧长比例从起点姿态转到终点姿态
+
+    Args:
+        start: 起点位姿 [x, y, z, rx, ry, rz]
+        via: 圆弧中间点位姿 (只使用位置)
+        end: 终点位姿
+        step: 弧长步长 (mm)
+
+    Returns:
+        (M, 6) 位姿数组, 含起点与终点
+    """
+    p1, p2, p3 = (np.asarray(p[:3], dtype=float) for p in (start, via, end))
+    u, v = p2 - p1, p3 - p1
+    n = np.cross(u, v)
+    if np.linalg.norm(n) < 1e-9 * max(1.0, np.dot(u, u), np.dot(v, v)):
+        raise ValueError("圆弧三点共线")
+    # 外接圆圆心
+    center = p1 + np.cross(np.dot(u, u) * v - np.dot(v, v) * u, n) / (2.0 * np.dot(n, n))
+    radius = np.linalg.norm(p1 - center)
+    e1 = (p1 - center) / radius
+    e2 = np.cross(n / np.linalg.norm(n), e1)
+    d3 = p3 - center
+    sweep = math.atan2(np.dot(d3, e2), np.dot(d3, e1)) % (2.0 * math.pi)
+    count = max(2, int(math.ceil(radius * sweep / step)))
+    t = np.linspace(0.0, 1.0, count + 1)
+    phi = t * sweep
+    T0, T1 = pose_to_matrix(start), pose_to_matrix(end)
+    T = np.zeros((count + 1, 4, 4))
+    T[:, :3, :3] = _interpolate_rotation(T0[:3, :3], T1[:3, :3], t)
+    T[:, :3, 3] = center + radius * (np.cos(phi)[:, None] * e1 + np.sin(phi)[:, None] * e2)
+    T[-1, :3, 3] = p3
+    T[:, 3, 3] = 1.0
+    return matrices_to_poses(T)
+
+
+def _tool_matrix(tool):
+    """工具坐标系 (法兰 -> TCP): None、[x, y, z, rx, ry, rz] 或 4x4 矩阵"""
+    if tool is None:
+        return None
+    tool = np.asarray(tool, dtype=float)
+    return tool if tool.shape == (4, 4) else pose_to_matrix(tool)
+
+
+class ArmKinematics:
+    """
+    六轴机械臂运动学 (Modified DH)
+
+    Args:
+        dh_params: DH 参数字典, 键 alpha/a/d/theta_offset, 单位 度/mm
+        joint_limits: 关节限位 [(min, max), ...], 单位 度
+    """
+
+    def __init__(self, dh_params=FR3_DH_PARAMS, joint_limits=FR3_JOINT_LIMITS):
+        self.dh_params = dh_params
+        self.joint_limits = [tuple(limit) for limit in joint_limits]
+        self._alpha = np.radians(dh_params['alpha'])
+        self._a = np.asarray(dh_params['a'], dtype=float)
+        self._d = np.asarray(dh_params['d'], dtype=float)
+        self._offset = np.radians(dh_params['theta_offset'])
+        self._ca = np.cos(self._alpha)
+        self._sa = np.sin(self._alpha)
+        self.analytic = self._is_analytic()
+
+    def frames(self, joint_pos):
+        """关节角 (度) -> 各连杆坐标系相对基坐标系的 4x4 位姿 (6 个, 最后一个为法兰)"""
+        theta = np.radians(np.asarray(joint_pos, dtype=float)) + self._offset
+        ct = np.cos(theta)
+        st = np.sin(theta)
+        T = np.eye(4)
+        frames = []
+        for i in range(6):
+            ca, sa, a, d = self._ca[i], self._sa[i], self._a[i], self._d[i]
+            T = T @ np.array([
+                [ct[i], -st[i], 0.0, a],
+                [st[i] * ca, ct[i] * ca, -sa, -d * sa],
+                [st[i] * sa, ct[i] * sa, ca, d * ca],
+                [0.0, 0.0, 0.0, 1.0],
+            ])
+            frames.append(T)
+        return frames
+
+    def forward(self, joint_pos):
+        """关节角 (度) -> 法兰 4x4 位姿矩阵 (mm)"""
+        return self.frames(joint_pos)[-1]
+
+    def forward_pose(self, joint_pos):
+        """关节角 (度) -> 法兰位姿 [x, y, z, rx, ry, rz]"""
+        return matrix_to_pose(self.forward(joint_pos))
+
+    def forward_batch(self, joint_pos, link_frames=False):
+        """
+        批量正解
+
+        Args:
+            joint_pos: (N, 6) 关节角 (度)
+            link_frames: 返回全部连杆坐标系
+
+        Returns:
+            (N, 4, 4) 法兰位姿 (mm), link_frames 时为 (N, 6, 4, 4)
+        """
+        theta = np.radians(np.asarray(joint_pos, dtype=float)) + self._offset
+        return dh_chain(theta, self._alpha, self._a, self._d, True, link_frames)
+
+    def forward_pose_batch(self, joint_pos):
+        """(N, 6) 关节角 (度) -> (N, 6) 法兰位姿 [x, y, z, rx, ry, rz]"""
+        return matrices_to_poses(self.forward_batch(joint_pos))
+
+    def within_limits(self, joint_pos):
+        """关节角是否在限位内"""
+        return all(lo <= q <= hi for q, (lo, hi) in zip(joint_pos, self.joint_limits))
+
+    def inverse(self, desc_pos, seed, max_iter=30, pos_tol=1e-3, rot_tol=1e-5):
+        """
+        逆解, 取最接近 seed 的构型
+
+        满足球形手腕结构时为闭式解 (全部分支中关节最大差值最小的一组), 否则数值求解
+
+        Args:
+            desc_pos: 目标位姿 [x, y, z, rx, ry, rz]
+            seed: 初值关节角 (度), 一般为当前关节位置
+            max_iter/pos_tol/rot_tol: 数值求解的迭代次数与收敛阈值 (mm/弧度)
+
+        Returns:
+            关节角列表 (度), 无解或超出限位时返回 None
+        """
+        if self.analytic:
+            return self.inverse_nearest(desc_pos, seed)
+        return self.inverse_numeric(desc_pos, seed, max_iter, pos_tol, rot_tol)
+
+    def inverse_numeric(self, desc_pos, seed, max_iter=30, pos_tol=1e-3, rot_tol=1e-5):
+        """
+        数值逆解, 从 seed 出发收敛到附近的构型 (不满足闭式解结构的参数使用)
+
+        Args:
+            desc_pos: 目标位姿 [x, y, z, rx, ry, rz]
+            seed: 初值关节角 (度), 一般为当前关节位置
+            pos_tol: 位置收敛阈值 (mm)
+            rot_tol: 姿态收敛阈值 (弧度)
+
+        Returns:
+            关节角列表 (度), 未收敛或超出限位时返回 None
+        """
+        target = pose_to_matrix(desc_pos)
+        q = np.asarray(seed, dtype=float)
+        J = np.empty((6, 6))
+        for _ in range(max_iter):
+            frames = self.frames(q)
+            T = frames[-1]
+            err = np.concatenate((target[:3, 3] - T[:3, 3], rotation_error(T[:3, :3], target[:3, :3])))
+            if np.all(np.abs(err[:3]) < pos_tol) and np.all(np.abs(err[3:]) < rot_tol):
+                joints = [float(v) for v in q]
+                return joints if self.within_limits(joints) else None
+            # 几何雅可比: Modified DH 中关节 i 绕第 i 个坐标系的 z 轴转动
+            p_end = T[:3, 3]
+            for i, Ti in enumerate(frames):
+                z = Ti[:3, 2]
+                J[:3, i] = np.cross(z, p_end - Ti[:3, 3])
+                J[3:, i] = z
+            q = q + np.degrees(np.linalg.lstsq(J, err, rcond=None)[0])
+        return None
+
+    def _is_analytic(self):
+        """DH 参数是否为 FR3 的球形手腕结构 (闭式逆解的前提)"""
+        alpha = np.degrees(self._alpha)
+        return (len(alpha) == 6
+                and np.allclose(alpha, FR3_DH_PARAMS['alpha'], atol=1e-9)
+                and np.allclose(self._a[[0, 1, 3, 4, 5]], 0.0, atol=1e-9)
+                and np.allclose(self._d[[1, 2, 4]], 0.0, atol=1e-9)
+                and self._a[2] > 0 and self._d[3] > 0)
+
+    def inverse_batch(self, target, seeds=None, check=True, tol=1e-6):
+        """
+        批量闭式逆解, 返回全部 8 组分支
+
+        分支下标 = 肩部 × 4 + 肘部 × 2 + 手腕: 肩部 0-腕心在 j1 正方向一侧, 1-反方向一侧 (j1 相差 180°);
+        肘部 0/1 为 j3 的两个解; 手腕 0-θ5 > 0, 1-θ5 < 0 (j4、j6 各相差 180°)。
+        腕心不可达、超出关节限位或与其他分支重合 (肘部伸直、θ5 = 0 的奇异位置) 的分支标记为无效。
+        奇异位置的自由关节取初值: 腕心在 j1 轴线上时 j1 任意, θ5 = 0 时 j4 与 j6 共轴, 未指定 seeds 时取 0。
+
+        Args:
+            target: (N, 6) 位姿 [x, y, z, rx, ry, rz] 或 (N, 4, 4) 齐次矩阵 (mm)
+            seeds: 可选 (N, 6) 或 (6,) 初值关节角 (度), 用于奇异位置的自由关节
+            check: 以批量正解回代校验 (位置与旋转矩阵元素误差不超过 tol)
+            tol: 回代校验阈值
+
+        Returns:
+            (joints, valid) joints 为 (N, 8, 6) 关节角 (度), 无效分支为 NaN; valid 为 (N, 8) 布尔数组
+        """
+        if not self.analytic:
+            raise ValueError("DH 参数不是球形手腕结构, 无闭式逆解")
+        target = np.asarray(target, dtype=float)
+        T = target if target.shape[-2:] == (4, 4) else poses_to_matrices(target)
+        T = T.reshape(-1, 4, 4)
+        count = len(T)
+        free = np.zeros((count, 2))
+        if seeds is not None:
+            free[:] = np.radians(np.asarray(seeds, dtype=float)[..., [0, 3]]) + self._offset[[0, 3]]
+        joints = np.empty((count, 8, 6))
+        valid = np.empty((count, 8), dtype=bool)
+        # 分块求解, 回代校验的 8 倍正解数组不随 N 增长
+        for start in range(0, count, _CHUNK):
+            end = min(start + _CHUNK, count)
+            joints[start:end], valid[start:end] = self._inverse_block(T[start:end], free[start:end], check, tol)
+        return joints, valid
+
+    def _inverse_block(self, T, free, check, tol):
+        R = T[:, :3, :3]
+        d1, a3, d4, d6 = self._d[0], self._a[2], self._d[3], self._d[5]
+
+        # 腕心: 法兰沿 z 轴后退 d6, 只由 j1~j3 决定
+        pw = T[:, :3, 3] - d6 * R[:, :, 2]
+        rho = np.hypot(pw[:, 0], pw[:, 1])[:, None]
+        X = rho * _SHOULDER
+        Y = (d1 - pw[:, 2])[:, None]
+        base = np.where(rho[:, 0] < 1e-9, free[:, 0], np.arctan2(pw[:, 1], pw[:, 0]))
+        th1 = base[:, None] + np.where(_SHOULDER > 0, 0.0, np.pi)
+
+        # j2/j3 平面内: [X, Y] = RotZ(θ2)·[a3 + d4·sin θ3, -d4·cos θ3]
+        s3 = (rho * rho + Y * Y - a3 * a3 - d4 * d4) / (2.0 * a3 * d4)
+        reach = np.abs(s3) <= 1.0 + 1e-12
+        t3 = np.arcsin(np.clip(s3, -1.0, 1.0))
+        th3 = np.where(_ELBOW, np.pi - t3, t3)
+        th2 = np.arctan2(Y, X) - np.arctan2(-d4 * np.cos(th3), a3 + d4 * np.sin(th3))
+
+        # 腕部姿态 M = R03ᵀ·R, R03 = RotZ(θ1)·RotX(-90°)·RotZ(θ2 + θ3) 的三列
+        c1, s1 = np.cos(th1), np.sin(th1)
+        cp, sp = np.cos(th2 + th3), np.sin(th2 + th3)
+        M0 = (c1 * cp)[..., None] * R[:, None, 0] + (s1 * cp)[..., None] * R[:, None, 1] - sp[..., None] * R[:, None, 2]
+        M1 = -(c1 * sp)[..., None] * R[:, None, 0] - (s1 * sp)[..., None] * R[:, None, 1] - cp[..., None] * R[:, None, 2]
+        M2 = -s1[..., None] * R[:, None, 0] + c1[..., None] * R[:, None, 1]
+        c5 = -M1[..., 2]
+        s5 = np.hypot(M0[..., 2], M2[..., 2])
+        th4 = np.arctan2(_WRIST * M2[..., 2], _WRIST * M0[..., 2])
+        th5 = np.arctan2(_WRIST * s5, c5)
+        th6 = np.arctan2(-_WRIST * M1[..., 1], _WRIST * M1[..., 0])
+        singular = s5 < 1e-9
+        if singular.any():
+            th4 = np.where(singular, free[:, 1:], th4)
+            th5 = np.where(singular, np.where(c5 > 0, 0.0, np.pi), th5)
+            # θ5 = 0 时 M = RotX(90°)·RotZ(θ4 + θ6), θ5 = 180° 时 θ6 - θ4 由 M 第一列决定
+            phi = np.arctan2(M2[..., 0], np.where(c5 > 0, M0[..., 0], -M0[..., 0]))
+            th6 = np.where(singular, np.where(c5 > 0, phi - th4, phi + th4), th6)
+
+        theta = np.stack(np.broadcast_arrays(th1, th2, th3, th4, th5, th6), axis=-1)
+        joints = np.degrees(theta - self._offset)
+        joints = (joints + 180.0) % 360.0 - 180.0
+        limits = np.asarray(self.joint_limits, dtype=float)
+        valid = (reach & ((limits[:, 0] <= joints) & (joints <= limits[:, 1])).all(axis=-1)
+                 & ~(singular & (_WRIST < 0))
+                 & ~((np.abs(s3) >= 1.0 - 1e-12) & _ELBOW))
+        if check:
+            F = self.forward_batch(joints.reshape(-1, 6)).reshape(-1, 8, 4, 4)
+            err = np.abs(F[..., :3, :] - T[:, None, :3, :])
+            valid &= (err[..., 3] <= tol * max(1.0, d1 + a3 + d4 + d6)).all(axis=-1) \
+                & (err[..., :3] <= tol).all(axis=(-2, -1))
+        joints[~valid] = np.nan
+        return joints, valid
+
+    def inverse_all(self, desc_pos):
+        """
+        单个位姿的全部闭式逆解
+
+        Args:
+            desc_pos: 目标位姿 [x, y, z, rx, ry, rz] 或 4x4 齐次矩阵
+
+        Returns:
+            关节角列表 (度) 的列表, 按分支下标排列, 无解时为空列表
+        """
+        joints, valid = self.inverse_batch(np.asarray(desc_pos, dtype=float)[None])
+        return [[float(v) for v in q] for q in joints[0][valid[0]]]
+
+    def inverse_nearest(self, desc_pos, seed):
+        """最接近 seed 的闭式逆解 (关节最大差值最小), 无解时返回 None"""
+        joints, valid = self.inverse_batch(np.asarray(desc_pos, dtype=float)[None], seed)
+        q, found = select_nearest(joints, valid, seed)
+        return [float(v) for v in q[0]] if found[0] else None
+
+    def jacobian(self, joint_pos, tool=None):
+        """
+        几何雅可比矩阵 (解析式)
+
+        Modified DH 中关节 i 绕第 i 个连杆坐标系的 z 轴转动, 第 i 列为 [z_i × (p - o_i); z_i]
+
+        Args:
+            joint_pos: 关节角 (度), (6,) 或 (N, 6)
+            tool: 工具坐标系 (法兰 -> TCP), [x, y, z, rx, ry, rz] 或 4x4 矩阵, 默认法兰
+
+        Returns:
+            (6, 6) 或 (N, 6, 6), 基坐标系下 TCP 线速度 (mm/rad) 与角速度 (rad/rad) 对各关节角速度的偏导
+        """
+        q = np.asarray(joint_pos, dtype=float)
+        J, _ = self._jacobian_end(np.atleast_2d(q), _tool_matrix(tool))
+        return J[0] if q.ndim == 1 else J
+
+    def _jacobian_end(self, q, tool):
+        """(N, 6) 关节角 -> ((N, 6, 6) 雅可比, (N, 4, 4) TCP 位姿)"""
+        F = self.forward_batch(q, link_frames=True)
+        end = F[:, -1] if tool is None else F[:, -1] @ tool
+        z = F[:, :, :3, 2]
+        J = np.empty((len(q), 6, 6))
+        J[:, :3, :] = np.cross(z, end[:, None, :3, 3] - F[:, :, :3, 3]).transpose(0, 2, 1)
+        J[:, 3:, :] = z.transpose(0, 2, 1)
+        return J, end
+
+    def inverse_dls(self, desc_pos, seed, tool=None, **options):
+        """
+        阻尼最小二乘数值逆解 (单个位姿), 参数见 inverse_dls_batch
+
+        Returns:
+            关节角列表 (度), 未收敛时返回 None
+        """
+        joints, _, converged, _ = self.inverse_dls_batch(np.asarray(desc_pos, dtype=float)[None], seed, tool,
+                                                         **options)
+        return [float(v) for v in joints[0]] if converged[0] else None
+
+    def inverse_dls_batch(self, targets, seeds, tool=None, max_iter=20, pos_tol=1e-3, rot_tol=1e-5,
+                          damping=1.0, rot_weight=200.0, max_step=20.0):
+        """
+        阻尼最小二乘 (Levenberg-Marquardt) 批量数值逆解
+
+        每次迭代 Δq = Jᵀ(J·Jᵀ + λ²I)⁻¹·e, 奇异位置附近阻尼限制关节速度; 步长超过 max_step 时等比缩小,
+        每步后关节角截断到限位内。各行独立收敛, 已收敛的行不再参与迭代 (提前退出)。
+
+        Args:
+            targets: (N, 6) TCP 目标位姿 [x, y, z, rx, ry, rz] 或 (N, 4, 4) 矩阵
+            seeds: (N, 6) 或 (6,) 初值关节角 (度), 如上一时刻/上一点的解
+            tool: 工具坐标系 (法兰 -> TCP), 默认法兰
+            max_iter: 最大迭代次数
+            pos_tol: 位置收敛阈值 (mm)
+            rot_tol: 姿态收敛阈值 (弧度)
+            damping: 阻尼系数 λ (mm)
+            rot_weight: 姿态误差权重 (mm/rad), 使姿态与位置误差量纲一致
+            max_step: 单次迭代最大关节步长 (度)
+
+        Returns:
+            (joints, residual, converged, iterations)
+            joints (N, 6) 关节角 (度); residual (N, 2) 位置误差 (mm) 与姿态误差 (度);
+            converged (N,) 是否收敛; iterations (N,) 迭代次数
+        """
+        targets = np.asarray(targets, dtype=float)
+        T = targets if targets.shape[-2:] == (4, 4) else poses_to_matrices(targets)
+        T = T.reshape(-1, 4, 4)
+        count = len(T)
+        tool = _tool_matrix(tool)
+        limits = np.asarray(self.joint_limits, dtype=float)
+        q = np.clip(np.broadcast_to(np.asarray(seeds, dtype=float), (count, 6)), limits[:, 0], limits[:, 1])
+        converged = np.zeros(count, dtype=bool)
+        iterations = np.zeros(count, dtype=int)
+        residual = np.empty((count, 2))
+        weight = np.array([1.0, 1.0, 1.0, rot_weight, rot_weight, rot_weight])
+        active = np.arange(count)
+        for it in range(max_iter + 1):
+            J, end = self._jacobian_end(q[active], tool)
+            err = np.empty((len(active), 6))
+            err[:, :3] = T[active, :3, 3] - end[:, :3, 3]
+            err[:, 3:] = rotation_log(T[active, :3, :3] @ end[:, :3, :3].transpose(0, 2, 1))
+            residual[active, 0] = np.linalg.norm(err[:, :3], axis=1)
+            residual[active, 1] = np.degrees(np.linalg.norm(err[:, 3:], axis=1))
+            done = (np.abs(err[:, :3]) < pos_tol).all(axis=1) & (np.abs(err[:, 3:]) < rot_tol).all(axis=1)
+            converged[active[done]] = True
+            keep = ~done
+            active = active[keep]
+            if len(active) == 0 or it == max_iter:
+                break
+            Jw = J[keep] * weight[:, None]
+            e = err[keep] * weight
+            A = Jw @ Jw.transpose(0, 2, 1) + (damping * damping) * np.eye(6)
+            step = np.degrees((Jw.transpose(0, 2, 1) @ np.linalg.solve(A, e[..., None]))[..., 0])
+            scale = np.minimum(1.0, max_step / np.maximum(np.abs(step).max(axis=1), 1e-12))
+            q[active] = np.clip(q[active] + step * scale[:, None], limits[:, 0], limits[:, 1])
+            iterations[active] += 1
+        return q, residual, converged, iterations
+
+    def inverse_path(self, poses, seed, tool=None, stride=16, **options):
+        """
+        笛卡尔折线 (如 interpolate_line/interpolate_arc 的结果) 整条路径数值逆解
+
+        先沿路径每隔 stride 个点逐点求解, 每点以前两个解线性外推为初值 (热启动), 解沿路径连续, 不在分支间跳变;
+        其余点以相邻两个已解点的关节角按下标线性插值为初值, 一次批量求解, 路径点足够密时一两次迭代即收敛。
+        参数见 inverse_dls_batch。
+
+        Args:
+            poses: (N, 6) TCP 位姿或 (N, 4, 4) 矩阵, 按路径顺序
+            seed: 起点的初值关节角 (度), 一般为当前关节位置
+            stride: 逐点求解的间隔, 1 为全部逐点求解
+
+        Returns:
+            (joints, residual, converged, iterations), 形状与 inverse_dls_batch 相同
+        """
+        poses = np.asarray(poses, dtype=float)
+        T = poses if poses.shape[-2:] == (4, 4) else poses_to_matrices(poses)
+        T = T.reshape(-1, 4, 4)
+        count = len(T)
+        tool = _tool_matrix(tool)
+        joints = np.empty((count, 6))
+        residual = np.empty((count, 2))
+        converged = np.zeros(count, dtype=bool)
+        iterations = np.zeros(count, dtype=int)
+
+        keys = np.unique(np.append(np.arange(0, count, max(1, int(stride))), count - 1))
+        previous = np.asarray(seed, dtype=float)
+        guess = previous
+        for n, i in enumerate(keys):
+            q, r, ok, it = self.inverse_dls_batch(T[i:i + 1], guess, tool, **options)
+            joints[i], residual[i], converged[i], iterations[i] = q[0], r[0], ok[0], it[0]
+            guess = 2.0 * q[0] - previous if n > 0 else q[0]
+            previous = q[0]
+
+        rest = np.setdiff1d(np.arange(count), keys)
+        if len(rest):
+            seeds = np.column_stack([np.interp(rest, keys, joints[keys, j]) for j in range(6)])
+            q, r, ok, it = self.inverse_dls_batch(T[rest], seeds, tool, **options)
+            joints[rest], residual[rest], converged[rest], iterations[rest] = q, r, ok, it
+        return joints, residual, converged, iterations
+
+
+def select_nearest(joints, valid, seeds):
+    """
+    按初值批量选取逆解分支
+
+    关节限位在 ±180° 以内, 关节不能绕过 ±180° 运动, 差值按实际转角计算, 不按 360° 取最短。
+
+    Args:
+        joints: (N, B, 6) 各分支关节角 (度), 即 inverse_batch 的结果
+        valid: (N, B) 分支是否有效
+        seeds: (N, 6) 或 (6,) 初值关节角 (度), 如轨迹上一点的解
+
+    Returns:
+        (q, found) q 为 (N, 6) 关节最大差值最小的分支, 无解的行为 NaN; found 为 (N,) 布尔数组
+    """
+    seeds = np.asarray(seeds, dtype=float)
+    dist = np.abs(np.nan_to_num(joints) - seeds[..., None, :]).max(axis=-1)
+    dist[~valid] = np.inf
+    best = np.argmin(dist, axis=1)
+    rows = np.arange(len(joints))
+    return joints[rows, best], valid[rows, best]
+
+
+# inverse_batch 的 8 组分支: 肩部 (腕心水平距离取正/负)、肘部 (j3 两个解)、手腕 (θ5 正/负)
+_SHOULDER = np.repeat([1.0, -1.0], 4)
+_ELBOW = np.tile(np.repeat([False, True], 2), 2)
+_WRIST = np.tile([1.0, -1.0], 4)
+
+
+class LocalKinematics:
+    """
+    带缓存与控制器校验的本地运动学求解
+
+    Args:
+        model: ArmKinematics 实例, 默认 FR3 参数
+        cache_size: LRU 缓存条目数
+        quantum: 缓存键量化步长, 关节 (度) 与位姿 (mm/度) 共用
+        seed_quantum: 逆解缓存中初值关节的量化步长 (度), 同一区间内的初值收敛到同一构型
+        validate_count: 每个 (工具号, 工件号) 组合与控制器比对的次数
+        pos_tol: 正解位置一致阈值 (mm)
+        rot_tol: 正解姿态一致阈值 (度)
+        joint_tol: 逆解关节一致阈值 (度)
+    """
+
+    def __init__(self, model=None, cache_size=4096, quantum=1e-4, seed_quantum=10.0, validate_count=3,
+                 pos_tol=0.1, rot_tol=0.05, joint_tol=0.05):
+        self.model = model if model is not None else ArmKinematics()
+        self.cache_size = int(cache_size)
+        self.quantum = float(quantum)
+        self.seed_quantum = float(seed_quantum)
+        self.validate_count = int(validate_count)
+        self.pos_tol = pos_tol
+        self.rot_tol = rot_tol
+        self.joint_tol = joint_tol
+
+        self._fk_cache = OrderedDict()
+        self._ik_cache = OrderedDict()
+        self._validated = {}    # ('fk'/'ik', tool, user) -> 已通过比对的次数, -1 表示不一致
+        self._lock = threading.Lock()
+        self.stats = {'local': 0, 'cache_hits': 0, 'remote': 0, 'mismatches': 0}
+
+    def _key(self, values, quantum=None):
+        q = quantum or self.quantum
+        return tuple(int(round(v / q)) for v in values)
+
+    def _cache_get(self, cache, key):
+        with self._lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+                self.stats['cache_hits'] += 1
+            return value
+
+    def _cache_put(self, cache, key, value):
+        with self._lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+
+    def _state(self, frame):
+        with self._lock:
+            return self._validated.get(frame, 0)
+
+    def _mark(self, frame, agree):
+        with self._lock:
+            if self._validated.get(frame, 0) < 0:
+                return
+            if agree:
+                self._validated[frame] = self._validated.get(frame, 0) + 1
+            else:
+                self._validated[frame] = -1
+                self.stats['mismatches'] += 1
+
+    def _remote(self, remote, *args):
+        self.stats['remote'] += 1
+        return remote(*args)
+
+    def forward_kin(self, joint_pos, remote, frame=(0, 0)):
+        """
+        正解, 返回值格式与控制器 GetForwardKin 一致: [错误码, x, y, z, rx, ry, rz]
+
+        Args:
+            joint_pos: 关节角 (度)
+            remote: 控制器正解调用, 如 self.robot.GetForwardKin
+            frame: (工具号, 工件号)
+        """
+        state = self._state(('fk',) + tuple(frame))
+        if state < 0:
+            return self._remote(remote, joint_pos)
+
+        key = self._key(joint_pos)
+        pose = self._cache_get(self._fk_cache, key)
+        if pose is None:
+            pose = self.model.forward_pose(joint_pos)
+            self._cache_put(self._fk_cache, key, pose)
+        if state >= self.validate_count:
+            self.stats['local'] += 1
+            return [0] + pose
+
+        ret = self._remote(remote, joint_pos)
+        if ret[0] == 0:
+            remote_pose = list(ret[1:7])
+            agree = (max(abs(a - b) for a, b in zip(pose[:3], remote_pose[:3])) <= self.pos_tol
+                     and rotation_angle(rpy_to_matrix(*pose[3:]), rpy_to_matrix(*remote_pose[3:])) <= self.rot_tol)
+            self._mark(('fk',) + tuple(frame), agree)
+        return ret
+
+    def inverse_kin(self, desc_pos, seed, remote, frame=(0, 0)):
+        """
+        逆解 (取最接近 seed 的构型), 返回值格式与控制器 GetInverseKin 一致: [错误码, j1, ..., j6]
+
+        Args:
+            desc_pos: 目标位姿 [x, y, z, rx, ry, rz]
+            seed: 初值关节角, 一般为当前关节位置
+            remote: 控制器逆解调用, 参数为位姿, 如 lambda p: self.robot.GetInverseKin(0, p, -1)
+            frame: (工具号, 工件号)
+        """
+        state = self._state(('ik',) + tuple(frame))
+        if state < 0:
+            return self._remote(remote, desc_pos)
+
+        key = self._key(desc_pos) + self._key(seed, self.seed_quantum)
+        joints = self._cache_get(self._ik_cache, key)
+        if joints is None:
+            joints = self.model.inverse(desc_pos, seed)
+            if joints is None:
+                # 本地未收敛或超出限位, 由控制器求解
+                return self._remote(remote, desc_pos)
+            self._cache_put(self._ik_cache, key, joints)
+        if state >= self.validate_count:
+            self.stats['local'] += 1
+            return [0] + joints
+
+        ret = self._remote(remote, desc_pos)
+        if ret[0] == 0:
+            self._mark(('ik',) + tuple(frame), joint_distance(joints, ret[1:7]) <= self.joint_tol)
+        return ret
+
+    def clear(self):
+        """清空缓存与校验状态 (修改工具/工件坐标系后调用)"""
+        with self._lock:
+            self._fk_cache.clear()
+            self._ik_cache.clear()
+            self._validated.clear()
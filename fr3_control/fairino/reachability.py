@@ -0,0 +1,267 @@
+"""
+可达性/可操作度体素地图 (依赖 numpy)
+
+对每个 (DH 参数, 关节限位, 工具坐标系) 组合预先计算一次 TCP 可达体素网格, 保存为 .npy 文件,
+之后以内存映射方式打开, 查询"某点是否可达"只需一次下标换算与数组读取, 不做逆解。
+
+构建:
+    j1 只使机械臂整体绕基坐标系 z 轴转动, 可达性与可操作度关于 z 轴旋转对称 (除 j1 限位之外的角度缺口)。
+    因此只在 j2~j6 上随机采样 (j1 = 0), 批量正解与雅可比得到 TCP 的 (r, z, 方位角) 与可操作度,
+    按 (r, z) 单元累计: 最大可操作度、出现过的方位角 (1° 一格)。某方位角可达, 当且仅当单元内有采样点的
+    方位角经 j1 限位内的转动能到达该方位。5 维采样投影到 2 维, 百万级采样即可填满毫米级网格。
+    最后把 (r, z, 方位角) 表展开为笛卡尔体素网格。
+
+体素值 (uint8): 0-不可达, 1~255-可达, 值越大可操作度越高 (1 + 254·w/w_max)。
+可操作度 w 为平移雅可比的 sqrt(det(Jv·Jvᵀ)) (mm³/rad³), 越接近 0 越靠近奇异位置。
+
+文件按参数哈希命名 (reach_<key>.npy 与 reach_<key>.json), 参数不变时直接复用。网格位于机械臂基坐标系,
+双臂各自的安装位姿由 base 参数给出, 查询时先变换到基坐标系。
+"""
+
+import hashlib
+import json
+import math
+import os
+
+import numpy as np
+
+from .kinematics import ArmKinematics, _tool_matrix, pose_to_matrix
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'fr3_reachability')
+
+_VERSION = 1
+_AZIMUTH_BINS = 360
+_SAMPLE_CHUNK = 65536
+
+
+def map_key(model, tool=None, resolution=10.0, samples=2000000, seed=0):
+    """地图参数的哈希键 (DH 参数、关节限位、工具坐标系、分辨率、采样数)"""
+    tool = _tool_matrix(tool)
+    content = {
+        'version': _VERSION,
+        'dh': {k: [round(float(v), 9) for v in model.dh_params[k]] for k in sorted(model.dh_params)},
+        'limits': [[round(float(v), 9) for v in limit] for limit in model.joint_limits],
+        'tool': None if tool is None else np.round(tool, 9).tolist(),
+        'resolution': float(resolution),
+        'samples': int(samples),
+        'seed': int(seed),
+    }
+    return hashlib.sha1(json.dumps(content, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def _sample_workspace(model, tool, samples, seed):
+    """j2~j6 随机采样 (j1 = 0), 返回 TCP 的 r, z, 方位角 (度) 与可操作度"""
+    rng = np.random.default_rng(seed)
+    limits = np.asarray(model.joint_limits, dtype=float)
+    r = np.empty(samples)
+    z = np.empty(samples)
+    azimuth = np.empty(samples)
+    w = np.empty(samples)
+    for start in range(0, samples, _SAMPLE_CHUNK):
+        end = min(start + _SAMPLE_CHUNK, samples)
+        q = rng.uniform(limits[:, 0], limits[:, 1], size=(end - start, 6))
+        q[:, 0] = 0.0
+        J, tcp = model._jacobian_end(q, tool)
+        p = tcp[:, :3, 3]
+        r[start:end] = np.hypot(p[:, 0], p[:, 1])
+        z[start:end] = p[:, 2]
+        azimuth[start:end] = np.degrees(np.arctan2(p[:, 1], p[:, 0]))
+        Jv = J[:, :3, :]
+        w[start:end] = np.sqrt(np.maximum(np.linalg.det(Jv @ Jv.transpose(0, 2, 1)), 0.0))
+    return r, z, azimuth, w
+
+
+def _azimuth_coverage(present, lo, hi):
+    """
+    present[..., b] 为方位角 b° 处有采样点, 返回 covered[..., a]: 存在 b 使 a - b 落在 j1 限位 [lo, hi] 内
+    (环形窗口求和, 累加和一次完成)
+    """
+    width = int(math.floor(hi)) - int(math.ceil(lo)) + 1
+    if width >= _AZIMUTH_BINS:
+        return np.repeat(present.any(axis=-1, keepdims=True), _AZIMUTH_BINS, axis=-1)
+    doubled = np.concatenate((present, present), axis=-1).astype(np.int32)
+    cs = np.zeros(doubled.shape[:-1] + (doubled.shape[-1] + 1,), dtype=np.int32)
+    np.cumsum(doubled, axis=-1, out=cs[..., 1:])
+    start = (np.arange(_AZIMUTH_BINS) - int(math.floor(hi))) % _AZIMUTH_BINS
+    return (cs[..., start + width] - cs[..., start]) > 0
+
+
+def build_reachability_map(model=None, tool=None, resolution=10.0, samples=2000000, seed=0, path=None):
+    """
+    构建可达性体素地图
+
+    Args:
+        model: ArmKinematics 实例, 默认 FR3 参数
+        tool: 工具坐标系 (法兰 -> TCP), [x, y, z, rx, ry, rz] 或 4x4 矩阵, 默认法兰
+        resolution: 体素边长 (mm)
+        samples: j2~j6 采样数
+        seed: 随机种子
+        path: 保存路径 (.npy), 元数据保存在同名 .json, 默认不保存
+
+    Returns:
+        ReachabilityMap
+    """
+    model = model if model is not None else ArmKinematics()
+    tool_T = _tool_matrix(tool)
+    res = float(resolution)
+    r, z, azimuth, w = _sample_workspace(model, tool_T, int(samples), seed)
+
+    # (r, z) 单元: 最大可操作度与出现过的方位角
+    r_max = r.max() + res
+    z_min, z_max = z.min() - res, z.max() + res
+    nr = int(math.ceil(r_max / res)) + 1
+    nz = int(math.ceil((z_max - z_min) / res)) + 1
+    ir = np.minimum((r / res).astype(np.int64), nr - 1)
+    iz = np.minimum(((z - z_min) / res).astype(np.int64), nz - 1)
+    cell = ir * nz + iz
+    best = np.zeros(nr * nz)
+    np.maximum.at(best, cell, w)
+    present = np.zeros((nr * nz, _AZIMUTH_BINS), dtype=bool)
+    present[cell, np.floor(azimuth).astype(np.int64) % _AZIMUTH_BINS] = True
+    lo, hi = model.joint_limits[0]
+    covered = _azimuth_coverage(present, lo, hi)
+
+    w_max = float(best.max()) if best.max() > 0 else 1.0
+    level = np.where(best > 0, 1 + np.round(254.0 * best / w_max), 1).astype(np.uint8)
+    table = np.where(covered, level[:, None], 0).astype(np.uint8).reshape(nr, nz, _AZIMUTH_BINS)
+
+    # 展开为笛卡尔体素网格, 体素中心按 (r, z, 方位角) 查表
+    n_xy = 2 * int(math.ceil(r_max / res))
+    origin = np.array([-n_xy * res / 2.0, -n_xy * res / 2.0, z_min])
+    shape = (n_xy, n_xy, nz)
+    centres = origin[:2, None] + (np.arange(n_xy) + 0.5) * res
+    X, Y = np.meshgrid(centres[0], centres[1], indexing='ij')
+    rr = np.minimum((np.hypot(X, Y) / res).astype(np.int64), nr - 1)
+    aa = np.floor(np.degrees(np.arctan2(Y, X))).astype(np.int64) % _AZIMUTH_BINS
+    outside = np.hypot(X, Y) >= r_max
+    if path is not None:
+        grid = np.lib.format.open_memmap(path + '.tmp', mode='w+', dtype=np.uint8, shape=shape)
+    else:
+        grid = np.empty(shape, dtype=np.uint8)
+    for k in range(nz):
+        slab = table[rr, k, aa]
+        slab[outside] = 0
+        grid[:, :, k] = slab
+
+    meta = {
+        'version': _VERSION,
+        'origin': origin.tolist(),
+        'resolution': res,
+        'shape': list(shape),
+        'manipulability_max': w_max,
+        'samples': int(samples),
+        'reachable_voxels': int(np.count_nonzero(grid)),
+        'tool': None if tool_T is None else tool_T.tolist(),
+    }
+    if path is not None:
+        grid.flush()
+        del grid
+        meta_path = os.path.splitext(path)[0] + '.json'
+        with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(path + '.tmp', path)
+        os.replace(meta_path + '.tmp', meta_path)
+        grid = np.load(path, mmap_mode='r')
+    return ReachabilityMap(grid, meta)
+
+
+def load_reachability_map(model=None, tool=None, resolution=10.0, samples=2000000, seed=0, base=None,
+                          cache_dir=DEFAULT_CACHE_DIR, rebuild=False):
+    """
+    打开缓存的可达性地图, 不存在 (或 rebuild) 时构建并保存
+
+    Args:
+        model/tool/resolution/samples/seed: 见 build_reachability_map, 共同决定缓存键
+        base: 机械臂基坐标系在世界坐标系中的位姿 ([x, y, z, rx, ry, rz] 或 4x4), 查询点为世界坐标时指定
+        cache_dir: 缓存目录
+        rebuild: 忽略已有缓存重新构建
+
+    Returns:
+        ReachabilityMap, 网格以只读内存映射打开
+    """
+    model = model if model is not None else ArmKinematics()
+    key = map_key(model, tool, resolution, samples, seed)
+    path = os.path.join(cache_dir, f'reach_{key}.npy')
+    meta_path = os.path.join(cache_dir, f'reach_{key}.json')
+    if not rebuild and os.path.exists(path) and os.path.exists(meta_path):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        reach_map = ReachabilityMap(np.load(path, mmap_mode='r'), meta)
+    else:
+        os.makedirs(cache_dir, exist_ok=True)
+        reach_map = build_reachability_map(model, tool, resolution, samples, seed, path)
+    reach_map.key = key
+    if base is not None:
+        reach_map.set_base(base)
+    return reach_map
+
+
+class ReachabilityMap:
+    """
+    可达性体素地图 (基坐标系)
+
+    Args:
+        grid: (nx, ny, nz) uint8 体素网格, 0-不可达, 1~255-可操作度等级
+        meta: 元数据字典, 键 origin (网格角点, mm)、resolution (mm)、manipulability_max
+    """
+
+    def __init__(self, grid, meta):
+        self.grid = grid
+        self.meta = meta
+        self.key = None
+        self.origin = np.asarray(meta['origin'], dtype=float)
+        self.resolution = float(meta['resolution'])
+        self.shape = np.asarray(grid.shape)
+        self._base_inv = None
+
+    def set_base(self, base):
+        """设置机械臂基坐标系在世界坐标系中的位姿, 此后查询点按世界坐标解释; None 取消"""
+        if base is None:
+            self._base_inv = None
+            return
+        base = np.asarray(base, dtype=float)
+        T = base if base.shape == (4, 4) else pose_to_matrix(base)
+        self._base_inv = np.linalg.inv(T)
+
+    def _index(self, points):
+        p = np.asarray(points, dtype=float)
+        if self._base_inv is not None:
+            p = p @ self._base_inv[:3, :3].T + self._base_inv[:3, 3]
+        idx = np.floor((p - self.origin) / self.resolution).astype(np.int64)
+        inside = ((idx >= 0) & (idx < self.shape)).all(axis=-1)
+        return np.where(inside[..., None], idx, 0), inside
+
+    def level(self, points):
+        """(..., 3) 点 (mm) 的体素值 (uint8), 网格外为 0"""
+        idx, inside = self._index(points)
+        values = np.asarray(self.grid[idx[..., 0], idx[..., 1], idx[..., 2]])
+        return np.where(inside, values, 0).astype(np.uint8)
+
+    def reachable(self, points):
+        """(..., 3) 点是否可达 (布尔数组)"""
+        return self.level(points) > 0
+
+    def manipulability(self, points):
+        """(..., 3) 点所在体素的最大可操作度 (mm³/rad³, 按 254 级量化), 不可达为 0"""
+        values = self.level(points).astype(float)
+        return np.where(values > 0, (values - 1.0) / 254.0 * self.meta['manipulability_max'], 0.0)
+
+    def is_reachable(self, x, y, z):
+        """单点查询 (纯标量运算, 不构造数组)"""
+        if self._base_inv is not None:
+            T = self._base_inv
+            x, y, z = (T[0, 0] * x + T[0, 1] * y + T[0, 2] * z + T[0, 3],
+                       T[1, 0] * x + T[1, 1] * y + T[1, 2] * z + T[1, 3],
+                       T[2, 0] * x + T[2, 1] * y + T[2, 2] * z + T[2, 3])
+        res = self.resolution
+        i = math.floor((x - self.origin[0]) / res)
+        j = math.floor((y - self.origin[1]) / res)
+        k = math.floor((z - self.origin[2]) / res)
+        nx, ny, nz = self.grid.shape
+        if not (0 <= i < nx and 0 <= j < ny and 0 <= k < nz):
+            return False
+        return bool(self.grid[i, j, k])
+
+    def volume(self):
+        """可达体积 (立方米)"""
+        return self.meta['reachable_voxels'] * (self.resolution / 1000.0) ** 3
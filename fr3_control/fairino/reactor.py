@@ -0,0 +1,349 @@
+"""
+多机器人 20004 状态流单线程 I/O 复用
+
+每个 Robot.RPC 默认启动一个接收线程, 对各自的套接字阻塞 recv_into; 监控数十台机器人时线程数随机器人数
+与消费者数线性增长。StateReactor 用一个 selectors (Linux 下为 epoll) 线程复用全部机器人的 20004 连接,
+套接字可读时接收一次并解码全部完整帧, 按机器人发布状态快照。
+
+两种接入方式:
+    reactor.add(ip)      由 reactor 建立连接 (非阻塞 connect) 并在断开后按指数退避重连,
+                         stream.robot_state 为最新快照, 可选回调 callback(stream, state)
+    Robot.RPC(ip, reactor=reactor)
+                         RPC 不再启动接收线程, 其套接字注册到 reactor, 帧进入 RPC.on_state_frame
+                         (快照、历史、录制、事件订阅不变), 断开后由 RPC 的连接监督线程重连
+
+每路状态流统计帧率、校验失败、缓冲区溢出丢弃字节与帧计数不连续推算的丢帧数。
+"""
+
+import errno
+import random
+import selectors
+import socket
+import threading
+import time
+
+from .state_decoder import StateFrameDecoder
+
+STATE_PORT = 20004
+
+
+class StateStream:
+    """reactor 中的一路状态流"""
+
+    def __init__(self, name, decoder, on_frame, on_lost=None, address=None, snapshot_builder=None, callback=None):
+        self.name = name
+        self.decoder = decoder
+        self.address = address              # reactor 管理连接时的 (ip, port)
+        self.sock = None
+        self.connecting = False
+        self.connected = False
+        self.robot_state = snapshot_builder.empty if snapshot_builder is not None else None
+        self.callback = callback
+        self._on_frame = on_frame
+        self._on_lost = on_lost
+        self._snapshot_builder = snapshot_builder
+
+        self.frames = 0                     # 有效帧数
+        self.dropped = 0                    # 帧计数不连续推算的丢帧数
+        self.disconnects = 0
+        self.failures = 0                   # 当前连续连接失败次数
+        self.fps = 0.0
+        self.last_frame_time = None         # perf_counter
+        self.retry_at = 0.0
+        self._last_cnt = None
+        self._cnt_mod = 128                 # 帧计数回绕周期, 观察到 >=128 的计数后改为 256
+        self._fps_frames = 0
+        self._fps_time = time.perf_counter()
+
+    def _frame(self, pkg, frame):
+        cnt = frame[2]
+        if cnt >= 128:
+            self._cnt_mod = 256
+        if self._last_cnt is not None:
+            self.dropped += (cnt - self._last_cnt - 1) % self._cnt_mod
+        self._last_cnt = cnt
+        self.frames += 1
+        self.last_frame_time = time.perf_counter()
+        self._on_frame(self, pkg, frame)
+
+    def _publish(self, stream, pkg, frame):
+        """reactor 管理的状态流: 构建快照并回调"""
+        state = self._snapshot_builder.build(pkg, self.decoder.frame_count, time.time())
+        self.robot_state = state
+        if self.callback is not None:
+            self.callback(self, state)
+
+    def _update_fps(self, now):
+        elapsed = now - self._fps_time
+        if elapsed >= 1.0:
+            self.fps = (self.frames - self._fps_frames) / elapsed
+            self._fps_frames = self.frames
+            self._fps_time = now
+
+    def stats(self):
+        decoder = self.decoder
+        return {
+            'connected': self.connected,
+            'frames': self.frames,
+            'fps': self.fps,
+            'dropped_frames': self.dropped,
+            'checksum_errors': decoder.checksum_errors,
+            'bytes_received': decoder.bytes_received,
+            'bytes_dropped': decoder.bytes_dropped,
+            'disconnects': self.disconnects,
+            'age_ms': (time.perf_counter() - self.last_frame_time) * 1e3 if self.last_frame_time else None,
+        }
+
+
+class StateReactor:
+    """
+    单线程多路状态流接收
+
+    Args:
+        pkg_type: 状态包类型, 默认 Robot.RobotStatePkg
+        buffer_size: 每路状态流的接收缓冲区大小 (字节)
+        initial_backoff/max_backoff: reactor 管理连接的重连退避 (s)
+        connect_timeout: 非阻塞连接超时 (s)
+    """
+
+    def __init__(self, pkg_type=None, buffer_size=64 * 1024, initial_backoff=0.2, max_backoff=10.0,
+                 connect_timeout=1.0):
+        from .Robot import RobotStatePkg, state_snapshot_builder
+        self.pkg_type = pkg_type or RobotStatePkg
+        self.snapshot_builder = state_snapshot_builder
+        self.buffer_size = buffer_size
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.connect_timeout = connect_timeout
+        self.streams = {}
+
+        self._selector = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+        self._pending = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._next_stats = 0.0
+        self.loops = 0
+
+    # ------------------------------------------------------------------ 线程
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="StateReactor", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        for stream in list(self.streams.values()):
+            if stream.address is not None:
+                self._close(stream)
+        self._selector.close()
+        self._wake_r.close()
+        self._wake_w.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b"\0")
+        except OSError:
+            pass
+
+    def _call(self, func, *args):
+        """在 reactor 线程中执行 (selector 不是线程安全的)"""
+        with self._lock:
+            self._pending.append((func, args))
+        self._wake()
+
+    # ------------------------------------------------------------------ 接入
+    def add(self, ip, port=STATE_PORT, callback=None, name=None):
+        """
+        由 reactor 建立并维护到 ip 的 20004 连接
+
+        Args:
+            callback: 可选, 每帧在 reactor 线程中调用 callback(stream, state), 应尽快返回
+        Returns:
+            StateStream, robot_state 为最新快照
+        """
+        name = name or ip
+        decoder = StateFrameDecoder(self.pkg_type, self.buffer_size)
+        stream = StateStream(name, decoder, None, address=(ip, port), snapshot_builder=self.snapshot_builder,
+                             callback=callback)
+        stream._on_frame = stream._publish
+        self.streams[name] = stream
+        self._call(self._connect, stream)
+        return stream
+
+    def attach(self, rpc):
+        """
+        将 Robot.RPC 已连接的 20004 套接字注册到 reactor, 帧进入 rpc.on_state_frame,
+        断开时调用 rpc.on_state_lost(ex) 并由 RPC 的监督线程重连后再次 attach
+        """
+        name = rpc.ip_address
+        stream = self.streams.get(name)
+        if stream is None or stream.address is not None:
+            if rpc.state_decoder is None:
+                rpc.state_decoder = StateFrameDecoder(self.pkg_type, self.buffer_size)
+            stream = StateStream(name, rpc.state_decoder, lambda s, pkg, frame: rpc.on_state_frame(pkg, frame),
+                                 on_lost=rpc.on_state_lost)
+            self.streams[name] = stream
+        self._call(self._register, stream, rpc.sock_cli_state)
+        return stream
+
+    def remove(self, stream):
+        self.streams.pop(stream.name, None)
+        self._call(self._close, stream)
+
+    def detach(self, rpc):
+        """移除 attach 的 Robot.RPC (CloseRPC 时调用)"""
+        stream = self.streams.get(rpc.ip_address)
+        if stream is not None and stream.address is None:
+            self.remove(stream)
+
+    def stats(self):
+        """各路状态流统计"""
+        return {name: stream.stats() for name, stream in list(self.streams.items())}
+
+    # ------------------------------------------------------------------ reactor 线程内
+    def _register(self, stream, sock):
+        if stream.sock is not None:
+            self._unregister(stream)
+        sock.setblocking(False)
+        stream.sock = sock
+        stream.connected = True
+        stream.connecting = False
+        stream.decoder.reset()
+        stream._last_cnt = None
+        self._selector.register(sock, selectors.EVENT_READ, stream)
+
+    def _unregister(self, stream):
+        if stream.sock is not None:
+            try:
+                self._selector.unregister(stream.sock)
+            except (KeyError, ValueError):
+                pass
+
+    def _close(self, stream):
+        self._unregister(stream)
+        if stream.sock is not None:
+            stream.sock.close()
+        stream.sock = None
+        stream.connected = False
+        stream.connecting = False
+
+    def _connect(self, stream):
+        """非阻塞连接, 可写时完成"""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        err = sock.connect_ex(stream.address)
+        if err not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+            sock.close()
+            self._schedule_retry(stream, OSError(err, "connect"))
+            return
+        stream.sock = sock
+        stream.connecting = True
+        stream.retry_at = time.perf_counter() + self.connect_timeout
+        self._selector.register(sock, selectors.EVENT_WRITE, stream)
+
+    def _finish_connect(self, stream):
+        sock = stream.sock
+        err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        self._selector.unregister(sock)
+        if err != 0:
+            sock.close()
+            stream.sock = None
+            self._schedule_retry(stream, OSError(err, "connect"))
+            return
+        stream.failures = 0
+        stream.sock = None
+        self._register(stream, sock)
+
+    def _schedule_retry(self, stream, ex):
+        stream.connecting = False
+        stream.connected = False
+        base = min(self.max_backoff, self.initial_backoff * (2 ** min(stream.failures, 30)))
+        stream.failures += 1
+        stream.retry_at = time.perf_counter() + base * random.uniform(0.8, 1.2)
+
+    def _lost(self, stream, ex):
+        self._close(stream)
+        stream.disconnects += 1
+        stream.decoder.reset()
+        if stream.address is not None:
+            self._schedule_retry(stream, ex)
+        elif stream._on_lost is not None:
+            stream._on_lost(ex)
+
+    def _read(self, stream):
+        try:
+            n = stream.decoder.recv_from(stream.sock)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as ex:
+            self._lost(stream, ex)
+            return
+        if n <= 0:
+            self._lost(stream, ConnectionError("接收机器人状态字节 -1"))
+            return
+        try:
+            stream.decoder.decode(stream._frame)
+        except Exception as ex:
+            # 消费者回调异常不影响其他机器人
+            print("状态帧处理失败", stream.name, ex)
+
+    def _run(self):
+        selector = self._selector
+        while not self._stop.is_set():
+            with self._lock:
+                pending, self._pending = self._pending, []
+            for func, args in pending:
+                func(*args)
+
+            now = time.perf_counter()
+            timeout = 0.5
+            for stream in list(self.streams.values()):
+                if stream.address is None or stream.connected:
+                    continue
+                if stream.connecting:
+                    if now >= stream.retry_at:
+                        # 连接超时
+                        self._unregister(stream)
+                        stream.sock.close()
+                        stream.sock = None
+                        self._schedule_retry(stream, TimeoutError("connect"))
+                    continue
+                if now >= stream.retry_at:
+                    self._connect(stream)
+                else:
+                    timeout = min(timeout, stream.retry_at - now)
+
+            for key, mask in selector.select(max(timeout, 0.0)):
+                stream = key.data
+                if stream is None:
+                    try:
+                        self._wake_r.recv(4096)
+                    except OSError:
+                        pass
+                elif stream.connecting:
+                    self._finish_connect(stream)
+                elif stream.sock is not None:
+                    self._read(stream)
+
+            now = time.perf_counter()
+            if now >= self._next_stats:
+                for stream in list(self.streams.values()):
+                    stream._update_fps(now)
+                self._next_stats = now + 1.0
+            self.loops += 1
@@ -0,0 +1,229 @@
+"""
+ServoJ/ServoCart 伺服指令流
+
+独立线程按绝对截止时间 t0 + k*cmdT 发送伺服点, 单次发送超时不会累积到后续周期 (漂移补偿);
+错过一个或多个周期时跳到下一个截止时间并计数。伺服点来自队列 (put) 或生成器/可迭代对象,
+发送使用连接池中独占租用的连接, 参数在入队时一次性转换, 不经过 log_call/参数转换等接口封装。
+
+伺服点供应不足 (队列为空) 时保持上一个伺服点: 关节模式与笛卡尔绝对模式重发上一个目标,
+笛卡尔增量模式发送零增量, 机器人原地保持而不会继续运动。
+
+状态帧陈旧 (rpc.state_stale()) 或安全停止时立即停止发送; 发送失败 (连接断开或 Fault) 时停止, stop_reason 记录原因。
+
+每个周期记录发送耗时 (RPC 往返) 与抖动 (实际发送时刻 - 截止时间), 统计结果由 stats() 返回。
+"""
+
+import http.client
+import queue
+import threading
+import time
+import xmlrpc.client
+
+from .instrumentation import MethodStats
+
+# 笛卡尔伺服模式
+CART_ABSOLUTE = 0
+CART_INCREMENT_BASE = 1
+CART_INCREMENT_TOOL = 2
+
+_ZERO_AXIS = [0.0, 0.0, 0.0, 0.0]
+_ZERO_POSE = [0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
+
+
+class ServoStream:
+    """
+    伺服指令流
+
+    Args:
+        rpc: Robot.RPC 实例
+        mode: 'joint'-ServoJ, 'cart'-ServoCart
+        cmdT: 指令周期 (s)
+        cart_mode: 笛卡尔模式, 0-绝对, 1-基坐标系增量, 2-工具坐标系增量
+        queue_size: 伺服点队列长度, 队列满时 put 阻塞
+        pos_gain/acc/vel/filterT/gain: 与 ServoJ/ServoCart 同名参数相同
+        stop_on_error: 控制器返回非 0 错误码时停止
+        spin: 截止时间前忙等的时长 (s), 减小 sleep 唤醒误差带来的抖动
+    """
+
+    def __init__(self, rpc, mode='joint', cmdT=0.008, cart_mode=CART_ABSOLUTE, queue_size=64,
+                 pos_gain=(1.0, 1.0, 1.0, 1.0, 1.0, 1.0), acc=0.0, vel=0.0, filterT=0.0, gain=0.0,
+                 stop_on_error=True, spin=0.0005):
+        if mode not in ('joint', 'cart'):
+            raise ValueError("mode 必须为 'joint' 或 'cart'")
+        self.rpc = rpc
+        self.mode = mode
+        self.cmdT = float(cmdT)
+        self.cart_mode = int(cart_mode)
+        self.pos_gain = [float(v) for v in pos_gain]
+        self.acc = float(acc)
+        self.vel = float(vel)
+        self.filterT = float(filterT)
+        self.gain = float(gain)
+        self.stop_on_error = stop_on_error
+        self.spin = spin
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self._source = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._last = None
+
+        self.cycles = 0             # 已发送周期数
+        self.underruns = 0          # 伺服点不足, 保持上一个伺服点的周期数
+        self.missed = 0             # 错过的截止时间数
+        self.errors = 0             # 控制器返回非 0 错误码的次数
+        self.last_error = 0
+        self.stop_reason = None
+        self.latency = MethodStats('latency')
+        self.jitter = MethodStats('jitter')
+
+    def _coerce(self, setpoint):
+        """将伺服点转换为 RPC 参数"""
+        if self.mode == 'joint':
+            if len(setpoint) == 2:
+                joint_pos, axis_pos = setpoint
+            else:
+                joint_pos, axis_pos = setpoint, _ZERO_AXIS
+            return [float(v) for v in joint_pos], [float(v) for v in axis_pos]
+        return [float(v) for v in setpoint]
+
+    def _hold(self):
+        """供应不足时发送的伺服点"""
+        if self.mode == 'cart' and self.cart_mode != CART_ABSOLUTE:
+            return _ZERO_POSE
+        return self._last
+
+    def put(self, setpoint, timeout=None):
+        """加入一个伺服点: 关节模式为 joint_pos 或 (joint_pos, axis_pos), 笛卡尔模式为 desc_pos"""
+        self.queue.put(self._coerce(setpoint), timeout=timeout)
+
+    def start(self, source=None, initial=None):
+        """
+        启动发送线程
+
+        Args:
+            source: 可选的生成器/可迭代对象, 每个周期取一个伺服点, 耗尽后停止; 不指定时从队列取
+            initial: 开始时的保持点, 默认当前关节位置 (关节模式) 或当前 TCP 位姿 (笛卡尔绝对模式)
+        """
+        if self._thread is not None and self._thread.is_alive():
+            raise RuntimeError("伺服指令流已在运行")
+        state = self.rpc.robot_state
+        if initial is None:
+            initial = state.jt_cur_pos if self.mode == 'joint' else state.tl_cur_pos
+        self._last = self._coerce(initial)
+        self._source = iter(source) if source is not None else None
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ServoStream", daemon=True)
+        self._thread.start()
+
+    def stop(self, wait=True):
+        """停止发送"""
+        self._stop.set()
+        if wait and self._thread is not None and self._thread.is_alive() \
+                and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def join(self, timeout=None):
+        """等待生成器耗尽或发送停止"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _next_setpoint(self):
+        if self._source is not None:
+            try:
+                return self._coerce(next(self._source))
+            except StopIteration:
+                self.stop_reason = 'source exhausted'
+                self._stop.set()
+                return None
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            return None
+
+    def _run(self):
+        period = self.cmdT
+        spin = self.spin
+        try:
+            with self.rpc.robot.lease() as proxy:
+                if self.mode == 'joint':
+                    send = lambda p: proxy.ServoJ(p[0], p[1], self.acc, self.vel, period, self.filterT, self.gain)
+                else:
+                    send = lambda p: proxy.ServoCart(self.cart_mode, p, self.pos_gain, self.acc, self.vel, period,
+                                                     self.filterT, self.gain)
+                deadline = time.perf_counter()
+                while not self._stop.is_set():
+                    # 与 GetSafetyCode 相同的安全停止判断
+                    state = self.rpc.robot_state
+                    if state.safety_stop0_state == 1 or state.safety_stop1_state == 1:
+                        self.last_error = 99
+                        self.stop_reason = 'safety stop'
+                        break
+                    # 状态陈旧 (断线/控制器无响应) 时不再以冻结的快照继续伺服
+                    if self.rpc.state_stale():
+                        self.stop_reason = 'stale state'
+                        break
+
+                    remaining = deadline - time.perf_counter()
+                    if remaining > spin:
+                        time.sleep(remaining - spin)
+                    while time.perf_counter() < deadline:
+                        pass
+
+                    # 截止时间到达后再取伺服点, 使用等待期间入队的最新数据
+                    setpoint = self._next_setpoint()
+                    if setpoint is None:
+                        if self._stop.is_set():
+                            break
+                        self.underruns += 1
+                        setpoint = self._hold()
+                    else:
+                        self._last = setpoint
+
+                    start = time.perf_counter()
+                    try:
+                        error = send(setpoint)
+                    except xmlrpc.client.Fault as e:
+                        self.stop_reason = f'rpc error: {e}'
+                        break
+                    end = time.perf_counter()
+                    self.cycles += 1
+                    self.jitter.add(start - deadline, 0)
+                    self.latency.add(end - start, error)
+                    if error != 0:
+                        self.errors += 1
+                        self.last_error = error
+                        if self.stop_on_error:
+                            self.stop_reason = f'error {error}'
+                            break
+
+                    # 下一个截止时间取绝对时间网格, 超时则跳过错过的周期
+                    deadline += period
+                    if end > deadline:
+                        skipped = int((end - deadline) / period) + 1
+                        self.missed += skipped
+                        deadline += skipped * period
+        except (OSError, http.client.HTTPException, xmlrpc.client.ProtocolError) as e:
+            # 连接断开: lease 已丢弃该连接, 线程退出前记录原因
+            self.stop_reason = f'rpc error: {e}'
+        if self.stop_reason is None:
+            self.stop_reason = 'stopped'
+
+    def stats(self):
+        """周期统计: 发送耗时与抖动的 p50/p99/max (ms), 供应不足/错过周期/错误次数"""
+        latency = self.latency.summary()
+        jitter = self.jitter.summary()
+        return {
+            'cycles': self.cycles,
+            'underruns': self.underruns,
+            'missed_deadlines': self.missed,
+            'errors': self.errors,
+            'last_error': self.last_error,
+            'stop_reason': self.stop_reason,
+            'latency_ms': {k: latency[k] for k in ('mean_ms', 'p50_ms', 'p99_ms', 'max_ms')},
+            'jitter_ms': {k: jitter[k] for k in ('mean_ms', 'p50_ms', 'p99_ms', 'max_ms')},
+        }
@@ -5,4 +5,4 @@
 from distutils.core import setup                   #  (python3.12之前的使用)
 # from setuptools import setup                         #  (python3.12使用)
 from Cython.Build import cythonize
-setup(name='Robot', ext_modules=cythonize('Robot.py'))
+setup(name='Robot', ext_modules=cythonize(['Robot.py', 'state_decoder.py', 'state_snapshot.py', 'state_history.py', 'async_robot.py', 'transport.py', 'batch.py', 'instrumentation.py', 'kinematics.py', 'file_transfer.py', 'servo_stream.py', 'emulator.py', 'state_recorder.py', 'state_events.py', 'supervisor.py', 'reactor.py', 'shared_state.py', 'state_dtype.py', 'jog_session.py', 'trajectory_builder.py', 'reachability.py', 'collision.py']))
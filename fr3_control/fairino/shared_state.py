@@ -0,0 +1,244 @@
+"""
+实时状态共享内存发布
+
+同一台机器人的 GUI、监控、测试脚本各自连接 20004 端口, 控制器连接数随进程数增长。开启发布后,
+持有连接的进程 (Robot.RPC.EnableSharedState) 将每个校验通过的状态帧写入 multiprocessing.shared_memory,
+其他进程用 SharedStateReader 读取最新帧与最近 capacity 帧历史, 不再连接控制器。
+
+共享内存布局 (小端):
+    头部 64 字节   magic(8) + 版本 u4 + 状态包长度 u4 + 槽位长度 u4 + 槽位数 u4 + 已发布帧数 u8
+                   + 发布进程 pid u4 + 保留
+    槽位 * N       seqlock 计数 u8 + 帧序号 u8 + 接收时间戳 f8 + 状态包 (按 8 字节对齐)
+
+每个槽位由 seqlock 保护: 写入前计数置为奇数, 写完置为偶数; 读者读取前后计数相同且为偶数才接受,
+否则重读。写者只有一个 (接收线程), 读者不加锁、不阻塞写者, 快照直接从共享内存解包 (不经中间拷贝)。
+"""
+
+import os
+import struct
+import sys
+import time
+from multiprocessing import shared_memory
+
+MAGIC = b"FRSHM\x00\x00\x01"
+VERSION = 1
+_HEADER = struct.Struct('<8sIIIIQI')
+HEADER_SIZE = 64
+_WRITE_SEQ_OFFSET = 24
+_SLOT_HEAD = struct.Struct('<QQd')
+_U64 = struct.Struct('<Q')
+_MAX_RETRIES = 10000
+
+
+def shared_state_name(ip):
+    """机器人 IP 对应的默认共享内存名"""
+    return "fairino_state_" + ip.replace('.', '_')
+
+
+def _untrack(shm):
+    """读者进程退出时不应删除共享内存 (Python 3.13 之前 resource_tracker 会在进程退出时 unlink)"""
+    if sys.version_info < (3, 13):
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except Exception:
+            pass
+
+
+def _publisher_alive(shm):
+    """共享内存头部记录的发布进程是否仍在运行"""
+    if shm.size < HEADER_SIZE:
+        return False
+    magic, _, _, _, _, _, pid = _HEADER.unpack_from(shm.buf, 0)
+    if magic != MAGIC or pid == 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # 进程存在但属于其他用户
+        return True
+    return True
+
+
+class SharedStatePublisher:
+    """
+    状态帧共享内存发布者 (单写者)
+
+    Args:
+        name: 共享内存名, 通常为 shared_state_name(ip)
+        pkg_size: 状态包长度 (字节)
+        capacity: 历史槽位数
+    """
+
+    def __init__(self, name, pkg_size, capacity=256):
+        self.name = name
+        self.pkg_size = int(pkg_size)
+        self.capacity = int(capacity)
+        self.slot_size = (_SLOT_HEAD.size + self.pkg_size + 7) & ~7
+        size = HEADER_SIZE + self.slot_size * self.capacity
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Windows 上共享内存随最后一个句柄关闭而释放, 已存在说明仍有进程在使用
+            if os.name == 'nt':
+                raise
+            existing = shared_memory.SharedMemory(name=name)
+            alive = _publisher_alive(existing)
+            existing.close()
+            if alive:
+                _untrack(existing)
+                raise FileExistsError(f"共享内存 {name} 正由其他进程发布")
+            # 上次未正常关闭 (发布进程已退出) 残留的共享内存, 重新创建
+            existing.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.buf = self.shm.buf
+        self.published = 0
+        _HEADER.pack_into(self.buf, 0, MAGIC, VERSION, self.pkg_size, self.slot_size, self.capacity, 0, os.getpid())
+
+    def publish(self, frame, seq, timestamp):
+        """
+        写入一帧
+
+        Args:
+            frame: 原始状态帧 (与 RobotStatePkg 布局相同, 比状态包短时剩余字段为 0)
+            seq: 帧序号
+            timestamp: 主机接收时间戳 (s)
+        """
+        buf = self.buf
+        if buf is None:
+            return
+        n = self.published
+        offset = HEADER_SIZE + (n % self.capacity) * self.slot_size
+        data = offset + _SLOT_HEAD.size
+        size = min(len(frame), self.pkg_size)
+        _SLOT_HEAD.pack_into(buf, offset, 2 * n + 1, seq, timestamp)
+        buf[data:data + size] = frame[:size]
+        if size < self.pkg_size:
+            buf[data + size:data + self.pkg_size] = bytes(self.pkg_size - size)
+        _U64.pack_into(buf, offset, 2 * n + 2)
+        self.published = n + 1
+        _U64.pack_into(buf, _WRITE_SEQ_OFFSET, n + 1)
+
+    def close(self, unlink=True):
+        if self.buf is None:
+            return
+        self.buf.release()
+        self.buf = None
+        self.shm.close()
+        if unlink:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class SharedStateReader:
+    """
+    状态帧共享内存读者 (无锁, 可多进程同时读取)
+
+    Args:
+        name: 共享内存名或机器人 IP
+        snapshot_builder: 快照解包器, 默认 Robot.state_snapshot_builder
+    """
+
+    def __init__(self, name, snapshot_builder=None):
+        if snapshot_builder is None:
+            from .Robot import state_snapshot_builder as snapshot_builder
+        if name.replace('.', '').isdigit():
+            name = shared_state_name(name)
+        self.name = name
+        self.shm = shared_memory.SharedMemory(name=name)
+        _untrack(self.shm)
+        self.buf = self.shm.buf
+        magic, version, self.pkg_size, self.slot_size, self.capacity, _, self.pid = \
+            _HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{name} 不是状态共享内存")
+        if snapshot_builder.struct.size > self.pkg_size:
+            self.close()
+            raise ValueError(f"状态包长度不一致: 共享内存 {self.pkg_size} 字节")
+        self.builder = snapshot_builder
+        self.retries = 0            # 读到正在写入的槽位而重读的次数
+
+    @property
+    def published(self):
+        """已发布帧数"""
+        return _U64.unpack_from(self.buf, _WRITE_SEQ_OFFSET)[0]
+
+    def _read_slot(self, n):
+        """读取第 n 帧 (从 0 计), 已被覆盖返回 None"""
+        buf = self.buf
+        offset = HEADER_SIZE + (n % self.capacity) * self.slot_size
+        expected = 2 * n + 2
+        for _ in range(_MAX_RETRIES):
+            lock, seq, timestamp = _SLOT_HEAD.unpack_from(buf, offset)
+            if lock == expected:
+                state = self.builder.build(buf, seq, timestamp, offset + _SLOT_HEAD.size)
+                if _U64.unpack_from(buf, offset)[0] == expected:
+                    return state
+            elif lock > expected:
+                return None
+            self.retries += 1
+        # 发布进程在写入中途退出, 槽位计数停留在奇数
+        return None
+
+    def latest(self):
+        """最新一帧快照, 尚无数据返回 None"""
+        for _ in range(_MAX_RETRIES):
+            n = self.published
+            if n == 0:
+                return None
+            state = self._read_slot(n - 1)
+            if state is not None:
+                return state
+        return None
+
+    def history(self, count=None):
+        """最近 count 帧快照 (按时间先后), 默认全部保留的历史"""
+        n = self.published
+        count = self.capacity - 1 if count is None else min(int(count), self.capacity - 1)
+        states = []
+        for i in range(max(0, n - count), n):
+            state = self._read_slot(i)
+            if state is not None:
+                states.append(state)
+        return states
+
+    def wait(self, after=None, timeout=None, poll=0.001):
+        """
+        等待新帧, 返回最新快照, 超时返回 None
+
+        Args:
+            after: 已读取的发布计数, 默认调用时的计数
+        """
+        start = self.published if after is None else after
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while self.published == start:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return None
+            time.sleep(poll)
+        return self.latest()
+
+    def age(self):
+        """最新帧距今时间 (s), 尚无数据时为 inf"""
+        state = self.latest()
+        if state is None:
+            return float('inf')
+        return time.time() - state.timestamp
+
+    def close(self):
+        if self.buf is None:
+            return
+        self.buf.release()
+        self.buf = None
+        self.shm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
@@ -0,0 +1,174 @@
+"""
+20004端口实时状态帧解码器
+
+帧格式: 帧头0x5A5A(2) + 帧计数(1) + 数据长度(2) + 数据(data_len) + 校验和(2)
+校验和为帧头至数据末尾全部字节之和(低16位, 小端)。
+
+解码器使用 bytearray.find 定位帧头, 对整帧切片一次性求校验和,
+并将校验通过的帧拷贝进预分配的 RobotStatePkg 环形槽位, 接收过程中不再逐字节循环、不再分配新缓冲区。
+"""
+
+import ctypes
+
+FRAME_HEAD = b"\x5a\x5a"
+FRAME_HEAD_LEN = 5      # 帧头(2) + 帧计数(1) + 数据长度(2)
+FRAME_CHECKSUM_LEN = 2
+
+
+def build_state_frame(pkg, frame_cnt=0):
+    """将 RobotStatePkg 打包为带帧头与校验和的完整状态帧, 返回 bytes"""
+    size = ctypes.sizeof(pkg)
+    pkg.frame_head = 0x5A5A
+    pkg.frame_cnt = frame_cnt & 0x7F
+    pkg.data_len = size - FRAME_HEAD_LEN - FRAME_CHECKSUM_LEN
+    raw = bytearray(ctypes.string_at(ctypes.addressof(pkg), size))
+    checksum = sum(raw[:size - FRAME_CHECKSUM_LEN]) & 0xFFFF
+    raw[size - 2] = checksum & 0xFF
+    raw[size - 1] = checksum >> 8
+    pkg.check_sum = checksum
+    return bytes(raw)
+
+
+class StateFrameDecoder:
+    """
+    实时状态帧解码器
+
+    Args:
+        pkg_type: 状态包 ctypes 结构体类型 (RobotStatePkg)
+        buffer_size: 接收缓冲区大小 (字节)
+        slot_count: 状态包环形槽位数量, 解码得到的 RobotStatePkg 在被覆盖前保持有效 slot_count 帧
+    """
+
+    def __init__(self, pkg_type, buffer_size=1024 * 1024, slot_count=8):
+        self.pkg_type = pkg_type
+        self.pkg_size = ctypes.sizeof(pkg_type)
+        self.buffer = bytearray(buffer_size)
+        self.view = memoryview(self.buffer)
+        self.start = 0
+        self.end = 0
+        # 帧长上限, 避免误判的帧头携带超大长度时长时间等待
+        self.max_frame_size = min(buffer_size, max(4 * self.pkg_size, 4096))
+
+        self.slots = bytearray(self.pkg_size * slot_count)
+        self.slot_pkgs = [pkg_type.from_buffer(self.slots, i * self.pkg_size) for i in range(slot_count)]
+        self.slot_index = -1
+
+        self.frame_count = 0        # 校验通过的帧数
+        self.checksum_errors = 0    # 校验失败的帧数
+        self.bytes_received = 0     # 接收字节总数
+        self.bytes_dropped = 0      # 缓冲区溢出丢弃的字节数
+
+    @property
+    def latest(self):
+        """最近一次解码得到的状态包, 尚未解码时为 None"""
+        if self.slot_index < 0:
+            return None
+        return self.slot_pkgs[self.slot_index]
+
+    def reset(self):
+        """清空接收缓冲区 (重连后调用)"""
+        self.start = 0
+        self.end = 0
+
+    def _reserve(self):
+        """为下一次接收腾出空间, 返回可写的 memoryview"""
+        if self.end == len(self.buffer):
+            if self.start > 0:
+                remain = self.end - self.start
+                self.buffer[:remain] = self.view[self.start:self.end]
+                self.start = 0
+                self.end = remain
+            else:
+                # 整个缓冲区内都没有完整帧, 丢弃
+                self.bytes_dropped += self.end
+                self.start = 0
+                self.end = 0
+        return self.view[self.end:]
+
+    def recv_from(self, sock):
+        """从套接字直接接收到缓冲区 (recv_into), 返回接收字节数"""
+        recvbyte = sock.recv_into(self._reserve())
+        self.end += recvbyte
+        self.bytes_received += recvbyte
+        return recvbyte
+
+    def feed(self, data):
+        """写入一段原始字节流 (回放/测试用), 返回写入字节数"""
+        data = memoryview(data)
+        total = len(data)
+        while len(data) > 0:
+            free = self._reserve()
+            n = min(len(free), len(data))
+            free[:n] = data[:n]
+            self.end += n
+            data = data[n:]
+            if len(data) > 0:
+                self.decode()
+        self.bytes_received += total
+        return total
+
+    def decode(self, callback=None):
+        """
+        解析缓冲区中全部完整帧
+
+        Args:
+            callback: 可选, 每个有效帧调用一次 callback(pkg, frame),
+                      frame 为该帧原始字节的 memoryview, 仅在回调期间有效
+
+        Returns:
+            最后一个有效帧对应的 RobotStatePkg, 无新帧时返回 None
+        """
+        buf = self.buffer
+        view = self.view
+        pos = self.start
+        end = self.end
+        latest = None
+        max_frame = self.max_frame_size
+
+        while True:
+            head = buf.find(FRAME_HEAD, pos, end)
+            if head < 0:
+                # 末尾单个0x5A可能是下一帧帧头的前半部分
+                pos = end - 1 if end > pos and buf[end - 1] == 0x5A else end
+                break
+            if head + FRAME_HEAD_LEN > end:
+                pos = head
+                break
+            data_len = buf[head + 3] | (buf[head + 4] << 8)
+            body_end = head + FRAME_HEAD_LEN + data_len
+            frame_end = body_end + FRAME_CHECKSUM_LEN
+            if frame_end - head > max_frame:
+                pos = head + 1
+                continue
+            if frame_end > end:
+                pos = head
+                break
+            checksum = buf[body_end] | (buf[body_end + 1] << 8)
+            if sum(view[head:body_end]) & 0xFFFF != checksum:
+                self.checksum_errors += 1
+                pos = head + 1
+                continue
+
+            latest = self._store(head, frame_end)
+            if callback is not None:
+                callback(latest, view[head:frame_end])
+            pos = frame_end
+
+        if pos >= end:
+            self.start = 0
+            self.end = 0
+        else:
+            self.start = pos
+        return latest
+
+    def _store(self, head, frame_end):
+        """将有效帧拷贝进下一个状态包槽位"""
+        self.slot_index = (self.slot_index + 1) % len(self.slot_pkgs)
+        offset = self.slot_index * self.pkg_size
+        n = min(frame_end - head, self.pkg_size)
+        self.slots[offset:offset + n] = self.view[head:head + n]
+        if n < self.pkg_size:
+            # 控制器版本较旧, 帧比结构体短, 剩余字段清零
+            self.slots[offset + n:offset + self.pkg_size] = bytes(self.pkg_size - n)
+        self.frame_count += 1
+        return self.slot_pkgs[self.slot_index]
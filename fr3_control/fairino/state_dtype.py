@@ -0,0 +1,171 @@
+"""
+RobotStatePkg 的 numpy 结构化 dtype 与批量帧解码 (依赖 numpy)
+
+state_dtype() 按 ctypes 结构体的 _fields_ 与字段偏移生成小端结构化 dtype (嵌套结构体为嵌套 dtype,
+数组为子数组), 与 ctypes 布局逐字段一致, 修改 RobotStatePkg 后无需手工同步。
+
+批量解码一次调用完成, 不逐帧进入 Python:
+    decode_frames(data)      连续排列的原始帧 (抓包或拼接) -> 结构化数组, 向量化校验帧头与校验和;
+                             数据中夹杂残帧/噪声时按前缀和向量化定位有效帧
+    decode_recording(path)   StateRecorder 录制文件 -> (时间戳, 结构化数组), 帧长一致时直接映射文件, 无拷贝
+    as_array(pkg)            单个 RobotStatePkg 的无拷贝结构化视图, 代替 [pkg.jt_cur_pos[i] for i in range(6)]
+"""
+
+import ctypes
+
+import numpy as np
+
+from .state_decoder import FRAME_CHECKSUM_LEN, FRAME_HEAD_LEN
+
+_dtype_cache = {}
+
+
+def _ctype_to_dtype(ctype):
+    """ctypes 类型 -> 小端 numpy dtype"""
+    if issubclass(ctype, ctypes.Structure):
+        names, formats, offsets = [], [], []
+        for field in ctype._fields_:
+            name, field_type = field[0], field[1]
+            names.append(name)
+            formats.append(_ctype_to_dtype(field_type))
+            offsets.append(getattr(ctype, name).offset)
+        return np.dtype({'names': names, 'formats': formats, 'offsets': offsets,
+                         'itemsize': ctypes.sizeof(ctype)})
+    if issubclass(ctype, ctypes.Array):
+        item = _ctype_to_dtype(ctype._type_)
+        if item.shape:
+            return np.dtype((item.base, (ctype._length_,) + item.shape))
+        return np.dtype((item, (ctype._length_,)))
+    return np.dtype(ctype).newbyteorder('<')
+
+
+def state_dtype(pkg_type=None):
+    """
+    状态包的结构化 dtype
+
+    Args:
+        pkg_type: ctypes 结构体类型, 默认 Robot.RobotStatePkg
+    """
+    if pkg_type is None:
+        from .Robot import RobotStatePkg
+        pkg_type = RobotStatePkg
+    dtype = _dtype_cache.get(pkg_type)
+    if dtype is None:
+        dtype = _ctype_to_dtype(pkg_type)
+        if dtype.itemsize != ctypes.sizeof(pkg_type):
+            raise ValueError(f"dtype 长度 {dtype.itemsize} 与 ctypes 结构体长度 {ctypes.sizeof(pkg_type)} 不一致")
+        _dtype_cache[pkg_type] = dtype
+    return dtype
+
+
+def as_array(pkg):
+    """单个 ctypes 状态包的无拷贝结构化视图 (0 维数组), 字段为 numpy 数组"""
+    return np.frombuffer(pkg, dtype=state_dtype(type(pkg)), count=1)[0]
+
+
+def _checksums(rows):
+    """按行求校验和, rows 为 (N, frame_size) uint8"""
+    return (rows[:, :-FRAME_CHECKSUM_LEN].sum(axis=1, dtype=np.uint32) & 0xFFFF).astype(np.uint16)
+
+
+def decode_frames(data, pkg_type=None, validate=True):
+    """
+    将一段原始状态帧数据解码为结构化数组
+
+    Args:
+        data: bytes/bytearray/memoryview/numpy uint8 数组, 内容为依次排列的状态帧
+        pkg_type: 状态包类型, 默认 Robot.RobotStatePkg
+        validate: 校验帧头与校验和, 丢弃无效帧
+
+    Returns:
+        结构化数组 (N,), 数据中帧长与结构体不同 (控制器版本不同) 的帧被丢弃
+    """
+    dtype = state_dtype(pkg_type)
+    size = dtype.itemsize
+    raw = np.frombuffer(data, dtype=np.uint8)
+
+    # 快速路径: 数据恰为连续完整帧
+    if len(raw) % size == 0 and len(raw) > 0:
+        rows = raw.reshape(-1, size)
+        if not validate:
+            return rows.view(dtype).reshape(-1)
+        head_ok = (rows[:, 0] == 0x5A) & (rows[:, 1] == 0x5A)
+        stored = rows[:, -2].astype(np.uint16) | (rows[:, -1].astype(np.uint16) << 8)
+        ok = head_ok & (_checksums(rows) == stored)
+        if ok.all():
+            return rows.view(dtype).reshape(-1)
+    return _locate_frames(raw, dtype) if validate else np.empty(0, dtype=dtype)
+
+
+def _locate_frames(raw, dtype):
+    """在夹杂残帧/噪声的数据中定位全部有效帧 (前缀和求区间校验和, 全程向量化)"""
+    size = dtype.itemsize
+    if len(raw) < size:
+        return np.empty(0, dtype=dtype)
+    data_len = size - FRAME_HEAD_LEN - FRAME_CHECKSUM_LEN
+    last = len(raw) - size
+    candidates = np.flatnonzero((raw[:last + 1] == 0x5A) & (raw[1:last + 2] == 0x5A))
+    candidates = candidates[(raw[candidates + 3] == (data_len & 0xFF)) & (raw[candidates + 4] == (data_len >> 8))]
+    if len(candidates) == 0:
+        return np.empty(0, dtype=dtype)
+    prefix = np.zeros(len(raw) + 1, dtype=np.uint64)
+    np.cumsum(raw, dtype=np.uint64, out=prefix[1:])
+    body_end = candidates + size - FRAME_CHECKSUM_LEN
+    sums = ((prefix[body_end] - prefix[candidates]) & np.uint64(0xFFFF)).astype(np.uint16)
+    stored = raw[body_end].astype(np.uint16) | (raw[body_end + 1].astype(np.uint16) << 8)
+    starts = candidates[sums == stored]
+    if len(starts) > 1 and (np.diff(starts) < size).any():
+        # 帧内数据恰好形如帧头且校验通过的极少数情况: 按顺序保留不重叠的帧
+        keep = []
+        end = -1
+        for start in starts.tolist():
+            if start >= end:
+                keep.append(start)
+                end = start + size
+        starts = np.asarray(keep, dtype=np.int64)
+    index = starts[:, None] + np.arange(size)
+    return raw[index].view(dtype).reshape(-1)
+
+
+def decode_recording(recording, pkg_type=None, copy=False):
+    """
+    将 StateRecorder 录制文件解码为结构化数组
+
+    Args:
+        recording: StateRecording 或录制文件路径
+        pkg_type: 状态包类型, 默认 Robot.RobotStatePkg
+        copy: 返回独立拷贝; 默认所有帧长与结构体相同时返回文件映射上的只读视图,
+              视图存活期间 recording.close() 会抛出 BufferError
+
+    Returns:
+        (timestamps, states) timestamps 为接收时间戳 float64 数组, states 为结构化数组
+    """
+    from .state_recorder import StateRecording, _HEADER, _RECORD
+    if not isinstance(recording, StateRecording):
+        recording = StateRecording(recording)
+    dtype = state_dtype(pkg_type)
+    count = len(recording)
+    timestamps = np.asarray(recording.timestamps, dtype=np.float64)
+    if count == 0:
+        return timestamps, np.empty(0, dtype=dtype)
+
+    record = np.dtype({'names': ['timestamp', 'length', 'state'],
+                       'formats': ['<f8', '<u4', dtype],
+                       'offsets': [0, 8, _RECORD.size],
+                       'itemsize': _RECORD.size + dtype.itemsize})
+    offsets = np.asarray(recording.offsets, dtype=np.int64)
+    contiguous = offsets[0] == _HEADER.size and (count == 1 or (np.diff(offsets) == record.itemsize).all())
+    if contiguous:
+        records = np.frombuffer(recording._mmap, dtype=record, count=count, offset=_HEADER.size)
+        if (records['length'] == dtype.itemsize).all():
+            states = records['state']
+            return timestamps, states.copy() if copy else states
+
+    # 帧长不一致 (控制器升级前后的录制): 逐帧拷贝, 短帧剩余字段为 0
+    states = np.zeros(count, dtype=dtype)
+    view = states.view(np.uint8).reshape(count, dtype.itemsize)
+    for i in range(count):
+        frame = recording[i][1]
+        n = min(len(frame), dtype.itemsize)
+        view[i, :n] = np.frombuffer(frame, dtype=np.uint8, count=n)
+    return timestamps, states
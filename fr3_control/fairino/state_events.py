@@ -0,0 +1,215 @@
+"""
+实时状态边沿事件订阅
+
+订阅在接收线程中随每个解码帧求值一次, 字段发生跳变 (边沿) 时调用回调并置位可等待的事件,
+代替按固定间隔轮询 GetRobotMotionDone/robot_state_pkg, 等待延迟由轮询间隔降为一帧。
+
+触发条件:
+    'change'   值变化 (main_code/sub_code 等)
+    'rising'   由假变真 (motion_done 到位、EmergencyStop 急停)
+    'falling'  由真变假
+    'above'    由 <= threshold 变为 > threshold (mc_queue_len 阈值)
+    'below'    由 >= threshold 变为 < threshold
+    'equals'   变为 == threshold
+    callable   predicate(state) 由 False 变为 True
+
+初值取订阅时的状态快照 (尚未收到状态帧时取订阅后的第一帧)。回调在接收线程中执行, 应尽快返回; 回调与 predicate 抛出的异常被计数后忽略。
+"""
+
+import threading
+
+TRIGGERS = ('change', 'rising', 'falling', 'above', 'below', 'equals')
+
+
+class StateSubscription:
+    """
+    单个状态事件订阅
+
+    Args:
+        field: 状态快照字段名, trigger 为 callable 时可为 None
+        trigger: 触发条件, 见模块说明
+        threshold: 'above'/'below'/'equals' 的阈值
+        callback: 触发时调用 callback(state, old, new)
+        once: 触发一次后自动取消订阅
+        bit: 可选, 只取字段的第 bit 位 (数字 IO 字节)
+        index: 可选, 数组字段取第 index 个元素 (jt_cur_pos 等)
+    """
+
+    def __init__(self, field, trigger='change', threshold=None, callback=None, once=False, bit=None, index=None):
+        if callable(trigger):
+            self._predicate = trigger
+        elif trigger in TRIGGERS:
+            self._predicate = None
+            if trigger in ('above', 'below', 'equals') and threshold is None:
+                raise ValueError(f"触发条件 {trigger} 需要 threshold")
+        else:
+            raise ValueError(f"不支持的触发条件: {trigger}")
+        if field is None and not callable(trigger):
+            raise ValueError("field 不能为空")
+        self.field = field
+        self.trigger = trigger
+        self.threshold = threshold
+        self.callback = callback
+        self.once = once
+        self.bit = bit
+        self.index = index
+        self.event = threading.Event()
+        self.count = 0              # 触发次数
+        self.errors = 0             # 回调异常次数
+        self.last_state = None      # 最近一次触发时的状态快照
+        self.hub = None
+        self._previous = None
+        self._primed = False
+
+    def value(self, state):
+        """从状态快照中取订阅的值"""
+        if self._predicate is not None:
+            return bool(self._predicate(state))
+        value = getattr(state, self.field)
+        if self.index is not None:
+            value = value[self.index]
+        if self.bit is not None:
+            value = (value >> self.bit) & 0x01
+        return value
+
+    def _edge(self, old, new):
+        trigger = self.trigger
+        if self._predicate is not None or trigger == 'rising':
+            return not old and bool(new)
+        if trigger == 'change':
+            return new != old
+        if trigger == 'falling':
+            return bool(old) and not new
+        threshold = self.threshold
+        if trigger == 'above':
+            return old <= threshold < new
+        if trigger == 'below':
+            return old >= threshold > new
+        return new == threshold and old != threshold
+
+    def prime(self, state):
+        """以订阅时的状态快照作为初值, 订阅后第一帧即可检测跳变"""
+        try:
+            self._previous = self.value(state)
+            self._primed = True
+        except Exception:
+            self._primed = False
+
+    def evaluate(self, state):
+        """随每帧调用一次, 触发返回 True"""
+        new = self.value(state)
+        if not self._primed:
+            self._primed = True
+            self._previous = new
+            return False
+        old = self._previous
+        self._previous = new
+        if old == new or not self._edge(old, new):
+            return False
+        self.count += 1
+        self.last_state = state
+        if self.callback is not None:
+            try:
+                self.callback(state, old, new)
+            except Exception:
+                self.errors += 1
+        self.event.set()
+        if self.once:
+            self.cancel()
+        return True
+
+    def wait(self, timeout=None):
+        """
+        等待下一次触发 (已触发且未 clear 时立即返回)
+
+        Returns:
+            触发时的状态快照, 超时返回 None
+        """
+        if self.event.wait(timeout):
+            return self.last_state
+        return None
+
+    def clear(self):
+        """清除已触发标志, 用于重复等待"""
+        self.event.clear()
+
+    def cancel(self):
+        if self.hub is not None:
+            self.hub.unsubscribe(self)
+
+
+class MotionDoneSubscription(StateSubscription):
+    """
+    运动完成订阅, 应在下发运动指令之前创建
+
+    控制器受理指令后需要若干周期才会清除到位信号, 因此只接受: 已观察到 motion_done==0 之后的到位帧,
+    或订阅后至少 settle_frames 帧仍为到位 (指令未引起运动)。与 AsyncRPC.motion_done 的判据相同。
+    """
+
+    def __init__(self, settle_frames=3, callback=None):
+        super().__init__('motion_done', 'rising', callback=callback, once=True)
+        self.settle_frames = settle_frames
+        self._frames = 0
+        self._seen_moving = False
+
+    def evaluate(self, state):
+        self._frames += 1
+        if state.motion_done == 0:
+            self._seen_moving = True
+            return False
+        if not self._seen_moving and self._frames <= self.settle_frames:
+            return False
+        self.count += 1
+        self.last_state = state
+        if self.callback is not None:
+            try:
+                self.callback(state, 0, state.motion_done)
+            except Exception:
+                self.errors += 1
+        self.event.set()
+        self.cancel()
+        return True
+
+
+class StateEventHub:
+    """
+    订阅表, 接收线程每帧调用 process(state)
+
+    订阅表为不可变元组, 订阅/取消时整体替换, 接收线程遍历时无需加锁。
+    """
+
+    def __init__(self):
+        self.subscriptions = ()
+        self._lock = threading.Lock()
+
+    def subscribe(self, subscription, state=None):
+        """添加订阅, state 为当前状态快照 (初值), 为 None 时以订阅后的第一帧为初值"""
+        if state is not None and state.seq > 0:
+            subscription.prime(state)
+        with self._lock:
+            subscription.hub = self
+            self.subscriptions = self.subscriptions + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self.subscriptions = tuple(s for s in self.subscriptions if s is not subscription)
+            subscription.hub = None
+
+    def clear(self):
+        with self._lock:
+            for subscription in self.subscriptions:
+                subscription.hub = None
+            self.subscriptions = ()
+
+    def process(self, state):
+        """对每个订阅求值一次, 返回本帧触发的订阅数"""
+        fired = 0
+        for subscription in self.subscriptions:
+            try:
+                if subscription.evaluate(state):
+                    fired += 1
+            except Exception:
+                # 字段名错误或 predicate 异常不能中断接收线程
+                subscription.errors += 1
+        return fired
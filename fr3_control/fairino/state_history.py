@@ -0,0 +1,124 @@
+"""
+机器人实时状态历史环形缓冲区 (依赖 numpy)
+
+接收线程每解码一帧追加一条记录 (O(1), 一次 struct.pack_into)。
+缓冲区按"双写"方式组织: 容量为 N 的环占用 2N 条记录的存储, 每条记录同时写入 i 与 i+N,
+因此最近任意 n<=N 条记录在内存中总是连续的, window() 直接返回 numpy 视图而无需拷贝。
+"""
+
+import struct
+import threading
+
+import numpy as np
+
+# (字段名, 元素个数, numpy 类型, struct 格式)
+HISTORY_FIELDS = (
+    ('seq', 1, '<u8', 'Q'),
+    ('timestamp', 1, '<f8', 'd'),
+    ('jt_cur_pos', 6, '<f8', 'd'),
+    ('tl_cur_pos', 6, '<f8', 'd'),
+    ('flange_cur_pos', 6, '<f8', 'd'),
+    ('actual_qd', 6, '<f8', 'd'),
+    ('actual_qdd', 6, '<f8', 'd'),
+    ('actual_TCP_Speed', 6, '<f8', 'd'),
+    ('jt_cur_tor', 6, '<f8', 'd'),
+    ('ft_sensor_data', 6, '<f8', 'd'),
+    ('program_state', 1, 'i1', 'b'),
+    ('robot_state', 1, 'i1', 'b'),
+    ('main_code', 1, '<i4', 'i'),
+    ('sub_code', 1, '<i4', 'i'),
+    ('motion_done', 1, '<i4', 'i'),
+    ('mc_queue_len', 1, '<i4', 'i'),
+    ('EmergencyStop', 1, 'i1', 'b'),
+    ('collisionState', 1, 'i1', 'b'),
+)
+
+
+class StateHistory:
+    """
+    固定容量的状态历史环
+
+    Args:
+        capacity: 最多保留的帧数, 8ms 反馈周期下默认 15000 帧约为 2 分钟
+        fields: 记录字段, 默认 HISTORY_FIELDS
+    """
+
+    def __init__(self, capacity=15000, fields=HISTORY_FIELDS):
+        if capacity <= 0:
+            raise ValueError("capacity 必须大于0")
+        self.capacity = int(capacity)
+        self.fields = fields
+        self.dtype = np.dtype([(name, np_type, (count,)) if count > 1 else (name, np_type)
+                               for name, count, np_type, _ in fields])
+        self._struct = struct.Struct('<' + ''.join(fmt * count for _, count, _, fmt in fields))
+        if self._struct.size != self.dtype.itemsize:
+            raise ValueError("历史记录 struct 与 numpy dtype 布局不一致")
+        self._array_fields = tuple((name, count > 1) for name, count, _, _ in fields)
+
+        self._data = np.zeros(2 * self.capacity, dtype=self.dtype)
+        self._raw = self._data.view(np.uint8).reshape(-1)
+        self._itemsize = self.dtype.itemsize
+        self._next = 0          # 下一条记录在环中的下标
+        self.count = 0          # 自创建以来追加的总帧数
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, state):
+        """追加一帧 (RobotStateSnapshot 或同名属性对象)"""
+        values = []
+        for name, is_array in self._array_fields:
+            if is_array:
+                values.extend(getattr(state, name))
+            else:
+                values.append(getattr(state, name))
+        index = self._next
+        offset = index * self._itemsize
+        self._struct.pack_into(self._raw, offset, *values)
+        self._struct.pack_into(self._raw, offset + self.capacity * self._itemsize, *values)
+        with self._lock:
+            self._next = index + 1 if index + 1 < self.capacity else 0
+            self.count += 1
+
+    def window(self, n=None):
+        """
+        最近 n 帧 (按时间先后) 的结构化数组视图, 不拷贝
+
+        视图直接引用环形存储, 在追加 capacity-n 帧后会被覆盖; 需要长期保存时使用 export()
+        """
+        with self._lock:
+            size = len(self)
+            end = self._next + self.capacity
+        n = size if n is None else max(0, min(int(n), size))
+        return self._data[end - n:end]
+
+    def field(self, name, n=None):
+        """最近 n 帧中某一字段的视图, 例如 field('jt_cur_pos') 形状为 (n, 6)"""
+        return self.window(n)[name]
+
+    def since(self, timestamp):
+        """接收时间戳不早于 timestamp 的记录视图"""
+        records = self.window()
+        start = np.searchsorted(records['timestamp'], timestamp, side='left')
+        return records[start:]
+
+    def export(self, file_path=None):
+        """
+        导出全部记录的拷贝
+
+        Args:
+            file_path: 可选, 指定时以 .npy 格式保存到该路径
+        Returns:
+            结构化数组拷贝
+        """
+        records = self.window().copy()
+        if file_path:
+            np.save(file_path, records)
+        return records
+
+    def clear(self):
+        """清空历史"""
+        with self._lock:
+            self._next = 0
+            self.count = 0
@@ -0,0 +1,356 @@
+"""
+20004 实时状态流录制与回放
+
+录制: 接收线程将每个校验通过的原始状态帧连同主机接收时间戳追加写入录制文件 (缓冲写入, 按 flush_interval 刷盘),
+关闭时在文件末尾写入索引 (每帧的文件偏移与时间戳)。未正常关闭 (进程崩溃、断电) 的文件没有索引,
+打开时顺序扫描重建, 末尾不完整或损坏的记录被忽略。
+
+文件格式 (小端):
+    文件头   magic(8) + 版本(2) + 保留(2) + 状态包长度(4) + 创建时间(8) + 保留(8)
+    记录     接收时间戳 f8 + 帧长度 u4 + 原始帧 (含帧头与校验和)
+    索引     帧偏移 u8 * N + 时间戳 f8 * N
+    文件尾   索引偏移 u8 + 帧数 u8 + b"FIDX"
+
+回放: StateReplayer 按录制时的帧间隔 (可加速/减速)、尽快或单步将帧交给消费者,
+消费者为 callback(frame, timestamp) 或 Robot.RPC 实例 (帧经 StateFrameDecoder 进入 on_state_frame,
+robot_state 快照、状态历史与 GUI 监控按实机数据更新)。
+"""
+
+import bisect
+import ctypes
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+
+from .state_decoder import FRAME_HEAD, FRAME_HEAD_LEN, StateFrameDecoder
+
+MAGIC = b"FRSTREC\x01"
+VERSION = 1
+_HEADER = struct.Struct('<8sHHId8x')
+_RECORD = struct.Struct('<dI')
+_TRAILER = struct.Struct('<QQ4s')
+TRAILER_MAGIC = b"FIDX"
+
+
+class StateRecorder:
+    """
+    状态帧录制器
+
+    Args:
+        file_path: 录制文件路径, 已存在时覆盖
+        pkg_size: 状态包长度 (字节), 写入文件头供回放时核对
+        flush_interval: 刷盘间隔 (s), 异常退出时最多丢失该时长的数据
+        buffer_size: 写缓冲区大小 (字节)
+    """
+
+    def __init__(self, file_path, pkg_size=0, flush_interval=1.0, buffer_size=1024 * 1024):
+        self.file_path = file_path
+        self.flush_interval = flush_interval
+        self._file = open(file_path, 'wb', buffering=buffer_size)
+        self._file.write(_HEADER.pack(MAGIC, VERSION, 0, int(pkg_size), time.time()))
+        self._offset = _HEADER.size
+        self._offsets = array('Q')
+        self._timestamps = array('d')
+        self._last_flush = time.perf_counter()
+        self._lock = threading.Lock()
+        self.bytes_written = _HEADER.size
+
+    @property
+    def frames(self):
+        return len(self._offsets)
+
+    @property
+    def closed(self):
+        return self._file is None
+
+    def write(self, frame, timestamp=None):
+        """追加一帧, frame 为原始帧字节 (bytes/memoryview), timestamp 为主机接收时间 (s)"""
+        if timestamp is None:
+            timestamp = time.time()
+        size = len(frame)
+        with self._lock:
+            f = self._file
+            if f is None:
+                return
+            f.write(_RECORD.pack(timestamp, size))
+            f.write(frame)
+            self._offsets.append(self._offset)
+            self._timestamps.append(timestamp)
+            self._offset += _RECORD.size + size
+            self.bytes_written = self._offset
+            now = time.perf_counter()
+            if now - self._last_flush >= self.flush_interval:
+                f.flush()
+                self._last_flush = now
+
+    def close(self):
+        """写入索引与文件尾并关闭文件"""
+        with self._lock:
+            f = self._file
+            if f is None:
+                return
+            self._file = None
+            index_offset = self._offset
+            f.write(self._offsets.tobytes())
+            f.write(self._timestamps.tobytes())
+            f.write(_TRAILER.pack(index_offset, len(self._offsets), TRAILER_MAGIC))
+            self.bytes_written = f.tell()
+            f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class StateRecording:
+    """
+    录制文件读取 (mmap, 按帧随机访问)
+
+    len(recording) 为帧数, recording[i] 返回 (timestamp, frame), frame 为原始帧的 memoryview,
+    在 close() 之前有效。
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._fh = open(file_path, 'rb')
+        size = os.fstat(self._fh.fileno()).st_size
+        if size < _HEADER.size:
+            self._fh.close()
+            raise ValueError(f"{file_path} 不是状态录制文件")
+        self._mmap = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        magic, self.version, _, self.pkg_size, self.created = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{file_path} 不是状态录制文件")
+        self.indexed = self._load_index(size)
+        if not self.indexed:
+            self._scan(size)
+
+    def _load_index(self, size):
+        """读取文件尾索引, 无索引 (未正常关闭) 返回 False"""
+        if size < _HEADER.size + _TRAILER.size:
+            return False
+        index_offset, count, magic = _TRAILER.unpack_from(self._mmap, size - _TRAILER.size)
+        if magic != TRAILER_MAGIC or index_offset + count * 16 + _TRAILER.size != size:
+            return False
+        self.offsets = array('Q')
+        self.offsets.frombytes(self._view[index_offset:index_offset + count * 8])
+        self.timestamps = array('d')
+        self.timestamps.frombytes(self._view[index_offset + count * 8:index_offset + count * 16])
+        return True
+
+    def _scan(self, size):
+        """顺序扫描重建索引, 在第一条不完整或不是状态帧的记录处停止 (写入中途截断的文件末尾可能是任意字节)"""
+        self.offsets = array('Q')
+        self.timestamps = array('d')
+        pos = _HEADER.size
+        while pos + _RECORD.size <= size:
+            timestamp, length = _RECORD.unpack_from(self._mmap, pos)
+            if pos + _RECORD.size + length > size:
+                break
+            if self.pkg_size and length != self.pkg_size:
+                break
+            start = pos + _RECORD.size
+            if length < FRAME_HEAD_LEN or self._mmap[start:start + 2] != FRAME_HEAD:
+                break
+            self.offsets.append(pos)
+            self.timestamps.append(timestamp)
+            pos += _RECORD.size + length
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, i):
+        offset = self.offsets[i]
+        timestamp, length = _RECORD.unpack_from(self._mmap, offset)
+        start = offset + _RECORD.size
+        return timestamp, self._view[start:start + length]
+
+    def __iter__(self):
+        for i in range(len(self.offsets)):
+            yield self[i]
+
+    @property
+    def start_time(self):
+        return self.timestamps[0] if self.timestamps else 0.0
+
+    @property
+    def end_time(self):
+        return self.timestamps[-1] if self.timestamps else 0.0
+
+    @property
+    def duration(self):
+        return self.end_time - self.start_time
+
+    def index_at(self, timestamp):
+        """时间戳不早于 timestamp 的第一帧序号"""
+        return bisect.bisect_left(self.timestamps, timestamp)
+
+    def pkg(self, i, pkg_type):
+        """将第 i 帧解包为 pkg_type (RobotStatePkg), 帧比结构体短时剩余字段为 0"""
+        frame = self[i][1]
+        buffer = bytearray(max(len(frame), ctypes.sizeof(pkg_type)))
+        buffer[:len(frame)] = frame
+        return pkg_type.from_buffer_copy(buffer)
+
+    def close(self):
+        if self._mmap is not None:
+            self._view.release()
+            self._mmap.close()
+            self._mmap = None
+            self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def rpc_consumer(rpc, pkg_type=None):
+    """
+    将回放帧送入 Robot.RPC: 经 StateFrameDecoder 校验解码后调用 on_state_frame, 时间戳为录制时的接收时间
+    """
+    if pkg_type is None:
+        from .Robot import RobotStatePkg
+        pkg_type = RobotStatePkg
+    decoder = StateFrameDecoder(pkg_type)
+    rpc.state_decoder = decoder
+
+    def consume(frame, timestamp):
+        decoder.feed(frame)
+        decoder.decode(lambda pkg, raw: rpc.on_state_frame(pkg, raw, timestamp))
+
+    return consume
+
+
+class StateReplayer:
+    """
+    状态流回放
+
+    Args:
+        recording: StateRecording 或录制文件路径
+        consumer: callback(frame, timestamp), 或 Robot.RPC 实例
+        speed: 回放倍速, 1.0 为实时, 2.0 为两倍速; 0 或 None 为尽快回放
+        start: 起始帧序号
+        stop: 结束帧序号 (不含), 默认到文件末尾
+        loop: 到达结束帧后从起始帧重新开始
+        restamp: True 时时间戳改为回放时刻的 time.time(), 供按时间戳判断数据新旧的监控使用
+    """
+
+    def __init__(self, recording, consumer, speed=1.0, start=0, stop=None, loop=False, restamp=False):
+        if not isinstance(recording, StateRecording):
+            recording = StateRecording(recording)
+        if hasattr(consumer, 'on_state_frame'):
+            consumer = rpc_consumer(consumer)
+        self.recording = recording
+        self.consumer = consumer
+        self.speed = speed
+        self.start_index = int(start)
+        self.stop_index = len(recording) if stop is None else min(int(stop), len(recording))
+        self.loop = loop
+        self.restamp = restamp
+        self.position = self.start_index     # 下一帧序号
+        self.frames = 0                      # 已回放帧数
+        self.late = 0                        # 晚于计划时刻超过一个帧间隔的帧数
+        self._rebase = False
+        self._thread = None
+        self._stop = threading.Event()
+        self._resume = threading.Event()
+        self._resume.set()
+
+    @property
+    def finished(self):
+        return self.position >= self.stop_index and not self.loop
+
+    def seek(self, timestamp=None, index=None):
+        """跳转到指定时间戳或帧序号"""
+        if index is None:
+            index = self.recording.index_at(timestamp)
+        self.position = max(self.start_index, min(int(index), self.stop_index))
+        self._rebase = True
+
+    def _deliver(self):
+        if self.position >= self.stop_index:
+            if not self.loop or self.stop_index <= self.start_index:
+                return False
+            self.position = self.start_index
+        timestamp, frame = self.recording[self.position]
+        self.consumer(frame, time.time() if self.restamp else timestamp)
+        self.position += 1
+        self.frames += 1
+        return True
+
+    def step(self, n=1):
+        """单步回放 n 帧, 返回实际回放帧数"""
+        count = 0
+        while count < n and self._deliver():
+            count += 1
+        return count
+
+    def run(self):
+        """阻塞回放到结束或 stop(), 按录制时间戳的间隔除以倍速调度"""
+        recording = self.recording
+        while not self._stop.is_set():
+            if not self._resume.is_set():
+                self._resume.wait()
+                continue
+            if self.position >= self.stop_index and not self.loop:
+                break
+            if self.position >= self.stop_index:
+                self.position = self.start_index
+            # 以当前帧为时间基准, 暂停/跳转/循环后重新对齐
+            self._rebase = False
+            base_index = self.position
+            base_time = recording.timestamps[base_index]
+            t0 = time.perf_counter()
+            while not self._stop.is_set() and self._resume.is_set() and self.position < self.stop_index:
+                if self._rebase:
+                    break
+                speed = self.speed
+                if speed:
+                    offset = recording.timestamps[self.position] - base_time
+                    due = t0 + offset / speed
+                    delay = due - time.perf_counter()
+                    if delay > 0:
+                        self._stop.wait(delay)
+                        if self._stop.is_set():
+                            break
+                    elif self.position > base_index:
+                        interval = recording.timestamps[self.position] - recording.timestamps[self.position - 1]
+                        if -delay > interval / speed:
+                            self.late += 1
+                self._deliver()
+
+    def start(self):
+        """在后台线程中回放"""
+        if self._thread is not None and self._thread.is_alive():
+            raise RuntimeError("回放已在运行")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="StateReplayer", daemon=True)
+        self._thread.start()
+        return self
+
+    def pause(self):
+        self._resume.clear()
+
+    def resume(self):
+        self._resume.set()
+
+    def stop(self):
+        self._stop.set()
+        self._resume.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
@@ -0,0 +1,120 @@
+"""
+机器人实时状态快照
+
+接收线程每解码一帧, 用一次 struct.unpack_from 将整帧解包为不可变的 RobotStateSnapshot,
+再以一次引用赋值发布 (读写双缓冲: 读者持有旧快照, 接收线程构建新快照后整体替换)。
+读取多个字段只需取一次快照引用, 不会混读两帧的数据, 也不再逐字段访问 ctypes 结构体。
+
+快照为命名元组, 字段与 RobotStatePkg 同名, 数组字段为元组, 嵌套结构体为命名元组, 另附:
+    seq: 帧序号, 自连接起单调递增, 序号不连续说明读者错过了中间帧
+    timestamp: 主机接收该帧的时间戳 (time.time(), 秒)
+"""
+
+import ctypes
+import struct
+from collections import namedtuple
+
+# ctypes 基础类型 -> struct 格式字符
+_CTYPES_FORMAT = {
+    ctypes.c_byte: 'b',
+    ctypes.c_ubyte: 'B',
+    ctypes.c_int16: 'h',
+    ctypes.c_uint16: 'H',
+    ctypes.c_int32: 'i',
+    ctypes.c_uint32: 'I',
+    ctypes.c_int64: 'q',
+    ctypes.c_uint64: 'Q',
+    ctypes.c_float: 'f',
+    ctypes.c_double: 'd',
+}
+
+SNAPSHOT_META_FIELDS = ('seq', 'timestamp')
+
+
+def _field_layout(ctype, offset, namespace):
+    """
+    计算 ctypes 类型的 struct 格式与取值表达式
+
+    Args:
+        ctype: 字段 ctypes 类型
+        offset: 该字段第一个标量在解包结果 v 中的下标
+        namespace: 表达式中引用的嵌套命名元组类型
+
+    Returns:
+        (fmt, count, expr) fmt 为 struct 格式片段, count 为解包得到的标量个数,
+        expr 为从解包结果 v 还原字段值的 Python 表达式
+    """
+    if ctype in _CTYPES_FORMAT:
+        return _CTYPES_FORMAT[ctype], 1, f"v[{offset}]"
+
+    if issubclass(ctype, ctypes.Array):
+        length = ctype._length_
+        if ctype._type_ in _CTYPES_FORMAT:
+            return _CTYPES_FORMAT[ctype._type_] * length, length, f"v[{offset}:{offset + length}]"
+        fmt = ''
+        count = 0
+        items = []
+        for _ in range(length):
+            item_fmt, item_count, item_expr = _field_layout(ctype._type_, offset + count, namespace)
+            fmt += item_fmt
+            count += item_count
+            items.append(item_expr)
+        return fmt, count, "(" + ", ".join(items) + ",)"
+
+    if issubclass(ctype, ctypes.Structure):
+        fmt, count, exprs = _struct_layout(ctype, offset, namespace)
+        type_name = "_" + ctype.__name__
+        if type_name not in namespace:
+            namespace[type_name] = namedtuple(ctype.__name__, [name for name, _ in ctype._fields_])
+        return fmt, count, f"{type_name}(" + ", ".join(exprs) + ")"
+
+    raise TypeError(f"不支持的状态字段类型: {ctype}")
+
+
+def _struct_layout(struct_type, offset, namespace):
+    """计算结构体全部字段的 struct 格式及各字段取值表达式"""
+    fmt = ''
+    count = 0
+    exprs = []
+    for name, ctype in struct_type._fields_:
+        field_fmt, field_count, expr = _field_layout(ctype, offset + count, namespace)
+        fmt += field_fmt
+        exprs.append(expr)
+        count += field_count
+    return fmt, count, exprs
+
+
+class SnapshotBuilder:
+    """
+    由 ctypes 状态包类型生成快照类型与整帧解包器
+
+    Args:
+        pkg_type: 状态包 ctypes 结构体类型 (RobotStatePkg)
+    """
+
+    def __init__(self, pkg_type):
+        self.pkg_type = pkg_type
+        self.field_names = tuple(name for name, _ in pkg_type._fields_)
+        self.snapshot_type = namedtuple('RobotStateSnapshot', SNAPSHOT_META_FIELDS + self.field_names)
+
+        # 与 namedtuple 相同的做法: 生成一次构造函数, 解包结果按字段一次性组装为快照
+        namespace = {'_Snapshot': self.snapshot_type}
+        fmt, _, exprs = _struct_layout(pkg_type, 0, namespace)
+        self.struct = struct.Struct('<' + fmt)
+        if self.struct.size != ctypes.sizeof(pkg_type):
+            raise ValueError(f"状态包布局不一致: struct {self.struct.size} 字节, ctypes {ctypes.sizeof(pkg_type)} 字节")
+        source = "lambda v, seq, timestamp: _Snapshot(seq, timestamp, " + ", ".join(exprs) + ")"
+        self._make = eval(source, namespace)
+        self.empty = self.build(bytes(self.struct.size), 0, 0.0)
+
+    def build(self, buffer, seq, timestamp, offset=0):
+        """
+        将一帧原始数据解包为快照
+
+        Args:
+            buffer: 支持缓冲区协议的对象 (RobotStatePkg/bytes/memoryview)
+            seq: 帧序号
+            timestamp: 主机接收时间戳 (秒)
+            offset: 帧在 buffer 中的起始偏移
+        """
+        return self._make(self.struct.unpack_from(buffer, offset), seq, timestamp)
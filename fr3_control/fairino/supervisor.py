@@ -0,0 +1,201 @@
+"""
+实时状态端口与 XML-RPC 连接的后台重连监督
+
+接收线程在 20004 套接字出错时通知监督线程 (notify_lost), 监督线程按指数退避加随机抖动重连:
+    第 n 次尝试前等待 min(max_backoff, initial_backoff * 2^n) * uniform(1 - jitter, 1 + jitter)
+不阻塞调用线程, 也不占用接收线程。
+
+状态流恢复后再以带超时的独立连接探测 20003 端口, 探测成功才恢复该实例的 is_conect,
+并丢弃连接池中重连前的空闲连接 (控制器重启后这些连接已失效)。
+
+陈旧帧检测: 套接字未报错但超过 stale_timeout 未收到有效帧 (网线拔出、控制器卡死时 recv 不会返回),
+视为连接丢失并主动关闭套接字重连; 期间 state_stale() 为真, 伺服指令流停止、本地逆解不再以冻结的快照为初值。
+"""
+
+import random
+import socket
+import threading
+import time
+
+from .transport import ServerProxyPool
+
+
+class ConnectionSupervisor:
+    """
+    连接监督线程
+
+    Args:
+        rpc: Robot.RPC 实例
+        initial_backoff: 首次重连前的等待时间 (s)
+        max_backoff: 重连等待时间上限 (s)
+        jitter: 等待时间的随机抖动比例, 避免多台机器人同时重连
+        stale_timeout: 超过该时间未收到有效帧视为陈旧 (s)
+        check_interval: 连接正常时检查陈旧帧的间隔 (s)
+        connect_timeout: 单次连接/探测超时 (s)
+    """
+
+    def __init__(self, rpc, initial_backoff=0.2, max_backoff=10.0, jitter=0.2, stale_timeout=0.5,
+                 check_interval=0.1, connect_timeout=1.0):
+        self.rpc = rpc
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.stale_timeout = stale_timeout
+        self.check_interval = check_interval
+        self.connect_timeout = connect_timeout
+
+        self.state_connected = bool(rpc.sock_cli_state_state)
+        self.rpc_connected = bool(rpc.is_conect)
+        self.reconnects = 0             # 成功恢复次数
+        self.attempts = 0               # 重连尝试总次数
+        self.failures = 0               # 当前连续失败次数
+        self.stale_events = 0           # 检测到陈旧帧的次数
+        self.last_error = None
+        self.lost_at = None             # 本次断开的时间 (perf_counter)
+        self.downtime = 0.0             # 累计断开时长 (s)
+        self.backoff = 0.0              # 下次重连前的等待时间 (s)
+        if not (self.state_connected and self.rpc_connected):
+            self.lost_at = time.perf_counter()
+
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="ConnectionSupervisor", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+
+    @property
+    def _stopped(self):
+        rpc = self.rpc
+        return rpc.closeRPC_state or rpc.stop_event.is_set()
+
+    def notify_lost(self, reason):
+        """接收线程报告 20004 连接丢失"""
+        with self._lock:
+            if self.state_connected and self.rpc_connected:
+                self.lost_at = time.perf_counter()
+            self.state_connected = False
+            self.last_error = str(reason)
+        self._wake.set()
+
+    def _delay(self):
+        base = min(self.max_backoff, self.initial_backoff * (2 ** min(self.failures, 30)))
+        return base * random.uniform(1.0 - self.jitter, 1.0 + self.jitter)
+
+    def _run(self):
+        rpc = self.rpc
+        while not self._stopped:
+            if self.state_connected and self.rpc_connected:
+                self._wake.wait(self.check_interval)
+                self._wake.clear()
+                if self._stopped:
+                    break
+                if self.state_connected and rpc.state_age() > self.stale_timeout:
+                    self._on_stale()
+                continue
+
+            self.backoff = self._delay()
+            self._wake.wait(self.backoff)
+            self._wake.clear()
+            if self._stopped:
+                break
+            self._attempt()
+
+    def _on_stale(self):
+        """连接未报错但帧已陈旧: 关闭套接字, 接收线程随即报告连接丢失"""
+        self.stale_events += 1
+        self.force_reconnect(f"{self.stale_timeout}s 内未收到状态帧")
+
+    def force_reconnect(self, reason="手动重连"):
+        """关闭当前 20004 套接字并立即开始重连"""
+        self.failures = 0
+        self.notify_lost(reason)
+        self._drop_state_socket()
+
+    def _attempt(self):
+        rpc = self.rpc
+        self.attempts += 1
+        if not rpc.sock_cli_state_state:
+            if not rpc.connect_to_robot(self.connect_timeout):
+                self.failures += 1
+                self.last_error = "20004 端口连接失败"
+                return
+            rpc.state_socket_ready.set()
+        # 等待新连接上的第一帧, 再探测 20003
+        seq = rpc.robot_state.seq
+        deadline = time.perf_counter() + self.connect_timeout
+        while rpc.robot_state.seq == seq and time.perf_counter() < deadline and not self._stopped:
+            time.sleep(0.005)
+        if rpc.robot_state.seq == seq:
+            self.failures += 1
+            self.last_error = "重连后未收到状态帧"
+            self._drop_state_socket()
+            return
+        if not self._probe_rpc():
+            self.failures += 1
+            return
+        with self._lock:
+            self.state_connected = True
+            if self.lost_at is not None:
+                self.downtime += time.perf_counter() - self.lost_at
+                self.lost_at = None
+        self.failures = 0
+        self.backoff = 0.0
+        self.reconnects += 1
+        rpc.SDK_state = True
+
+    def _drop_state_socket(self):
+        sock = self.rpc.sock_cli_state
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _probe_rpc(self):
+        """以带超时的独立连接探测 20003, 成功后丢弃连接池中失效的空闲连接"""
+        rpc = self.rpc
+        probe = ServerProxyPool(rpc.robot.uri, max_connections=1, timeout=self.connect_timeout)
+        try:
+            probe.GetControllerIP()
+        except Exception as ex:
+            self.rpc_connected = False
+            self.last_error = f"20003 端口探测失败: {ex}"
+            return False
+        finally:
+            probe.close()
+        rpc.robot.reset()
+        self.rpc_connected = True
+        rpc.set_link_state(True)
+        return True
+
+    def health(self):
+        """连接健康指标"""
+        rpc = self.rpc
+        downtime = self.downtime
+        if self.lost_at is not None:
+            downtime += time.perf_counter() - self.lost_at
+        decoder = rpc.state_decoder
+        return {
+            'state_connected': self.state_connected,
+            'rpc_connected': self.rpc_connected,
+            'state_age_ms': rpc.state_age() * 1e3,
+            'stale': rpc.state_stale(),
+            'frames': decoder.frame_count if decoder is not None else 0,
+            'checksum_errors': decoder.checksum_errors if decoder is not None else 0,
+            'reconnects': self.reconnects,
+            'attempts': self.attempts,
+            'consecutive_failures': self.failures,
+            'stale_events': self.stale_events,
+            'backoff_s': self.backoff,
+            'downtime_s': downtime,
+            'last_error': self.last_error,
+        }
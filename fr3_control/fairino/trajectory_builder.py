@@ -0,0 +1,181 @@
+"""
+TrajectoryJ 轨迹文件生成
+
+由 numpy 关节轨迹直接生成控制器轨迹文件 (TrajectoryJUpLoad 上传, LoadTrajectoryJ 预处理):
+每行一个轨迹点, 关节位置 j1~j6 (度, 逗号分隔), 有外部轴时在其后追加。
+
+文件经 20010 文件通道上传, 轨迹越密上传与预处理越慢。生成前可选两步处理:
+    resample   按时间戳线性插值到控制器周期的均匀时间网格, 任意采样密度/不等间隔的轨迹变为
+               每周期一点 (稠密复现, 时序与原轨迹一致)
+    simplify   关节空间 Ramer-Douglas-Peucker 简化: 保留首末点, 递归保留偏离相邻保留点连线最远的点,
+               直到所有被删点的偏差不超过 tolerance (度)。偏差取时间同步距离: 被删点与相邻保留点之间
+               按点序比例插值的位置比较, 不小于到折线的几何距离, 往返重叠的路径也能保留。简化后点距不再均匀,
+               应以控制点方式加载 (LoadTrajectoryJ opt=1), 由控制器在控制点间插补
+
+两步同时使用时先重采样再简化。build_trajectory_j 返回点数、最大偏差与文件大小。
+"""
+
+import os
+
+import numpy as np
+
+DEFAULT_PERIOD = 0.008
+
+
+def _as_points(joints):
+    points = np.asarray(joints, dtype=np.float64)
+    if points.ndim != 2 or points.shape[0] == 0:
+        raise ValueError("轨迹应为 (N, 关节数) 数组")
+    return points
+
+
+def resample(joints, timestamps=None, period=DEFAULT_PERIOD, point_period=None):
+    """
+    线性插值到均匀时间网格
+
+    Args:
+        joints: (N, k) 轨迹点
+        timestamps: (N,) 各点时间 (s), 严格递增; 不指定时按 point_period 等间隔
+        period: 输出点间隔 (s), 即控制器周期
+        point_period: 未指定 timestamps 时输入点间隔 (s)
+
+    Returns:
+        (M, k) 数组, 首末点与原轨迹相同
+    """
+    points = _as_points(joints)
+    if timestamps is None:
+        if point_period is None:
+            raise ValueError("需要 timestamps 或 point_period")
+        timestamps = np.arange(len(points)) * float(point_period)
+    t = np.asarray(timestamps, dtype=np.float64)
+    if t.shape != (len(points),):
+        raise ValueError("timestamps 长度与轨迹点数不一致")
+    if len(points) > 1 and not (np.diff(t) > 0).all():
+        raise ValueError("timestamps 必须严格递增")
+    duration = t[-1] - t[0]
+    count = int(np.floor(duration / period + 1e-9)) + 1
+    grid = t[0] + np.arange(count) * period
+    if grid[-1] < t[-1] - 1e-9:
+        grid = np.append(grid, t[-1])
+    # 逐关节插值 (列数很少, 循环开销可忽略)
+    return np.column_stack([np.interp(grid, t, points[:, j]) for j in range(points.shape[1])])
+
+
+def _segment_distance(points, start, end):
+    """
+    points[start+1:end] 到线段 points[start]-points[end] 上对应位置的距离 (时间同步距离):
+    第 i 点与线段上按下标比例 (i-start)/(end-start) 插值的点比较, 往返重叠的路径 (刷墙往复) 不会被误删
+    """
+    a = points[start]
+    d = points[end] - a
+    u = (np.arange(start + 1, end) - start) / (end - start)
+    diff = points[start + 1:end] - a - u[:, None] * d
+    return np.sqrt((diff * diff).sum(axis=1))
+
+
+def simplify(joints, tolerance):
+    """
+    关节空间 Ramer-Douglas-Peucker 简化
+
+    Args:
+        joints: (N, k) 轨迹点
+        tolerance: 允许的最大关节空间偏差 (度, 时间同步欧氏距离)
+
+    Returns:
+        保留点的下标数组 (升序, 含首末点)
+    """
+    points = _as_points(joints)
+    n = len(points)
+    if n <= 2:
+        return np.arange(n)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    # 显式栈代替递归, 长轨迹不受递归深度限制; 每段的距离计算向量化
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        dist = _segment_distance(points, start, end)
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance:
+            mid = start + 1 + i
+            keep[mid] = True
+            stack.append((start, mid))
+            stack.append((mid, end))
+    return np.flatnonzero(keep)
+
+
+def max_deviation(joints, indices):
+    """原轨迹各点到保留点折线对应位置的最大关节空间距离 (度)"""
+    points = _as_points(joints)
+    worst = 0.0
+    for start, end in zip(indices[:-1], indices[1:]):
+        if end - start >= 2:
+            worst = max(worst, float(_segment_distance(points, start, end).max()))
+    return worst
+
+
+def write_trajectory_j(file_path, joints, ext_axes=None, precision=3):
+    """
+    写入 TrajectoryJ 轨迹文件
+
+    Args:
+        joints: (N, 6) 关节位置 (度)
+        ext_axes: 可选 (N, m) 外部轴位置, 追加在关节位置之后
+        precision: 小数位数
+
+    Returns:
+        文件大小 (字节)
+    """
+    points = _as_points(joints)
+    if ext_axes is not None:
+        ext = np.asarray(ext_axes, dtype=np.float64).reshape(len(points), -1)
+        points = np.hstack([points, ext])
+    fmt = ','.join([f'%.{int(precision)}f'] * points.shape[1])
+    # 一次格式化整块文本再写入, 比逐行写快
+    text = '\n'.join([fmt % tuple(row) for row in points.tolist()]) + '\n'
+    with open(file_path, 'w', newline='\n') as f:
+        f.write(text)
+    return os.path.getsize(file_path)
+
+
+def build_trajectory_j(file_path, joints, timestamps=None, period=None, point_period=None, tolerance=None,
+                       ext_axes=None, precision=3):
+    """
+    由 numpy 轨迹生成 TrajectoryJ 文件
+
+    Args:
+        file_path: 输出文件路径
+        joints: (N, 6) 关节位置 (度)
+        timestamps: 可选 (N,) 各点时间 (s), 与 period 一起使用
+        period: 重采样周期 (s), 不指定时不重采样
+        point_period: 未指定 timestamps 时输入点间隔 (s)
+        tolerance: RDP 简化的最大关节空间偏差 (度), 不指定时不简化
+        ext_axes: 可选 (N, m) 外部轴位置, 与关节一同重采样/按保留点取舍
+        precision: 小数位数
+
+    Returns:
+        统计字典: input_points/output_points 点数, max_deviation 简化偏差 (度), bytes 文件大小
+    """
+    points = _as_points(joints)
+    input_points = len(points)
+    width = points.shape[1]
+    if ext_axes is not None:
+        points = np.hstack([points, np.asarray(ext_axes, dtype=np.float64).reshape(input_points, -1)])
+    if period is not None:
+        points = resample(points, timestamps, period, point_period)
+    deviation = 0.0
+    if tolerance is not None:
+        # 只按关节位置简化, 外部轴随保留点取舍
+        indices = simplify(points[:, :width], tolerance)
+        deviation = max_deviation(points[:, :width], indices)
+        points = points[indices]
+    size = write_trajectory_j(file_path, points[:, :width],
+                              points[:, width:] if points.shape[1] > width else None, precision)
+    return {
+        'input_points': input_points,
+        'output_points': len(points),
+        'max_deviation': deviation,
+        'bytes': size,
+    }
@@ -0,0 +1,321 @@
+"""
+20003端口 XML-RPC 连接池
+
+xmlrpc.client.ServerProxy 内部只有一条 HTTP 连接, 多线程同时调用会交错读写同一个套接字, 导致响应错位。
+ServerProxyPool 对外与 ServerProxy 用法一致 (pool.GetForwardKin(...)), 每次调用从池中租用一条
+keep-alive 连接, 调用结束后归还, 不同线程的调用各走各的连接并行执行。
+
+停止类指令 (URGENT_METHODS) 使用独立的紧急通道, 不与普通调用竞争连接, 不会排在慢调用之后;
+紧急通道正被占用时临时新建一条连接发送, 保证停止指令永不等待。
+
+multicall()/pipeline() 供批量提交使用: 多条指令合并为一次 system.multicall 请求,
+控制器不支持 multicall 时在同一连接上连续发送全部请求后再依次读取响应 (HTTP 流水线);
+控制器每个响应后都关闭连接 (不支持流水线) 时改为逐条调用。
+"""
+
+import http.client
+import socket
+import threading
+import urllib.parse
+import xmlrpc.client
+from contextlib import contextmanager
+
+# 走紧急通道的指令
+URGENT_METHODS = frozenset((
+    'StopMotion',
+    'PauseMotion',
+    'ProgramStop',
+    'ProgramPause',
+    'StopJOG',
+    'ImmStopJOG',
+))
+
+# 出现这些异常后连接状态未知, 关闭而不归还
+_BROKEN_ERRORS = (OSError, http.client.HTTPException, xmlrpc.client.ProtocolError)
+
+
+class _SharedReader:
+    """多个 HTTPResponse 共用同一缓冲读取流, 单个响应读完时不关闭底层流"""
+
+    def __init__(self, reader):
+        self._reader = reader
+
+    def makefile(self, mode='rb', *args, **kwargs):
+        return self
+
+    def __getattr__(self, name):
+        return getattr(self._reader, name)
+
+    def close(self):
+        pass
+
+
+class KeepAliveTransport(xmlrpc.client.Transport):
+    """可设置套接字超时的 keep-alive 传输, 连接在多次调用间复用"""
+
+    def __init__(self, timeout=None):
+        super().__init__()
+        self.timeout = timeout
+
+    def make_connection(self, host):
+        conn = super().make_connection(host)
+        if self.timeout is not None:
+            conn.timeout = self.timeout
+        return conn
+
+
+class _PooledMethod:
+    """支持 a.b.c 形式的远程方法名, 与 xmlrpc.client._Method 相同"""
+
+    def __init__(self, pool, name):
+        self._pool = pool
+        self._name = name
+
+    def __getattr__(self, name):
+        return _PooledMethod(self._pool, f"{self._name}.{name}")
+
+    def __call__(self, *args):
+        return self._pool.call(self._name, *args)
+
+
+class ServerProxyPool:
+    """
+    线程安全的 XML-RPC 连接池
+
+    Args:
+        uri: 控制器地址, 如 http://192.168.58.2:20003
+        max_connections: 普通调用的最大连接数, 超出时调用线程等待空闲连接
+        timeout: 套接字超时 (秒), None 为阻塞
+        urgent_methods: 走紧急通道的方法名集合
+    """
+
+    def __init__(self, uri, max_connections=4, timeout=None, urgent_methods=URGENT_METHODS):
+        if max_connections <= 0:
+            raise ValueError("max_connections 必须大于0")
+        self.uri = uri
+        self.max_connections = int(max_connections)
+        self.timeout = timeout
+        self.urgent_methods = frozenset(urgent_methods)
+        self.multicall_supported = True     # 控制器拒绝 system.multicall 后置为 False
+        self.pipeline_supported = True      # 控制器在流水线首个响应后关闭连接时置为 False
+
+        self._idle = []             # 空闲连接 (proxy, transport)
+        self._created = 0           # 普通通道已创建的连接数
+        self._closed = False
+        self._cond = threading.Condition()
+        self._urgent = None
+        self._urgent_lock = threading.Lock()
+
+    def _new_proxy(self):
+        transport = KeepAliveTransport(self.timeout)
+        return xmlrpc.client.ServerProxy(self.uri, transport=transport), transport
+
+    def _acquire(self):
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise ConnectionError("XML-RPC 连接池已关闭")
+                if self._idle:
+                    return self._idle.pop()
+                if self._created < self.max_connections:
+                    self._created += 1
+                    break
+                self._cond.wait()
+        try:
+            return self._new_proxy()
+        except Exception:
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, conn, broken=False):
+        with self._cond:
+            if broken or self._closed:
+                conn[1].close()
+                self._created -= 1
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def lease(self):
+        """
+        租用一条连接供连续多次调用, 期间该连接由当前线程独占
+
+        示例:
+            with robot.robot.lease() as proxy:
+                proxy.SetSpeed(20)
+                proxy.MoveJ(...)
+        """
+        conn = self._acquire()
+        broken = False
+        try:
+            yield conn[0]
+        except _BROKEN_ERRORS:
+            broken = True
+            raise
+        finally:
+            self._release(conn, broken)
+
+    def call(self, method, *params):
+        """调用远程方法, 停止类指令走紧急通道"""
+        if method in self.urgent_methods:
+            return self._call_urgent(method, *params)
+        with self.lease() as proxy:
+            return getattr(proxy, method)(*params)
+
+    def _call_urgent(self, method, *params):
+        if self._closed:
+            raise ConnectionError("XML-RPC 连接池已关闭")
+        if not self._urgent_lock.acquire(blocking=False):
+            # 另一条停止指令正在发送, 用一次性连接, 不排队
+            proxy, transport = self._new_proxy()
+            try:
+                return getattr(proxy, method)(*params)
+            finally:
+                transport.close()
+        try:
+            if self._urgent is None:
+                self._urgent = self._new_proxy()
+            try:
+                return getattr(self._urgent[0], method)(*params)
+            except _BROKEN_ERRORS:
+                self._urgent[1].close()
+                self._urgent = None
+                raise
+        finally:
+            self._urgent_lock.release()
+
+    def multicall(self, calls):
+        """
+        以一次 system.multicall 请求执行多条指令
+
+        Args:
+            calls: [(method, params), ...]
+
+        Returns:
+            与 calls 一一对应的结果列表, 失败的指令对应 xmlrpc.client.Fault 实例
+
+        Raises:
+            xmlrpc.client.Fault: 控制器不支持 system.multicall
+        """
+        request = [{'methodName': method, 'params': list(params)} for method, params in calls]
+        results = []
+        for item in self.call('system.multicall', request):
+            if isinstance(item, dict):
+                results.append(xmlrpc.client.Fault(item.get('faultCode', -1), item.get('faultString', '')))
+            else:
+                results.append(item[0])
+        return results
+
+    def pipeline(self, calls):
+        """
+        HTTP 流水线: 在一条新连接上一次性发送全部请求, 再按顺序读取响应
+
+        控制器在完整响应后声明关闭连接 (Connection: close, 如 HTTP/1.0 服务端) 时其余请求未被读取,
+        改为逐条调用发送剩余指令, 并置 pipeline_supported = False, 之后的批量直接逐条调用。
+        控制器在中途断开连接时只返回已收到响应的部分; 其余指令可能已被执行, 是否重发由调用者决定。
+
+        Args:
+            calls: [(method, params), ...]
+
+        Returns:
+            已执行指令的结果列表 (长度可能小于 calls), 失败的指令对应 xmlrpc.client.Fault 实例
+        """
+        if not self.pipeline_supported:
+            return self.sequential(calls)
+
+        url = urllib.parse.urlsplit(self.uri)
+        handler = url.path or '/RPC2'
+        host = url.netloc
+        requests = []
+        for method, params in calls:
+            body = xmlrpc.client.dumps(tuple(params), method).encode('utf-8')
+            header = (f"POST {handler} HTTP/1.1\r\nHost: {host}\r\nUser-Agent: {xmlrpc.client.Transport.user_agent}\r\n"
+                      f"Content-Type: text/xml\r\nContent-Length: {len(body)}\r\n\r\n")
+            requests.append(header.encode('ascii') + body)
+
+        results = []
+        closed = False
+        with socket.create_connection((url.hostname, url.port or 80), timeout=self.timeout) as sock, \
+                sock.makefile('rb') as stream:
+            sock.sendall(b"".join(requests))
+            reader = _SharedReader(stream)
+            for _ in calls:
+                response = http.client.HTTPResponse(reader)
+                try:
+                    response.begin()
+                except (http.client.RemoteDisconnected, ConnectionError):
+                    break
+                body = response.read()
+                if response.status != 200:
+                    raise xmlrpc.client.ProtocolError(host + handler, response.status, response.reason,
+                                                      response.msg)
+                try:
+                    results.append(xmlrpc.client.loads(body)[0][0])
+                except xmlrpc.client.Fault as fault:
+                    results.append(fault)
+                if response.will_close:
+                    closed = True
+                    break
+        if closed and len(results) < len(calls):
+            # 控制器读完一个请求就关闭连接, 其余请求未被读取, 可以安全地逐条重发
+            self.pipeline_supported = False
+            results += self.sequential(calls[len(results):])
+        return results
+
+    def sequential(self, calls):
+        """
+        逐条调用多条指令 (控制器不支持流水线时使用)
+
+        Args:
+            calls: [(method, params), ...]
+
+        Returns:
+            与 pipeline() 相同; 连接断开时只返回已收到响应的部分
+        """
+        results = []
+        for method, params in calls:
+            try:
+                results.append(self.call(method, *params))
+            except xmlrpc.client.Fault as fault:
+                results.append(fault)
+            except (OSError, http.client.HTTPException):
+                break
+        return results
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return _PooledMethod(self, name)
+
+    def reset(self):
+        """丢弃全部空闲连接 (控制器重启/重连后旧连接已失效), 连接池继续可用"""
+        with self._cond:
+            for _, transport in self._idle:
+                transport.close()
+            self._created -= len(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        with self._urgent_lock:
+            if self._urgent is not None:
+                self._urgent[1].close()
+                self._urgent = None
+
+    def close(self):
+        """关闭全部空闲连接; 正在使用的连接归还时关闭"""
+        with self._cond:
+            self._closed = True
+            for _, transport in self._idle:
+                transport.close()
+            self._created -= len(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        with self._urgent_lock:
+            if self._urgent is not None:
+                self._urgent[1].close()
+                self._urgent = None
+
+    def __repr__(self):
+        return f"<ServerProxyPool for {self.uri}>"
@@ -24,6 +24,7 @@ sys.path.insert(0, fr3_control_path)
 try:
     import fairino
     from fairino import Robot
+    from fairino.collision import DualArmCollisionModel, ROBOT_STRUCTURE, arm_bases
     FR3_AVAILABLE = True
     print("✅ FR3库导入成功")
 except ImportError as e:
@@ -56,10 +57,21 @@ class DualArmSafetyTest:
         self.right_initial_pose: List[float] = []
         
         # 安全参数
-        self.safety_distance_threshold = 300.0  # 300mm安全距离
         self.collision_response_time = 0.1      # 100ms响应时间要求
         self.motion_velocity = 15               # 缓慢运动速度
         
+        # 安全间隙阈值 (双臂运动连杆胶囊体表面间隙, 不是末端距离):
+        # 胶囊体已包络连杆外形, 阈值只需覆盖响应时间内两臂相向运动的距离与包络误差
+        self.max_tcp_speed = 1000.0             # 100%速度时末端线速度 (mm/s, 估算)
+        self.envelope_tolerance = 50.0          # 胶囊体包络与实际外形的偏差 (mm)
+        approach_speed = 2 * self.max_tcp_speed * self.motion_velocity / 100
+        self.safety_distance_threshold = approach_speed * self.collision_response_time + self.envelope_tolerance  # 80mm
+        
+        # 胶囊体模型未通过控制器正解校验时, 回退为原始的双臂末端距离判据
+        self.tcp_distance_threshold = 300.0     # 300mm末端安全距离
+        self.model_tolerance = 5.0              # 模型正解与控制器末端位置的允许偏差 (mm)
+        self.collision_model_valid = False
+        
         # 双臂配置
         self.chest_width = 400.0
         
@@ -71,6 +83,13 @@ class DualArmSafetyTest:
         else:
             self.safety_model = None
         
+        # 胶囊体碰撞模型 (安全模型不可用时使用), 基座间距与 chest_width 一致
+        if FR3_AVAILABLE:
+            left_base, right_base = arm_bases(dict(ROBOT_STRUCTURE, base_separation=self.chest_width))
+            self.collision_model = DualArmCollisionModel(left_base=left_base, right_base=right_base)
+        else:
+            self.collision_model = None
+        
         # 紧急停止标志
         self.emergency_stop_flag = False
         
@@ -136,9 +155,12 @@ class DualArmSafetyTest:
             self.logger.info(f"  左臂: X={self.left_initial_pose[0]:.1f}, Y={self.left_initial_pose[1]:.1f}, Z={self.left_initial_pose[2]:.1f}")
             self.logger.info(f"  右臂: X={self.right_initial_pose[0]:.1f}, Y={self.right_initial_pose[1]:.1f}, Z={self.right_initial_pose[2]:.1f}")
             
-            # 计算初始距离
-            initial_distance = math.sqrt(sum((self.left_initial_pose[i] - self.right_initial_pose[i])**2 for i in range(3)))
-            self.logger.info(f"  初始末端距离: {initial_distance:.1f}mm")
+            # 校验胶囊体模型后计算初始距离
+            self.validate_collision_model()
+            initial_distance = self.calculate_arm_distance()
+            self.logger.info(f"  初始末端距离: {self.calculate_tcp_distance():.1f}mm")
+            if self.collision_model_valid:
+                self.logger.info(f"  初始连杆间最小距离: {initial_distance:.1f}mm")
             
             return True
             
@@ -146,23 +168,109 @@ class DualArmSafetyTest:
             self.logger.error(f"记录初始位置失败: {e}")
             return False
     
-    def calculate_arm_distance(self) -> float:
-        """计算双臂末端距离"""
+    def validate_collision_model(self) -> bool:
+        """用控制器正解校验胶囊体模型 (两臂当前关节角下模型末端位置与 GetForwardKin 一致才使用连杆间隙判据)"""
+        self.collision_model_valid = False
+        if self.collision_model is None:
+            self.logger.warning("胶囊体模型不可用，使用末端距离判据")
+            return False
+        
         try:
-            left_pos = [self.left_robot.robot_state_pkg.tl_cur_pos[i] for i in range(3)]
-            right_pos = [self.right_robot.robot_state_pkg.tl_cur_pos[i] for i in range(3)]
+            for name, robot in (('左臂', self.left_robot), ('右臂', self.right_robot)):
+                joints = [robot.robot_state_pkg.jt_cur_pos[i] for i in range(6)]
+                result = robot.GetForwardKin(joints)
+                if not isinstance(result, tuple) or result[0] != 0:
+                    self.logger.warning(f"{name}控制器正解失败 ({result})，使用末端距离判据")
+                    return False
+                
+                error = self.model_position_error(joints, result[1])
+                if error > self.model_tolerance:
+                    self.logger.warning(f"{name}胶囊体模型与控制器正解偏差 {error:.1f}mm，使用末端距离判据")
+                    return False
             
-            distance = math.sqrt(sum((left_pos[i] - right_pos[i])**2 for i in range(3)))
+            self.collision_model_valid = True
+            self.logger.info("胶囊体模型与控制器正解一致，使用连杆间隙判据")
+            
+        except Exception as e:
+            self.logger.error(f"胶囊体模型校验失败: {e}")
+        
+        return self.collision_model_valid
+    
+    def model_position_error(self, joints: List[float], pose: List[float]) -> float:
+        """胶囊体模型正解与给定末端位置 (控制器正解或上报位姿) 的最大坐标偏差 (mm)"""
+        model_pose = self.collision_model.model.forward_pose(joints)
+        return max(abs(model_pose[i] - pose[i]) for i in range(3))
+    
+    @property
+    def distance_threshold(self) -> float:
+        """当前距离判据的阈值: 模型可信时为连杆间隙阈值, 否则为末端距离阈值"""
+        return self.safety_distance_threshold if self.collision_model_valid else self.tcp_distance_threshold
+    
+    def calculate_tcp_distance(self) -> float:
+        """计算双臂末端距离"""
+        left_pos = [self.left_robot.robot_state_pkg.tl_cur_pos[i] for i in range(3)]
+        right_pos = [self.right_robot.robot_state_pkg.tl_cur_pos[i] for i in range(3)]
+        
+        return math.sqrt(sum((left_pos[i] - right_pos[i])**2 for i in range(3)))
+    
+    def calculate_arm_distance(self) -> float:
+        """
+        计算双臂距离: 模型可信时为运动连杆间最小间隙 (胸部坐标系, 不含固定的基座连杆), 否则为末端距离
+        每次都用控制器上报的末端位置交叉校验模型, 偏差超限即回退为末端距离判据
+        """
+        try:
+            tcp_distance = self.calculate_tcp_distance()
+            if not self.collision_model_valid:
+                return tcp_distance
+            
+            joints = []
+            for name, robot in (('左臂', self.left_robot), ('右臂', self.right_robot)):
+                state = robot.robot_state_pkg
+                arm_joints = [state.jt_cur_pos[i] for i in range(6)]
+                error = self.model_position_error(arm_joints, state.tl_cur_pos)
+                if error > self.model_tolerance:
+                    self.logger.warning(f"{name}胶囊体模型与控制器末端位置偏差 {error:.1f}mm，回退为末端距离判据")
+                    self.collision_model_valid = False
+                    return tcp_distance
+                joints.append(arm_joints)
+            
+            distance = float(self.collision_model.arm_clearance(joints[0], joints[1])[0])
             return distance
             
         except Exception as e:
             self.logger.error(f"计算距离失败: {e}")
             return float('inf')
     
+    def predict_arm_distance(self, left_target: List[float], right_target: List[float]) -> Optional[float]:
+        """
+        预测双臂到达目标位姿后的距离 (判据同 calculate_arm_distance), 任一目标无逆解时返回 None
+        关节角由控制器逆解 (参考当前关节位置) 求得, 模型正解与目标位置不一致时回退为末端距离判据
+        """
+        tcp_distance = math.sqrt(sum((left_target[i] - right_target[i])**2 for i in range(3)))
+        if not self.collision_model_valid:
+            return tcp_distance
+        
+        joints = []
+        for name, robot, target in (('左臂', self.left_robot, left_target), ('右臂', self.right_robot, right_target)):
+            current = [robot.robot_state_pkg.jt_cur_pos[i] for i in range(6)]
+            result = robot.GetInverseKinRef(0, target, current)
+            if not isinstance(result, tuple) or result[0] != 0:
+                self.logger.warning(f"{name}目标位姿无逆解 ({result})")
+                return None
+            
+            error = self.model_position_error(result[1], target)
+            if error > self.model_tolerance:
+                self.logger.warning(f"{name}胶囊体模型与控制器逆解偏差 {error:.1f}mm，回退为末端距离判据")
+                self.collision_model_valid = False
+                return tcp_distance
+            joints.append(result[1])
+        
+        return float(self.collision_model.arm_clearance(joints[0], joints[1])[0])
+    
     def check_collision_with_safety_model(self) -> Tuple[bool, str]:
         """使用安全模型检查碰撞"""
         if not self.safety_model:
-            return False, "安全模型不可用"
+            return self.check_collision_with_capsules()
         
         try:
             # 获取当前关节角度（转换为弧度）
@@ -180,6 +288,30 @@ class DualArmSafetyTest:
         except Exception as e:
             return False, f"安全模型检查异常: {str(e)}"
     
+    def check_collision_with_capsules(self) -> Tuple[bool, str]:
+        """使用胶囊体模型检查双臂、机身与自身连杆碰撞 (模型未通过校验时按末端距离判断)"""
+        if not self.collision_model_valid:
+            try:
+                distance = self.calculate_tcp_distance()
+                return distance < self.tcp_distance_threshold, f"末端距离 {distance:.1f}mm (胶囊体模型未通过校验)"
+            except Exception as e:
+                return False, f"末端距离检查异常: {str(e)}"
+        
+        try:
+            left_joints = [self.left_robot.robot_state_pkg.jt_cur_pos[i] for i in range(6)]
+            right_joints = [self.right_robot.robot_state_pkg.jt_cur_pos[i] for i in range(6)]
+            
+            result = self.collision_model.check(left_joints, right_joints, threshold=self.safety_distance_threshold)
+            pair = ' / '.join(result['pair'])
+            
+            if result['collision']:
+                return True, f"胶囊体模型检测到碰撞风险: {pair} 间隙 {result['min_clearance']:.1f}mm"
+            else:
+                return False, f"胶囊体模型检查通过: 最小间隙 {result['min_clearance']:.1f}mm ({pair})"
+                
+        except Exception as e:
+            return False, f"胶囊体模型检查异常: {str(e)}"
+    
     def emergency_stop_both_arms(self) -> bool:
         """紧急停止双臂"""
         try:
@@ -208,13 +340,13 @@ class DualArmSafetyTest:
         self.logger.info("="*50)
         
         try:
-            # 测试多种距离阈值
-            test_distances = [500, 400, 300, 200, 150]  # 从远到近
+            # 测试多种间隙阈值 (安全间隙阈值的倍数)
+            test_distances = [self.distance_threshold * k for k in (2.5, 2.0, 1.5, 1.0, 0.5)]  # 从远到近
             
             static_results = []
             
             for threshold in test_distances:
-                self.logger.info(f"\n测试安全距离阈值: {threshold}mm")
+                self.logger.info(f"\n测试安全距离阈值: {threshold:.0f}mm")
                 
                 # 计算当前距离
                 current_distance = self.calculate_arm_distance()
@@ -241,14 +373,14 @@ class DualArmSafetyTest:
                 self.logger.info(f"  安全状态: {safety_message}")
                 
                 if collision_detected:
-                    self.logger.warning(f"  在{threshold}mm阈值下检测到碰撞风险!")
+                    self.logger.warning(f"  在{threshold:.0f}mm阈值下检测到碰撞风险!")
             
             self.test_results['static_safety'] = static_results
             
             # 评估结果
             current_distance = static_results[0]['current_distance']
-            if current_distance > self.safety_distance_threshold:
-                self.logger.info(f"[OK] 静态安全距离测试通过 ({current_distance:.1f}mm > {self.safety_distance_threshold}mm)")
+            if current_distance > self.distance_threshold:
+                self.logger.info(f"[OK] 静态安全距离测试通过 ({current_distance:.1f}mm > {self.distance_threshold:.0f}mm)")
                 return True
             else:
                 self.logger.warning(f"[WARNING] 当前距离可能过近 ({current_distance:.1f}mm)")
@@ -281,19 +413,25 @@ class DualArmSafetyTest:
             self.logger.info(f"  右臂目标: X={right_target[0]:.1f}, Y={right_target[1]:.1f}, Z={right_target[2]:.1f}")
             
             # 预测接近后的距离
-            predicted_distance = math.sqrt(sum((left_target[i] - right_target[i])**2 for i in range(3)))
-            self.logger.info(f"  预测接近后距离: {predicted_distance:.1f}mm")
+            predicted_distance = self.predict_arm_distance(left_target, right_target)
+            if predicted_distance is not None:
+                self.logger.info(f"  预测接近后距离: {predicted_distance:.1f}mm")
             
             # 安全检查
-            if predicted_distance < self.safety_distance_threshold:
-                self.logger.warning(f"[WARNING] 预测距离过近，调整运动范围")
+            if predicted_distance is None or predicted_distance < self.distance_threshold:
+                self.logger.warning(f"[WARNING] {'目标位姿无逆解' if predicted_distance is None else '预测距离过近'}，调整运动范围")
                 # 减少移动距离
                 left_target[1] = self.left_initial_pose[1] - 30
                 right_target[1] = self.right_initial_pose[1] + 30
-                predicted_distance = math.sqrt(sum((left_target[i] - right_target[i])**2 for i in range(3)))
-                self.logger.info(f"  调整后预测距离: {predicted_distance:.1f}mm")
+                predicted_distance = self.predict_arm_distance(left_target, right_target)
+                if predicted_distance is not None:
+                    self.logger.info(f"  调整后预测距离: {predicted_distance:.1f}mm")
             
-            if predicted_distance < self.safety_distance_threshold:
+            if predicted_distance is None:
+                self.logger.error("[FAILED] 接近目标无逆解")
+                return False
+            
+            if predicted_distance < self.distance_threshold:
                 self.logger.error("[FAILED] 无法设计安全的接近运动")
                 return False
             
@@ -318,7 +456,7 @@ class DualArmSafetyTest:
                         approach_results.append(monitor_result)
                         
                         # 检查是否需要紧急停止
-                        if collision_detected or current_distance < self.safety_distance_threshold:
+                        if collision_detected or current_distance < self.distance_threshold:
                             self.logger.warning(f"安全阈值触发! 距离: {current_distance:.1f}mm")
                             self.emergency_stop_both_arms()
                             break
@@ -389,7 +527,7 @@ class DualArmSafetyTest:
                     'monitoring_data': approach_results
                 }
                 
-                if motion_completed and final_distance > self.safety_distance_threshold:
+                if motion_completed and final_distance > self.distance_threshold:
                     self.logger.info(f"[OK] 动态接近测试完成，最终距离: {final_distance:.1f}mm")
                     success = True
                 else:
@@ -435,7 +573,7 @@ class DualArmSafetyTest:
                 collision_detected, safety_message = self.check_collision_with_safety_model()
                 
                 # 如果检测到问题，模拟紧急停止
-                if collision_detected or current_distance < self.safety_distance_threshold * 1.5:
+                if collision_detected or current_distance < self.distance_threshold * 1.5:
                     stop_start = time.time()
                     
                     # 模拟停止命令（不实际执行）
@@ -537,11 +675,21 @@ class DualArmSafetyTest:
                 ]
                 
                 # 安全检查目标位置
-                target_distance = math.sqrt(sum((left_target[i] - right_target[i])**2 for i in range(3)))
+                target_distance = self.predict_arm_distance(left_target, right_target)
+                
+                if target_distance is None:
+                    self.logger.error(f"  [FAILED] 目标位姿无逆解")
+                    pose_results.append({
+                        'name': pose['name'],
+                        'target_distance': None,
+                        'ik_failed': True,
+                        'reason': '目标位姿无逆解'
+                    })
+                    continue
                 
                 self.logger.info(f"  预测距离: {target_distance:.1f}mm")
                 
-                if target_distance < self.safety_distance_threshold:
+                if target_distance < self.distance_threshold:
                     self.logger.warning(f"  [SKIP] 目标距离过近，跳过运动测试")
                     pose_results.append({
                         'name': pose['name'],
@@ -571,7 +719,7 @@ class DualArmSafetyTest:
                             'collision_detected': collision_detected,
                             'safety_message': safety_message,
                             'distance_error': abs(actual_distance - target_distance),
-                            'safe': not collision_detected and actual_distance > self.safety_distance_threshold
+                            'safe': not collision_detected and actual_distance > self.distance_threshold
                         }
                         
                         self.logger.info(f"  实际距离: {actual_distance:.1f}mm")
@@ -653,7 +801,10 @@ class DualArmSafetyTest:
         self.logger.info(f"测试ID: {self.test_id}")
         self.logger.info(f"左臂IP: {self.left_ip}")
         self.logger.info(f"右臂IP: {self.right_ip}")
-        self.logger.info(f"安全距离阈值: {self.safety_distance_threshold}mm")
+        if self.collision_model_valid:
+            self.logger.info(f"安全间隙阈值: {self.safety_distance_threshold:.0f}mm (连杆间隙)")
+        else:
+            self.logger.info(f"安全距离阈值: {self.tcp_distance_threshold:.0f}mm (末端距离, 胶囊体模型未通过校验)")
         self.logger.info(f"响应时间要求: {self.collision_response_time*1000:.0f}ms")
         self.logger.info(f"测试时间: {time.strftime('%Y-%m-%d %H:%M:%S')}")
         
@@ -23,6 +23,7 @@ sys.path.insert(0, fr3_control_path)
 try:
     import fairino
     from fairino import Robot
+    from fairino.kinematics import ArmKinematics, interpolate_line, interpolate_arc
     FR3_AVAILABLE = True
     print("✅ FR3库导入成功")
 except ImportError as e:
@@ -59,6 +60,11 @@ class CartesianMotionTest:
         self.chest_width = 400.0  # 胸部宽度：400mm
         self.arm_base_distance = 200.0  # 单臂距离中心：200mm
         
+        # 本地运动学模型: 与控制器正解一致才用路径逆解结果拦截运动, 否则只记录
+        self.kinematics = ArmKinematics() if FR3_AVAILABLE else None
+        self.kinematics_tolerance = 1.0  # 模型正解与控制器的允许位置偏差 (mm)
+        self.path_ik_gate = False
+        
         # 工作空间限制
         self.workspace_limits = {
             'x_min': -600, 'x_max': 600,
@@ -119,6 +125,7 @@ class CartesianMotionTest:
             if hasattr(self.robot, 'robot_state_pkg'):
                 self.initial_tcp_pose = [self.robot.robot_state_pkg.tl_cur_pos[i] for i in range(6)]
                 self.logger.info(f"初始TCP位姿: X={self.initial_tcp_pose[0]:.1f}, Y={self.initial_tcp_pose[1]:.1f}, Z={self.initial_tcp_pose[2]:.1f}")
+                self.validate_kinematics()
                 return True
             return False
         except Exception as e:
@@ -248,6 +255,56 @@ class CartesianMotionTest:
         
         return True, "安全检查通过"
     
+    def validate_kinematics(self) -> bool:
+        """用控制器正解 (GetForwardKin) 与上报的TCP位姿校验本地运动学模型, 通过后路径逆解检查才会拦截运动"""
+        self.path_ik_gate = False
+        try:
+            joints = [self.robot.robot_state_pkg.jt_cur_pos[i] for i in range(6)]
+            result = self.robot.GetForwardKin(joints)
+            if not isinstance(result, tuple) or result[0] != 0:
+                self.logger.warning(f"控制器正解失败 ({result})，路径逆解检查仅记录")
+                return False
+            
+            model_pose = self.kinematics.forward_pose(joints)
+            error = max(max(abs(model_pose[i] - result[1][i]) for i in range(3)),
+                        max(abs(model_pose[i] - self.initial_tcp_pose[i]) for i in range(3)))
+            if error > self.kinematics_tolerance:
+                self.logger.warning(f"本地运动学模型与控制器偏差 {error:.1f}mm，路径逆解检查仅记录")
+                return False
+            
+            self.path_ik_gate = True
+            self.logger.info(f"本地运动学模型与控制器一致 (偏差 {error:.3f}mm)")
+        except Exception as e:
+            self.logger.warning(f"本地运动学模型校验失败: {e}，路径逆解检查仅记录")
+        
+        return self.path_ik_gate
+    
+    def check_path_ik(self, poses) -> Tuple[bool, str]:
+        """
+        本地逐点逆解整条笛卡尔路径, 检查路径上每一点可达且关节连续
+        本地模型未通过 validate_kinematics 校验时只记录结果, 不拦截运动
+        
+        Args:
+            poses: (N, 6) 路径位姿, 由 interpolate_line/interpolate_arc 离散得到
+        """
+        seed = [self.robot.robot_state_pkg.jt_cur_pos[i] for i in range(6)]
+        start_time = time.time()
+        joints, residual, converged, iterations = self.kinematics.inverse_path(poses, seed)
+        elapsed = time.time() - start_time
+        
+        max_jump = float(np.abs(np.diff(joints, axis=0)).max()) if len(joints) > 1 else 0.0
+        self.logger.info(f"路径逆解: {len(poses)} 点, 耗时 {elapsed * 1000:.1f}ms, "
+                         f"平均迭代 {iterations.mean():.1f} 次, 最大残差 {residual[:, 0].max():.4f}mm/"
+                         f"{residual[:, 1].max():.4f}°, 相邻点最大关节变化 {max_jump:.2f}°")
+        if not converged.all():
+            index = int(np.argmin(converged))
+            message = f"路径第 {index} 点逆解未收敛 (残差 {residual[index, 0]:.2f}mm)"
+            if not self.path_ik_gate:
+                self.logger.warning(f"{message}，本地模型未通过校验，不拦截运动")
+                return True, message
+            return False, message
+        return True, "路径逆解通过"
+    
     def test_linear_motion(self, motion_params: Dict[str, Any]) -> bool:
         """测试直线运动"""
         self.logger.info("\n" + "="*50)
@@ -277,6 +334,12 @@ class CartesianMotionTest:
                 self.logger.error(f"[FAILED] 安全检查失败: {message}")
                 return False
             
+            # 路径逆解检查
+            ok, message = self.check_path_ik(interpolate_line(self.initial_tcp_pose, target_pose))
+            if not ok:
+                self.logger.error(f"[FAILED] {message}")
+                return False
+            
             # 执行运动
             self.logger.info("执行MoveL直线运动...")
             start_time = time.time()
@@ -361,6 +424,12 @@ class CartesianMotionTest:
                     self.logger.error(f"[FAILED] 圆弧点P{i+2}安全检查失败: {message}")
                     return False
             
+            # 路径逆解检查
+            ok, message = self.check_path_ik(interpolate_arc(p1, p2, p3))
+            if not ok:
+                self.logger.error(f"[FAILED] {message}")
+                return False
+            
             self.logger.info(f"圆弧运动路径:")
             self.logger.info(f"  P1 (起点): X={p1[0]:.1f}, Y={p1[1]:.1f}, Z={p1[2]:.1f}")
             self.logger.info(f"  P2 (中点): X={p2[0]:.1f}, Y={p2[1]:.1f}, Z={p2[2]:.1f}")
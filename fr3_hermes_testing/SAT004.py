@@ -23,6 +23,7 @@ sys.path.insert(0, fr3_control_path)
 try:
     import fairino
     from fairino import Robot
+    from fairino.reachability import load_reachability_map
     FR3_AVAILABLE = True
     print("✅ FR3库导入成功")
 except ImportError as e:
@@ -53,6 +54,7 @@ class WorkspaceTest:
         # FR3机械臂规格参数
         self.max_reach = 630.0  # FR3最大臂展 630mm
         self.min_reach = 100.0  # 最小工作半径
+        self.cloud_resolution = 20.0  # 工作空间云图采样间距 (mm)
         
         # 双臂配置参数
         self.chest_width = 400.0
@@ -366,58 +368,49 @@ class WorkspaceTest:
         self.logger.info("工作空间云图生成")
         self.logger.info("="*50)
         
-        cloud_points = []
+        # 可达性体素地图 (首次运行时构建并缓存, 之后直接内存映射打开)
+        start_time = time.time()
+        reach_map = load_reachability_map()
+        self.logger.info(f"可达性地图: {reach_map.key}, 分辨率 {reach_map.resolution:.0f}mm, "
+                         f"可达体积 {reach_map.volume():.3f} 立方米, 耗时 {time.time() - start_time:.2f}秒")
         
         # 生成规则网格点进行采样
-        x_range = np.linspace(-400, 600, 10)
-        y_range = np.linspace(-600, 600, 10) 
-        z_range = np.linspace(-400, 200, 6)
+        x_range = np.arange(-400, 600 + 1e-9, self.cloud_resolution)
+        y_range = np.arange(-600, 600 + 1e-9, self.cloud_resolution)
+        z_range = np.arange(-400, 200 + 1e-9, self.cloud_resolution)
+        grid = np.stack(np.meshgrid(x_range, y_range, z_range, indexing='ij'), axis=-1).reshape(-1, 3)
+        self.logger.info(f"采样点总数: {len(grid)}")
         
-        total_samples = len(x_range) * len(y_range) * len(z_range)
-        self.logger.info(f"采样点总数: {total_samples}")
+        # 应用双臂安全约束: 右臂不应进入左侧区域, 左臂不应进入右侧区域
+        if self.arm_name == "right":
+            grid = grid[grid[:, 1] <= -50]
+        else:
+            grid = grid[grid[:, 1] >= 50]
         
-        sample_count = 0
-        reachable_count = 0
+        # 批量查询可达性
+        start_time = time.time()
+        reachable = reach_map.reachable(grid)
+        query_time = time.time() - start_time
+        reachable_count = int(reachable.sum())
         
-        for x in x_range:
-            for y in y_range:
-                for z in z_range:
-                    sample_count += 1
-                    
-                    # 应用双臂安全约束
-                    if self.arm_name == "right" and y > -50:
-                        continue  # 右臂不应进入左侧区域
-                    if self.arm_name == "left" and y < 50:
-                        continue  # 左臂不应进入右侧区域
-                    
-                    # 快速可达性检查（仅逆运动学）
-                    ik_success, _, _ = self.test_inverse_kinematics([x, y, z])
-                    
-                    point_data = {
-                        'position': [x, y, z],
-                        'reachable': ik_success
-                    }
-                    cloud_points.append(point_data)
-                    
-                    if ik_success:
-                        reachable_count += 1
-                    
-                    # 进度报告
-                    if sample_count % 100 == 0:
-                        progress = sample_count / total_samples * 100
-                        self.logger.info(f"采样进度: {progress:.1f}% ({sample_count}/{total_samples})")
+        cloud_points = [
+            {'position': position, 'reachable': bool(flag)}
+            for position, flag in zip(grid.tolist(), reachable.tolist())
+        ]
         
         workspace_volume = reachable_count / len(cloud_points) * 100
         self.logger.info(f"\n工作空间统计:")
         self.logger.info(f"  总采样点: {len(cloud_points)}")
         self.logger.info(f"  可达点: {reachable_count}")
         self.logger.info(f"  工作空间覆盖率: {workspace_volume:.1f}%")
+        self.logger.info(f"  查询耗时: {query_time * 1000:.1f}ms")
         
         self.test_results['workspace_cloud'] = {
             'points': cloud_points,
             'total_samples': len(cloud_points),
             'reachable_count': reachable_count,
-            'coverage_rate': workspace_volume
+            'coverage_rate': workspace_volume,
+            'reachability_map': reach_map.key
         }
         
         return True
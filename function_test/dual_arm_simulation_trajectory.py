@@ -288,6 +288,25 @@ class DualArmTrajectoryGenerator:
         print(f"轨迹数据已导出到: {filepath}")
         return filepath
     
+    def export_trajectory_j(self, directory=None, point_period=0.1, period=0.008, tolerance=None):
+        """导出控制器轨迹J文件 (可用 TrajectoryJUpLoad 上传)，重采样到控制器周期，可选按偏差简化"""
+        from fr3_control.fairino.trajectory_builder import build_trajectory_j
+        
+        if directory is None:
+            directory = current_dir
+        
+        files = {}
+        for arm, trajectory in (("left", self.left_arm_trajectory), ("right", self.right_arm_trajectory)):
+            if not trajectory:
+                continue
+            filepath = os.path.join(directory, f"{arm}_arm_trajectoryJ.txt")
+            stats = build_trajectory_j(filepath, trajectory, point_period=point_period, period=period,
+                                       tolerance=tolerance)
+            print(f"{arm}臂轨迹J文件: {filepath} ({stats['input_points']} -> {stats['output_points']}点, "
+                  f"{stats['bytes']}字节, 最大偏差 {stats['max_deviation']:.3f}°)")
+            files[arm] = filepath
+        return files
+    
     def visualize_trajectory_summary(self):
         """显示轨迹摘要信息"""
         print("\\n=== 双臂轨迹摘要 ===")
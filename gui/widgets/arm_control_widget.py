@@ -19,8 +19,14 @@ class ArmControlWidget(QWidget):
         super().__init__()
         self.current_arm = None
         self.is_connected = False
+        self.jog_session = None  # 点动会话 (fairino JogSession)，连接后由 robot.EnableJogSession() 创建
         self.setup_ui()
         
+        # 按住点动按钮期间定时保活，松开事件丢失时会话超时立即停止
+        self.jog_keepalive_timer = QTimer(self)
+        self.jog_keepalive_timer.setInterval(100)
+        self.jog_keepalive_timer.timeout.connect(self.keepalive_jog)
+        
     def setup_ui(self):
         """设置界面"""
         layout = QVBoxLayout(self)
@@ -196,6 +202,7 @@ class ArmControlWidget(QWidget):
                 #     self.robot = Robot.RPC('192.168.58.2')
                 # elif self.current_arm == "left":
                 #     self.robot = Robot.RPC('192.168.58.3')
+                # _, self.jog_session = self.robot.EnableJogSession()
                 
                 # 模拟连接成功
                 self.is_connected = True
@@ -207,6 +214,10 @@ class ArmControlWidget(QWidget):
             except Exception as e:
                 self.log_message.emit(f"连接失败: {e}", "ERROR")
         else:
+            self.jog_keepalive_timer.stop()
+            if self.jog_session is not None:
+                self.jog_session.close()
+                self.jog_session = None
             self.is_connected = False
             self.connect_btn.setText("连接")
             self.status_label.setText("未连接")
@@ -278,15 +289,28 @@ class ArmControlWidget(QWidget):
         dir_text = "正向" if direction > 0 else "负向"
         self.log_message.emit(f"J{joint+1} {dir_text}点动 (速度: {speed}%)", "INFO")
         
-        # 这里添加实际的点动逻辑
+        if self.jog_session is not None:
+            # 快速连续点按由会话合并为最新一次点动并限速发送
+            self.jog_session.jog(joint + 1, direction, vel=speed)
+            self.jog_keepalive_timer.start()
+    
+    def keepalive_jog(self):
+        """按住点动按钮期间续期保活"""
+        if self.jog_session is not None:
+            self.jog_session.keepalive()
     
     def stop_jog(self):
         """停止点动"""
         if not self.is_connected:
             return
         
+        self.jog_keepalive_timer.stop()
+        if self.jog_session is not None:
+            self.jog_session.stop()
+            latency = self.jog_session.latency()
+            self.log_message.emit(f"停止点动 (指令往返: {latency['last_ms']:.1f} ms)", "INFO")
+            return
         self.log_message.emit("停止点动", "INFO")
-        # 这里添加停止点动逻辑
     
     def execute_coordination(self):
         """执行双臂协调动作"""
@@ -5,9 +5,17 @@ FR3机械臂运动学模型
 实现正向运动学和逆运动学计算
 """
 
+import os
+import sys
 import numpy as np
 import math
 
+# 批量正解使用 fr3_control/fairino 的向量化实现
+fr3_control_path = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'fr3_control'))
+if fr3_control_path not in sys.path:
+    sys.path.append(fr3_control_path)
+from fairino.kinematics import dh_chain, matrices_to_poses
+
 class FR3Kinematics:
     """FR3机械臂运动学类"""
     
@@ -90,6 +98,23 @@ class FR3Kinematics:
             'joint_transforms': transforms
         }
     
+    def forward_kinematics_batch(self, joint_angles_deg, link_frames=False):
+        """批量正向运动学：(N, 6) 关节角度一次计算全部末端位姿 (工作空间扫描、轨迹预览)"""
+        a, alpha, d, theta_offset = np.asarray(self.dh_params, dtype=float).T
+        theta = np.radians(np.asarray(joint_angles_deg, dtype=float)) + theta_offset
+        frames = dh_chain(theta, alpha, a, d, modified=False, link_frames=link_frames)
+        T = frames[:, -1] if link_frames else frames
+        poses = matrices_to_poses(T)
+        
+        result = {
+            'positions': poses[:, :3] * 1000,  # 转换为mm
+            'orientations': poses[:, 3:],       # 度
+            'transform_matrices': T
+        }
+        if link_frames:
+            result['link_frames'] = frames      # (N, 6, 4, 4) 各关节坐标系
+        return result
+    
     def rotation_matrix_to_euler(self, R):
         """旋转矩阵转欧拉角 (ZYX顺序)"""
         # 提取欧拉角
@@ -624,6 +624,7 @@ class ArmSimulationWidget(QWidget):
         # 关节角度 (度)
         self.left_arm_joints = [0, -30, -60, -90, 0, 0]   # 默认姿态
         self.right_arm_joints = [0, 30, 60, 90, 0, 0]     # 默认姿态
+        self.collision_model = None                       # 胶囊体碰撞模型 (首次绘制时创建)
         
         # 运动轨迹
         self.left_arm_trajectory = []   # 左臂轨迹
@@ -979,6 +980,24 @@ class ArmSimulationWidget(QWidget):
         
         return positions
     
+    def collision_clearance(self):
+        """当前双臂姿态的最小胶囊体间隙 (fairino.collision), 不可用时返回 None"""
+        try:
+            if self.collision_model is None:
+                fr3_control_path = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'fr3_control'))
+                if fr3_control_path not in sys.path:
+                    sys.path.append(fr3_control_path)
+                from fairino.collision import DualArmCollisionModel, arm_bases, body_capsules
+                
+                left_base, right_base = arm_bases(self.robot_structure)
+                self.collision_model = DualArmCollisionModel(left_base=left_base, right_base=right_base,
+                                                             body=body_capsules(self.robot_structure))
+            return self.collision_model.check(self.left_arm_joints, self.right_arm_joints)
+        except Exception as e:
+            print(f"碰撞检测不可用: {e}")
+            self.collision_model = False
+            return None
+    
     def draw_info_panel(self, painter):
         """绘制信息面板"""
         painter.save()
@@ -994,6 +1013,12 @@ class ArmSimulationWidget(QWidget):
             f"缩放: {self.scale:.1f}x"
         ]
         
+        # 添加碰撞间隙
+        clearance = self.collision_clearance() if self.collision_model is not False else None
+        if clearance:
+            info_texts.append(f"最小间隙: {clearance['min_clearance']:.0f}mm"
+                              f"{' ⚠️' if clearance['collision'] else ''}")
+        
         # 添加轨迹信息（如果有）
         if self.left_arm_trajectory or self.right_arm_trajectory:
             info_texts.extend([
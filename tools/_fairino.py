@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+fr3_control 路径引导
+工具包模块共用: 按需加入 fr3_control 路径并导入 fairino 子模块 (批量正解、闭式逆解、可达性地图)
+"""
+
+import os
+import sys
+import importlib
+
+FR3_CONTROL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'fr3_control')
+
+
+def fairino_module(name: str):
+    """导入 fairino.<name>, 首次调用时加入 fr3_control 路径"""
+    if FR3_CONTROL_PATH not in sys.path:
+        sys.path.insert(0, FR3_CONTROL_PATH)
+    return importlib.import_module(f'fairino.{name}')
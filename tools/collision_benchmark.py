@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+双臂胶囊体碰撞检测基准测试
+测试 fairino.collision.DualArmCollisionModel 单帧检查 (与 8ms 状态帧周期对比) 与批量规划位姿的单位姿耗时,
+并用密集采样的暴力距离抽查线段距离的正确性
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+# 添加fr3_control路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'fr3_control'))
+
+from fairino.collision import DualArmCollisionModel, segment_distance
+from fairino.kinematics import FR3_JOINT_LIMITS
+
+
+def random_joints(count: int, seed: int = 0) -> np.ndarray:
+    """在关节限位内均匀采样 count 个构型 (度)"""
+    rng = np.random.default_rng(seed)
+    limits = np.asarray(FR3_JOINT_LIMITS, dtype=float)
+    return rng.uniform(limits[:, 0], limits[:, 1], size=(count, 6))
+
+
+def check_segment_distance(count: int = 2000, samples: int = 401) -> float:
+    """线段距离与两条线段各取 samples 个点的暴力最小距离对比, 返回最大偏差 (mm)"""
+    rng = np.random.default_rng(1)
+    points = rng.normal(scale=100.0, size=(count, 4, 3))
+    points[:count // 8, 1] = points[:count // 8, 0]                              # 退化为点
+    points[count // 8:count // 4, 3] = (points[count // 8:count // 4, 2]
+                                        + points[count // 8:count // 4, 1] - points[count // 8:count // 4, 0])  # 平行
+    exact = segment_distance(points[:, 0], points[:, 1], points[:, 2], points[:, 3])
+    s = np.linspace(0.0, 1.0, samples)[:, None]
+    error = 0.0
+    for (p1, q1, p2, q2), d in zip(points, exact):
+        a = p1 + s * (q1 - p1)
+        b = p2 + s * (q2 - p2)
+        brute = np.sqrt(((a[:, None] - b[None]) ** 2).sum(axis=-1)).min()
+        # 暴力采样只会高估距离
+        error = max(error, d - brute, brute - d - np.linalg.norm(q1 - p1) / samples - np.linalg.norm(q2 - p2) / samples)
+    return error
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="双臂胶囊体碰撞检测基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000], help="批量位姿数")
+    parser.add_argument("--frames", type=int, default=2000, help="单帧检查次数")
+    parser.add_argument("--tool", type=float, nargs=6, metavar=("X", "Y", "Z", "RX", "RY", "RZ"),
+                        help="工具坐标系 (法兰 -> TCP, mm/°), 增加工具胶囊体")
+
+    args = parser.parse_args()
+    model = DualArmCollisionModel(tool=args.tool)
+    print(f"🧩 胶囊体: {len(model.names)} 个, 检测对: {len(model.pairs)} 对")
+    print(f"📐 线段距离最大偏差: {check_segment_distance():.2e} mm")
+
+    # 单帧: 每个状态帧用当前关节角检查一次
+    left, right = random_joints(args.frames, 2).tolist(), random_joints(args.frames, 3).tolist()
+    model.check(left[0], right[0])     # 预热
+    start = time.perf_counter()
+    for l, r in zip(left, right):
+        model.check(l, r)
+    single = (time.perf_counter() - start) / args.frames
+    print(f"⚡ 单帧: {single * 1e3:.3f} ms ({single / 0.008 * 100:.1f}% 的 8ms 状态帧周期)")
+
+    print(f"{'N':>9}  {'µs/位姿':>10}  {'总耗时':>10}  {'碰撞比例':>8}")
+    print("-" * 46)
+    for count in args.sizes:
+        left, right = random_joints(count, 4), random_joints(count, 5)
+        start = time.perf_counter()
+        clearance, _ = model.min_clearance(left, right)
+        elapsed = time.perf_counter() - start
+        print(f"{count:>9}  {elapsed / count * 1e6:>10.2f}  {elapsed * 1e3:>8.1f}ms  {(clearance < 0).mean():>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,11 @@ import json
 from typing import List, Dict, Tuple
 from datetime import datetime
 
+try:
+    from ._fairino import fairino_module
+except ImportError:  # 作为脚本直接运行
+    from _fairino import fairino_module
+
 class DHParameterAnalyzer:
     """DH参数分析器"""
     
@@ -90,6 +95,21 @@ class DHParameterAnalyzer:
         
         return T_cumulative
     
+    def forward_kinematics_batch(self, joint_angles, link_frames: bool = False) -> np.ndarray:
+        """
+        批量正向运动学计算
+        
+        Args:
+            joint_angles: (N, 6) 关节角度 (度)
+            link_frames: 返回全部连杆坐标系
+        
+        Returns:
+            (N, 4, 4) 末端变换矩阵, link_frames 时为 (N, 6, 4, 4)
+        """
+        theta = np.radians(np.asarray(joint_angles, dtype=float) + np.asarray(self.dh_params['theta_offset']))
+        return fairino_module('kinematics').dh_chain(theta, np.radians(self.dh_params['alpha']), self.dh_params['a'],
+                                      self.dh_params['d'], True, link_frames)
+    
     def extract_pose(self, T: np.ndarray) -> Dict:
         """
         从变换矩阵提取位置和姿态
@@ -126,53 +146,38 @@ class DHParameterAnalyzer:
             'rotation_matrix': R.tolist()
         }
     
-    def inverse_kinematics_geometric(self, target_pose: np.ndarray) -> List[float]:
+    def inverse_kinematics_all(self, target_pose: np.ndarray) -> List[List[float]]:
         """
-        几何法逆运动学求解 (简化版本)
+        闭式逆运动学求解, 返回全部构型
+        
+        腕心 (法兰沿 z 轴后退 d6) 决定 J1~J3 (肩部左右 × 肘部上下), 腕部姿态决定 J4~J6 (手腕翻转),
+        最多 8 组, 只保留关节限位内的解
         
         Args:
             target_pose: 4x4目标变换矩阵
         
         Returns:
-            6个关节角度 (度)
+            关节角度列表 (度) 的列表, 不可达时为空
         """
-        # 这是一个简化的逆运动学实现
-        # 实际应用中需要更复杂的几何解法
-        
-        R_06 = target_pose[:3, :3]
-        p_06 = target_pose[:3, 3]
-        
-        # 计算腕部中心位置
-        d6 = self.dh_params['d'][5]  # 107mm
-        p_wrist = p_06 - d6 * R_06[:, 2]
-        
-        # 求解前三个关节 (位置)
-        q1 = np.arctan2(p_wrist[1], p_wrist[0])
-        
-        # 简化求解 (需要更完整的几何分析)
-        r = np.sqrt(p_wrist[0]**2 + p_wrist[1]**2)
-        s = p_wrist[2] - self.dh_params['d'][0]  # 减去基座高度
-        
-        # 使用余弦定理求解J2, J3
-        a2 = self.dh_params['a'][2]  # 316mm
-        d4 = self.dh_params['d'][3]  # 384mm
-        
-        D = (r**2 + s**2 - a2**2 - d4**2) / (2 * a2 * d4)
-        D = np.clip(D, -1, 1)  # 限制在有效范围
-        
-        q3 = np.arccos(D)
-        q2 = np.arctan2(s, r) - np.arctan2(d4 * np.sin(q3), a2 + d4 * np.cos(q3))
-        
-        # 应用偏移
-        q2 = q2 + np.radians(90)
-        q3 = q3 - np.radians(90)
+        model = fairino_module('kinematics').ArmKinematics(self.dh_params, self.joint_limits)
+        return model.inverse_all(target_pose)
+    
+    def inverse_kinematics_geometric(self, target_pose: np.ndarray, seed: List[float] = None) -> List[float]:
+        """
+        几何法 (闭式) 逆运动学求解, 取最接近 seed 的构型
         
-        # 求解后三个关节 (姿态) - 简化处理
-        q4 = 0
-        q5 = np.radians(90)
-        q6 = 0
+        Args:
+            target_pose: 4x4目标变换矩阵
+            seed: 参考关节角度 (度), 默认零位
         
-        return [np.degrees(q) for q in [q1, q2, q3, q4, q5, q6]]
+        Returns:
+            6个关节角度 (度)
+        """
+        model = fairino_module('kinematics').ArmKinematics(self.dh_params, self.joint_limits)
+        solution = model.inverse_nearest(target_pose, seed if seed is not None else [0.0] * 6)
+        if solution is None:
+            raise ValueError("目标位姿不可达或超出关节限位")
+        return solution
     
     def test_forward_kinematics(self) -> Dict:
         """测试正向运动学"""
@@ -228,8 +233,9 @@ class DHParameterAnalyzer:
                 # 正向运动学得到目标位姿
                 T_target = self.forward_kinematics(original_angles)
                 
-                # 逆向运动学求解
-                solved_angles = self.inverse_kinematics_geometric(T_target)
+                # 逆向运动学求解: 全部构型中取最接近原始角度的一组
+                branches = self.inverse_kinematics_all(T_target)
+                solved_angles = self.inverse_kinematics_geometric(T_target, original_angles)
                 
                 # 验证精度 - 再次正向运动学
                 T_verify = self.forward_kinematics(solved_angles)
@@ -241,13 +247,14 @@ class DHParameterAnalyzer:
                 results[case_name] = {
                     'original_angles': original_angles,
                     'solved_angles': solved_angles,
+                    'branch_count': len(branches),
                     'position_error': position_error,
                     'angle_error': angle_error,
                     'status': 'success' if position_error < 1.0 and angle_error < 5.0 else 'warning'
                 }
                 
                 print(f"    📐 原始角度: {[f'{a:.1f}' for a in original_angles]}")
-                print(f"    🎯 求解角度: {[f'{a:.1f}' for a in solved_angles]}")
+                print(f"    🎯 求解角度: {[f'{a:.1f}' for a in solved_angles]} (共 {len(branches)} 组解)")
                 print(f"    📊 位置误差: {position_error:.3f} mm")
                 print(f"    📊 角度误差: {angle_error:.3f} °")
                 
@@ -261,8 +268,14 @@ class DHParameterAnalyzer:
         
         return results
     
-    def test_workspace_analysis(self) -> Dict:
-        """工作空间分析"""
+    def test_workspace_analysis(self, reach_map=None) -> Dict:
+        """
+        工作空间分析
+
+        Args:
+            reach_map: 可选的可达性体素地图 (fairino.reachability.ReachabilityMap, 如 load_voxel_map() 的结果),
+                给定时加测体素可达体积与测试点落入比例
+        """
         print("\n📐 工作空间分析...")
         
         # 生成测试点
@@ -283,28 +296,24 @@ class DHParameterAnalyzer:
         
         print(f"  测试 {len(test_points)} 个工作空间点...")
         
-        for angles in test_points:
-            try:
-                T = self.forward_kinematics(angles)
-                position = T[:3, 3]
-                
-                reach = np.linalg.norm(position[:2])
-                height = position[2]
-                
-                reachable_points.append({
-                    'angles': angles,
-                    'position': position.tolist(),
-                    'reach': reach,
-                    'height': height
-                })
-                
-                max_reach = max(max_reach, reach)
-                min_reach = min(min_reach, reach)
-                max_height = max(max_height, height)
-                min_height = min(min_height, height)
-                
-            except:
-                continue
+        # 批量正解一次算出全部测试点
+        positions = self.forward_kinematics_batch(test_points)[:, :3, 3]
+        reaches = np.linalg.norm(positions[:, :2], axis=1)
+        
+        for angles, position, reach in zip(test_points, positions, reaches):
+            height = position[2]
+            
+            reachable_points.append({
+                'angles': angles,
+                'position': position.tolist(),
+                'reach': reach,
+                'height': height
+            })
+            
+            max_reach = max(max_reach, reach)
+            min_reach = min(min_reach, reach)
+            max_height = max(max_height, height)
+            min_height = min(min_height, height)
         
         workspace_analysis = {
             'total_test_points': len(test_points),
@@ -324,8 +333,30 @@ class DHParameterAnalyzer:
         print(f"    📏 最小高度: {min_height:.1f} mm")
         print(f"    📦 工作空间体积估计: {workspace_analysis['workspace_volume_estimate']:.3f} 立方米")
         
+        if reach_map is None:
+            return workspace_analysis
+        
+        # 可达性体素地图
+        workspace_analysis['voxel_resolution'] = reach_map.resolution
+        workspace_analysis['voxel_volume'] = reach_map.volume()
+        workspace_analysis['test_points_in_voxel_map'] = float(reach_map.reachable(positions).mean())
+        print(f"    🧊 体素地图可达体积: {reach_map.volume():.3f} 立方米 (分辨率 {reach_map.resolution:.0f} mm)")
+        print(f"    🧊 测试点落在可达体素内: {workspace_analysis['test_points_in_voxel_map']*100:.1f}%")
+        
         return workspace_analysis
     
+    def load_voxel_map(self, **options):
+        """
+        按本分析器的 DH 参数与关节限位打开可达性体素地图
+
+        首次使用时全量采样构建 (数秒) 并写入缓存目录 (默认 ~/.cache/fr3_reachability), 之后直接打开缓存
+
+        Args:
+            options: 传给 fairino.reachability.load_reachability_map 的参数 (resolution, samples, cache_dir ...)
+        """
+        model = fairino_module('kinematics').ArmKinematics(self.dh_params, self.joint_limits)
+        return fairino_module('reachability').load_reachability_map(model, **options)
+    
     def check_singularities(self, joint_angles: List[float]) -> List[str]:
         """检查奇异性配置"""
         singularities = []
@@ -375,15 +406,15 @@ class DHParameterAnalyzer:
         
         return results
     
-    def generate_comprehensive_report(self) -> Dict:
-        """生成综合分析报告"""
+    def generate_comprehensive_report(self, reach_map=None) -> Dict:
+        """生成综合分析报告, reach_map 见 test_workspace_analysis"""
         print("📊 生成FR3机械臂DH参数综合分析报告...")
         print("=" * 60)
         
         # 执行所有测试
         forward_results = self.test_forward_kinematics()
         inverse_results = self.test_inverse_kinematics()
-        workspace_results = self.test_workspace_analysis()
+        workspace_results = self.test_workspace_analysis(reach_map)
         singularity_results = self.test_singularity_detection()
         
         # 汇总结果
@@ -435,11 +466,14 @@ def main():
     parser.add_argument("--output", help="输出报告文件名")
     parser.add_argument("--test", choices=['forward', 'inverse', 'workspace', 'singularity', 'all'], 
                        default='all', help="指定测试类型")
+    parser.add_argument("--voxel-map", action="store_true",
+                        help="工作空间分析加测可达性体素地图 (首次使用时构建并缓存到 ~/.cache/fr3_reachability)")
     
     args = parser.parse_args()
     
     # 创建分析器
     analyzer = DHParameterAnalyzer()
+    reach_map = analyzer.load_voxel_map() if args.voxel_map and args.test in ('workspace', 'all') else None
     
     # 执行指定测试
     if args.test == 'forward':
@@ -447,11 +481,11 @@ def main():
     elif args.test == 'inverse':
         results = analyzer.test_inverse_kinematics()
     elif args.test == 'workspace':
-        results = analyzer.test_workspace_analysis()
+        results = analyzer.test_workspace_analysis(reach_map)
     elif args.test == 'singularity':
         results = analyzer.test_singularity_detection()
     else:  # all
-        results = analyzer.generate_comprehensive_report()
+        results = analyzer.generate_comprehensive_report(reach_map)
         analyzer.save_report(results, args.output)
 
 if __name__ == "__main__":
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FR3控制器仿真启动脚本
+在本机回环地址上启动若干台仿真机器人 (XML-RPC 20003、状态帧 20004、文件 20010/20011、8080),
+供无硬件调试、CI 与多机压力测试使用
+"""
+
+import os
+import sys
+import time
+import argparse
+import ipaddress
+
+# 添加fr3_control路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'fr3_control'))
+
+from fairino.emulator import FR3Emulator
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="FR3控制器仿真")
+    parser.add_argument("--arms", type=int, default=2, help="仿真机器人数量")
+    parser.add_argument("--first-ip", default="127.0.0.2", help="第一台仿真机器人的回环地址, 其余依次递增")
+    parser.add_argument("--period", type=float, default=8.0, help="状态帧发送周期 (ms)")
+    parser.add_argument("--strict", action="store_true", help="未实现的接口返回 XML-RPC 错误")
+    args = parser.parse_args()
+
+    first = ipaddress.IPv4Address(args.first_ip)
+    emulator = FR3Emulator(strict=args.strict)
+    for i in range(args.arms):
+        emulator.add_arm(str(first + i), period=args.period / 1000.0)
+    emulator.start()
+    print(f"已启动 {args.arms} 台仿真机器人: {first} ~ {first + args.arms - 1}")
+
+    try:
+        while True:
+            time.sleep(5.0)
+            print(f"状态帧 已发送 {emulator.frames_sent} / 丢弃 {emulator.frames_dropped}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulator.stop()
+
+
+if __name__ == "__main__":
+    main()
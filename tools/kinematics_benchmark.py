@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量运动学基准测试
+对比逐位姿正解 (ArmKinematics.forward, 每个关节构造一个 4x4 矩阵) 与批量正解
+(ArmKinematics.forward_batch) 在 N = 1, 1e3, 1e6 个关节构型下的单位姿耗时;
+--inverse 时对比逐位姿数值逆解 (inverse_numeric) 与批量闭式逆解 (inverse_batch, 全部 8 组分支)
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+# 添加fr3_control路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'fr3_control'))
+
+from fairino.kinematics import ArmKinematics, FR3_JOINT_LIMITS, select_nearest
+
+
+def random_joints(count: int, seed: int = 0) -> np.ndarray:
+    """在关节限位内均匀采样 count 个构型 (度)"""
+    rng = np.random.default_rng(seed)
+    limits = np.asarray(FR3_JOINT_LIMITS, dtype=float)
+    return rng.uniform(limits[:, 0], limits[:, 1], size=(count, 6))
+
+
+def time_call(func, repeat: int) -> float:
+    """重复 repeat 次取最短耗时 (s)"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_inverse(model, sizes, loop_limit, repeat):
+    """逆解基准: 目标位姿由随机构型正解得到, 并检查原构型在闭式解的分支中"""
+    print(f"{'N':>9}  {'数值 µs/位姿':>12}  {'闭式 µs/位姿':>12}  {'闭式总耗时':>10}  {'加速比':>8}  {'平均解数':>8}")
+    print("-" * 74)
+    for count in sizes:
+        joints = random_joints(count, seed=1)
+        targets = model.forward_pose_batch(joints)
+
+        # 数值逆解从偏离 5° 的初值出发 (与连续运动中以当前关节为初值的情形相当)
+        measured = min(count, loop_limit)
+        seeds = joints + 5.0
+        numeric = time_call(lambda: [model.inverse_numeric(targets[i], seeds[i]) for i in range(measured)],
+                            1) / measured
+
+        batch = time_call(lambda: model.inverse_batch(targets), repeat if count <= 100000 else 1)
+        solutions, valid = model.inverse_batch(targets)
+        nearest, found = select_nearest(solutions, valid, joints)
+        missed = int((~found).sum() + (np.abs(nearest[found] - joints[found]).max(axis=1) > 1e-6).sum())
+        if missed:
+            print(f"⚠️ N={count} 有 {missed} 个构型未出现在闭式解中")
+
+        per_pose = batch / count
+        print(f"{count:>9}  {numeric * 1e6:>12.2f}  {per_pose * 1e6:>12.3f}  {batch * 1e3:>8.1f}ms  "
+              f"{numeric / per_pose:>7.1f}x  {valid.sum() / count:>8.2f}")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="批量运动学基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 1000, 1000000], help="批量大小")
+    parser.add_argument("--loop-limit", type=int, default=20000,
+                        help="逐位姿正解最多实测的位姿数, 超出部分按单位姿耗时外推")
+    parser.add_argument("--link-frames", action="store_true", help="同时返回全部连杆坐标系")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数 (取最短)")
+    parser.add_argument("--inverse", action="store_true", help="加测闭式逆解与数值逆解")
+
+    args = parser.parse_args()
+    model = ArmKinematics()
+    model.forward_batch(random_joints(8))     # 预热
+
+    print(f"{'N':>9}  {'逐位姿 µs/位姿':>14}  {'批量 µs/位姿':>12}  {'批量总耗时':>10}  {'加速比':>8}")
+    print("-" * 64)
+    for count in args.sizes:
+        joints = random_joints(count)
+
+        measured = joints[:min(count, args.loop_limit)]
+        loop = time_call(lambda: [model.forward(q) for q in measured], args.repeat) / len(measured)
+
+        repeat = args.repeat if count <= 100000 else 1
+        batch = time_call(lambda: model.forward_batch(joints, args.link_frames), repeat)
+
+        # 逐位姿与批量结果一致性抽查
+        check = joints[::max(1, count // 100)]
+        reference = np.array([model.frames(q) if args.link_frames else model.forward(q) for q in check])
+        error = np.abs(model.forward_batch(check, args.link_frames) - reference).max()
+        if error > 1e-6:
+            print(f"⚠️ N={count} 批量结果与逐位姿结果不一致: {error:.3e}")
+
+        per_pose = batch / count
+        print(f"{count:>9}  {loop * 1e6:>14.2f}  {per_pose * 1e6:>12.3f}  {batch * 1e3:>8.1f}ms  "
+              f"{loop / per_pose:>7.1f}x")
+
+    if args.inverse:
+        print()
+        run_inverse(model, args.sizes, min(args.loop_limit, 2000), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+可达性体素地图构建与查询
+按 DH 参数/工具坐标系构建 (或打开已缓存的) 可达性地图, 打印构建/加载耗时、可达体积与查询速度,
+--query 时查询指定点的可达性与可操作度
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+# 添加fr3_control路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'fr3_control'))
+
+from fairino.reachability import DEFAULT_CACHE_DIR, load_reachability_map
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="可达性体素地图构建与查询")
+    parser.add_argument("--resolution", type=float, default=10.0, help="体素边长 (mm)")
+    parser.add_argument("--samples", type=int, default=2000000, help="j2~j6 采样数")
+    parser.add_argument("--tool", type=float, nargs=6, metavar=("X", "Y", "Z", "RX", "RY", "RZ"),
+                        help="工具坐标系 (法兰 -> TCP, mm/°), 默认法兰")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="缓存目录")
+    parser.add_argument("--rebuild", action="store_true", help="忽略缓存重新构建")
+    parser.add_argument("--query", type=float, nargs=3, action="append", metavar=("X", "Y", "Z"),
+                        help="查询点 (基坐标系, mm), 可重复指定")
+
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    reach_map = load_reachability_map(tool=args.tool, resolution=args.resolution, samples=args.samples,
+                                      cache_dir=args.cache_dir, rebuild=args.rebuild)
+    elapsed = time.perf_counter() - start
+    meta = reach_map.meta
+    print(f"🗺️  地图: {reach_map.key} ({args.cache_dir})")
+    print(f"📦 网格: {tuple(meta['shape'])}, 分辨率 {reach_map.resolution:.1f} mm, "
+          f"{reach_map.grid.nbytes / 1e6:.1f} MB, 构建/加载耗时 {elapsed:.3f} s")
+    print(f"📏 可达体积: {reach_map.volume():.3f} 立方米, 最大可操作度 {meta['manipulability_max']:.3e}")
+
+    # 查询速度
+    rng = np.random.default_rng(0)
+    points = rng.uniform(reach_map.origin, reach_map.origin + reach_map.shape * reach_map.resolution,
+                         size=(1000000, 3))
+    start = time.perf_counter()
+    reach_map.reachable(points)
+    batch = (time.perf_counter() - start) / len(points)
+    start = time.perf_counter()
+    for p in points[:10000].tolist():
+        reach_map.is_reachable(*p)
+    single = (time.perf_counter() - start) / 10000
+    print(f"⚡ 查询: 批量 {batch * 1e6:.3f} µs/点, 单点 {single * 1e6:.2f} µs")
+
+    for x, y, z in args.query or []:
+        point = np.array([x, y, z])
+        reachable = bool(reach_map.reachable(point))
+        print(f"  [{x:.1f}, {y:.1f}, {z:.1f}] {'✅ 可达' if reachable else '❌ 不可达'}"
+              f"{f', 可操作度 {float(reach_map.manipulability(point)):.3e}' if reachable else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,11 @@ import numpy as np
 import json
 from typing import List, Dict, Tuple
 
+try:
+    from ._fairino import fairino_module
+except ImportError:  # 作为脚本直接运行
+    from _fairino import fairino_module
+
 class RoboDKConverter:
     """RoboDK参数转换器"""
     
@@ -112,6 +117,18 @@ class RoboDKConverter:
         
         return T_cumulative
     
+    def _forward_kinematics_batch(self, dh: Dict, joint_angles, link_frames: bool) -> np.ndarray:
+        theta = np.radians(np.asarray(joint_angles, dtype=float) + np.asarray(dh['theta_offset']))
+        return fairino_module('kinematics').dh_chain(theta, np.radians(dh['alpha']), dh['a'], dh['d'], True, link_frames)
+    
+    def forward_kinematics_robodk_batch(self, joint_angles, link_frames: bool = False) -> np.ndarray:
+        """使用RoboDK参数批量计算正向运动学, (N, 6) 关节角度 (度) -> (N, 4, 4)"""
+        return self._forward_kinematics_batch(self.robodk_dh, joint_angles, link_frames)
+    
+    def forward_kinematics_robot_batch(self, joint_angles, link_frames: bool = False) -> np.ndarray:
+        """使用实际机器人参数批量计算正向运动学, (N, 6) 关节角度 (度) -> (N, 4, 4), link_frames 时为 (N, 6, 4, 4)"""
+        return self._forward_kinematics_batch(self.robot_dh, joint_angles, link_frames)
+    
     def compare_forward_kinematics(self, test_angles: List[List[float]]) -> Dict:
         """比较RoboDK和实际机器人的正向运动学"""
         results = {}
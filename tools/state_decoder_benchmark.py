@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+20004状态帧解码吞吐量基准测试
+回放抓取的原始状态流 (或合成的校验帧), 对比逐字节扫描与 StateFrameDecoder 的解码速度, --bulk 时加测 numpy 批量解码 (state_dtype.decode_frames)
+"""
+
+import os
+import sys
+import time
+import random
+import ctypes
+import argparse
+
+# 添加fr3_control路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'fr3_control'))
+
+from fairino.Robot import RobotStatePkg
+from fairino.state_decoder import StateFrameDecoder, build_state_frame
+
+
+def synthesize_stream(frame_count: int) -> bytes:
+    """生成 frame_count 个带校验和的状态帧, 关节位置随帧变化"""
+    pkg = RobotStatePkg()
+    frames = []
+    for n in range(frame_count):
+        for i in range(6):
+            pkg.jt_cur_pos[i] = 30.0 * i + 0.001 * n
+            pkg.tl_cur_pos[i] = 100.0 * i - 0.01 * n
+        pkg.motion_done = n % 2
+        frames.append(build_state_frame(pkg, n))
+    return b"".join(frames)
+
+
+def chunk_stream(stream: bytes, chunk_size: int):
+    """按 recv 大小切分数据流, 模拟套接字分段到达"""
+    return [stream[i:i + chunk_size] for i in range(0, len(stream), chunk_size)]
+
+
+def legacy_decode(chunks) -> int:
+    """原 robot_state_routine_thread 的逐字节帧头扫描与校验, 返回有效帧数"""
+    buffer_size = 1024 * 1024
+    frames = 0
+    recvbuf = bytearray(buffer_size)
+    tmp_recvbuf = bytearray(buffer_size)
+    state_pkg = bytearray(buffer_size)
+    find_head_flag = False
+    index = 0
+    length = 0
+    tmp_len = 0
+    for chunk in chunks:
+        recvbyte = len(chunk)
+        recvbuf[:recvbyte] = chunk
+        if tmp_len > 0:
+            recvbuf = tmp_recvbuf[:tmp_len] + recvbuf[:recvbyte]
+            recvbyte += tmp_len
+            tmp_len = 0
+            recvbuf.extend(bytes(buffer_size - len(recvbuf)))
+        for i in range(recvbyte):
+            if format(recvbuf[i], '02X') == "5A" and not find_head_flag:
+                if i + 4 < recvbyte:
+                    if format(recvbuf[i + 1], '02X') == "5A":
+                        find_head_flag = True
+                        state_pkg[0] = recvbuf[i]
+                        index += 1
+                        length = (recvbuf[i + 4] << 8) | recvbuf[i + 3]
+                else:
+                    tmp_recvbuf[:recvbyte - i] = recvbuf[i:recvbyte]
+                    tmp_len = recvbyte - i
+                    break
+            elif find_head_flag and index < length + 5:
+                state_pkg[index] = recvbuf[i]
+                index += 1
+            elif find_head_flag and index >= length + 5:
+                if i + 1 < recvbyte:
+                    checksum = sum(state_pkg[:index])
+                    if checksum == (recvbuf[i + 1] << 8) | recvbuf[i]:
+                        frames += 1
+                    find_head_flag = False
+                    index = 0
+                    length = 0
+                else:
+                    tmp_recvbuf[:recvbyte - i] = recvbuf[i:recvbyte]
+                    tmp_len = recvbyte - i
+                    break
+    return frames
+
+
+def decoder_decode(chunks) -> int:
+    """StateFrameDecoder 解码, 返回有效帧数"""
+    decoder = StateFrameDecoder(RobotStatePkg)
+    for chunk in chunks:
+        decoder.feed(chunk)
+        decoder.decode()
+    return decoder.frame_count
+
+
+def bulk_decode(chunks) -> int:
+    """numpy 批量解码 (整段数据一次调用), 返回有效帧数"""
+    from fairino.state_dtype import decode_frames
+    return len(decode_frames(b"".join(chunks)))
+
+
+def run_benchmark(name, func, chunks, total_bytes, frame_size):
+    """执行一次基准测试并打印结果"""
+    start = time.perf_counter()
+    frames = func(chunks)
+    elapsed = time.perf_counter() - start
+    per_frame_us = elapsed / max(frames, 1) * 1e6
+    print(f"  {name:<20} 帧数: {frames:>8}  耗时: {elapsed:8.3f} s  "
+          f"{frames / elapsed:10.0f} 帧/s  {total_bytes / elapsed / 1e6:8.2f} MB/s  "
+          f"{per_frame_us:8.2f} µs/帧")
+    return {'name': name, 'frames': frames, 'elapsed': elapsed, 'per_frame_us': per_frame_us}
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="20004状态帧解码吞吐量基准测试")
+    parser.add_argument("--capture", help="抓取的20004原始数据流文件, 不指定时合成校验帧")
+    parser.add_argument("--frames", type=int, default=5000, help="合成帧数")
+    parser.add_argument("--chunk", type=int, default=0,
+                        help="模拟每次recv的字节数, 默认随机切分(200~4000字节)")
+    parser.add_argument("--skip-legacy", action="store_true", help="跳过逐字节扫描基准")
+    parser.add_argument("--bulk", action="store_true", help="加测numpy批量解码(需要numpy)")
+
+    args = parser.parse_args()
+
+    if args.capture:
+        with open(args.capture, 'rb') as f:
+            stream = f.read()
+        print(f"📂 回放抓包文件: {args.capture} ({len(stream)} 字节)")
+    else:
+        stream = synthesize_stream(args.frames)
+        print(f"🔧 合成 {args.frames} 个状态帧 ({len(stream)} 字节)")
+
+    if args.chunk > 0:
+        chunks = chunk_stream(stream, args.chunk)
+    else:
+        rng = random.Random(0)
+        chunks = []
+        pos = 0
+        while pos < len(stream):
+            size = rng.randint(200, 4000)
+            chunks.append(stream[pos:pos + size])
+            pos += size
+
+    frame_size = ctypes.sizeof(RobotStatePkg)
+    print(f"📦 分段数: {len(chunks)}, 状态包大小: {frame_size} 字节")
+    print("-" * 60)
+
+    results = [run_benchmark("StateFrameDecoder", decoder_decode, chunks, len(stream), frame_size)]
+    if args.bulk:
+        run_benchmark("numpy批量解码", bulk_decode, chunks, len(stream), frame_size)
+    if not args.skip_legacy:
+        results.append(run_benchmark("逐字节扫描(旧)", legacy_decode, chunks, len(stream), frame_size))
+        speedup = results[1]['per_frame_us'] / max(results[0]['per_frame_us'], 1e-9)
+        print("-" * 60)
+        print(f"⚡ 加速比: {speedup:.1f}x")
+
+    period_ms = 8
+    load = results[0]['per_frame_us'] / (period_ms * 1000) * 100
+    print(f"📊 8ms反馈周期下解码线程CPU占用约 {load:.2f}% (单臂)")
+
+
+if __name__ == "__main__":
+    main()